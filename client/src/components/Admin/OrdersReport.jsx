@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from "react";
-import axios from "axios";
+import axiosInstance from "../../axiosInstance";
 import {
   Button,
   TextField,
@@ -28,9 +28,10 @@ const OrdersReport = () => {
   // Fetch all items once
   const fetchData = async () => {
     try {
-      const res = await axios.get(
-        "https://shasthomeds-backend.onrender.com/orders-report-items/",
-      );
+      // export=json streams the full (unpaginated) report
+      const res = await axiosInstance.get("/orders-report-items/", {
+        params: { export: "json" },
+      });
       setAllData(res.data);
     } catch (err) {
       console.error("Failed to fetch report:", err);
@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Optional async deployment (async views such as payment/session/<tran_id>/
+then wait on the payment gateway without holding a worker thread):
+    gunicorn shasthomeds.asgi:application -k uvicorn.workers.UvicornWorker
 """
 
 import os
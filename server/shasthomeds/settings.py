@@ -28,6 +28,29 @@ SSL_SUCCESS_URL = "https://shasthomeds-online.onrender.com/payment-success"
 SSL_FAIL_URL = "https://shasthomeds-online.onrender.com/payment-fail"
 SSL_CANCEL_URL = "https://shasthomeds-online.onrender.com/payment-cancel"
 
+# Payment gateway adapter (users/payments.py); use "users.payments.FakeGateway" for tests / load tests
+PAYMENT_GATEWAY = config("PAYMENT_GATEWAY", default="users.payments.SSLCommerzGateway")
+PAYMENT_HTTP_TIMEOUT = (5, 20)   # (connect, read) seconds
+PAYMENT_HTTP_POOL_SIZE = 10
+
+# In-process product suggestion index (users/suggest.py)
+SUGGEST_MAX_ENTRIES = 200_000   # bounds memory per worker
+SUGGEST_INDEX_TTL = 300         # seconds before a lazy rebuild (other workers' edits)
+
+# Cache backend: locmem by default (single process / development). Deployments with
+# more than one worker process must point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (django.core.cache.backends.redis.RedisCache + redis://..., or
+# django.core.cache.backends.db.DatabaseCache + a table from `createcachetable`):
+# cache invalidation is only visible to the processes sharing the cache (`check --deploy` warns: users.W001).
+CACHES = {
+    "default": {
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("CACHE_LOCATION", default="shasthomeds"),
+    }
+}
+RESPONSE_CACHE_ALIAS = "default"   # users/response_cache.py
+RESPONSE_CACHE_TIMEOUT = 300       # seconds; signals invalidate earlier on writes
+
 
 # -------------------------
 # Applications
@@ -40,6 +63,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # Third-party
     'rest_framework',
@@ -199,6 +223,12 @@ cloudinary.config(
 
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
+# Image uploads and responsive variants (users/media.py). "users.media.LocalMediaBackend"
+# stores files under MEDIA_ROOT and resizes with Pillow, for tests without Cloudinary.
+MEDIA_BACKEND = config("MEDIA_BACKEND", default="users.media.CloudinaryMediaBackend")
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # -------------------------
 # Security Headers
 # -------------------------
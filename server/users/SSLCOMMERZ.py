@@ -1,16 +1,19 @@
 
+from asgiref.sync import sync_to_async
 from django.shortcuts import redirect
-from sslcommerz_lib import SSLCOMMERZ
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication  # pyright: ignore[reportMissingImports]
 
-from django.core.mail import send_mail
 
 from django.conf import settings
 
 EMAIL_HOST_USER = settings.EMAIL_HOST_USER
 
-from .models import Order
+from .models import Order, OutboundEmail
+from .payments import get_gateway, process_payment_event
 
 # === SSLCommerz Config ===
 # SSL Credentials
@@ -28,8 +31,9 @@ def create_payment_session(amount, tran_id, success_url, fail_url, cancel_url,
                            product_name, product_category):
     """
     Create a payment session with SSLCommerz.
+    Uses the process-wide gateway (pooled connections, explicit timeouts).
     """
-    sslcz = SSLCOMMERZ(sslcz_settings)
+    sslcz = get_gateway(sslcz_settings)
 
     post_body = {
         'total_amount': amount,
@@ -60,6 +64,50 @@ def create_payment_session(amount, tran_id, success_url, fail_url, cancel_url,
     return sslcz.createSession(post_body)
 
 
+# Runs the blocking gateway call in a worker thread so ASGI event loops stay free
+acreate_payment_session = sync_to_async(create_payment_session, thread_sensitive=False)
+
+
+# === Async payment session (ASGI) ===
+@csrf_exempt
+@require_POST
+async def payment_session(request, tran_id):
+    """
+    Create the gateway session for an existing card order (see
+    OrderViewSet.create with defer_payment_session). Under ASGI
+    (shasthomeds/asgi.py) a slow gateway doesn't hold a worker thread.
+    """
+    try:
+        auth = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except AuthenticationFailed as e:
+        return JsonResponse({"status": "failed", "message": str(e)}, status=401)
+    if auth is None:
+        return JsonResponse({"status": "failed", "message": "Authentication required"}, status=401)
+    user = auth[0]
+
+    try:
+        order = await Order.objects.aget(tran_id=tran_id, user=user, payment_method="card")
+    except Order.DoesNotExist:
+        return JsonResponse({"status": "failed", "message": "Order not found"}, status=404)
+
+    if order.payment_status == "paid":
+        return JsonResponse({"status": "failed", "message": "Order already paid"}, status=400)
+
+    ssl_response = await acreate_payment_session(
+        amount=order.total_amount,
+        tran_id=order.tran_id,
+        success_url="https://shasthomeds-backend.onrender.com/payment/success/",
+        fail_url="https://shasthomeds-backend.onrender.com/payment/fail/",
+        cancel_url="https://shasthomeds-backend.onrender.com/payment/cancel/",
+        customer_name=order.name,
+        customer_email=order.email,
+        customer_phone=order.phone,
+        product_name="Order #" + str(order.id),
+        product_category="General",
+    )
+    return JsonResponse(ssl_response)
+
+
 # === Success / Fail / Cancel Handlers ===
 @csrf_exempt
 def payment_success(request):
@@ -69,28 +117,22 @@ def payment_success(request):
     if not tran_id:
         return JsonResponse({"status": "failed", "message": "tran_id missing"})
 
-    try:
-        order = Order.objects.get(tran_id=tran_id)
-        order.payment_status = "paid"
-        order.status = "pending"
-        order.save()
-
-        
-
-        # send confirmation email
-        # send_mail(
-        #     subject=f"Payment Received - Order #{order.id}",
-        #     message=f"Dear {order.name},\n\nWe have received your payment.\n\nThank you!"
-        #         f"\n\nTransaction ID: {tran_id}",
-        #     from_email=EMAIL_HOST_USER,
-        #     recipient_list=[order.email],
-        # )
-
-        return redirect(f"https://shasthomeds-online.onrender.com/payment-success?tran_id={tran_id}")
-    
-    except Order.DoesNotExist:
+    order, transitioned = process_payment_event(tran_id, "success", data)
+    if order is None:
         return JsonResponse({"status": "failed", "message": "Order not found"})
 
+    # send confirmation email (only when this callback marked the order paid)
+    # if transitioned:
+    #     OutboundEmail.enqueue(
+    #         subject=f"Payment Received - Order #{order.id}",
+    #         message=f"Dear {order.name},\n\nWe have received your payment.\n\nThank you!"
+    #             f"\n\nTransaction ID: {tran_id}",
+    #         from_email=EMAIL_HOST_USER,
+    #         recipient_list=[order.email],
+    #     )
+
+    return redirect(f"https://shasthomeds-online.onrender.com/payment-success?tran_id={tran_id}")
+
 
 # ================== Failed ==================
 @csrf_exempt
@@ -101,23 +143,20 @@ def payment_fail(request):
     if not tran_id:
         return JsonResponse({"status": "failed", "message": "tran_id missing"})
 
-    try:
-        order = Order.objects.get(tran_id=tran_id)
-        order.payment_status = "failed"
-        order.status = "pending"
-        order.save()
+    order, transitioned = process_payment_event(tran_id, "fail", data)
+    if order is None:
+        return JsonResponse({"status": "failed", "message": "Order not found"})
 
-        # Optional: notify customer about failed payment
-        send_mail(
+    # Optional: notify customer about failed payment (once per tran_id)
+    if transitioned:
+        OutboundEmail.enqueue(
             subject=f"Payment Failed - Order #{order.id}",
             message=f"Dear {order.name},\n\nYour payment could not be processed.\nPlease try again.",
             from_email=EMAIL_HOST_USER,
             recipient_list=[order.email],
         )
 
-        return JsonResponse({"status": "failed", "message": "Payment failed"})
-    except Order.DoesNotExist:
-        return JsonResponse({"status": "failed", "message": "Order not found"})
+    return JsonResponse({"status": "failed", "message": "Payment failed"})
 
 
 # ================== Cancelled ==================
@@ -129,20 +168,17 @@ def payment_cancel(request):
     if not tran_id:
         return JsonResponse({"status": "failed", "message": "tran_id missing"})
 
-    try:
-        order = Order.objects.get(tran_id=tran_id)
-        order.payment_status = "pending"
-        order.status = "pending"
-        order.save()
+    order, transitioned = process_payment_event(tran_id, "cancel", data)
+    if order is None:
+        return JsonResponse({"status": "failed", "message": "Order not found"})
 
-        # Optional: notify customer about cancelled payment
-        send_mail(
+    # Optional: notify customer about cancelled payment (once per tran_id)
+    if transitioned:
+        OutboundEmail.enqueue(
             subject=f"Payment Cancelled - Order #{order.id}",
             message=f"Dear {order.name},\n\nYour payment has been cancelled.\nIf this was a mistake, please place the order again.",
             from_email=EMAIL_HOST_USER,
             recipient_list=[order.email],
         )
 
-        return JsonResponse({"status": "cancelled", "message": "Payment cancelled"})
-    except Order.DoesNotExist:
-        return JsonResponse({"status": "failed", "message": "Order not found"})
+    return JsonResponse({"status": "cancelled", "message": "Payment cancelled"})
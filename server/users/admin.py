@@ -2,9 +2,9 @@
 from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import  Appointment, Cart, CartItem, Category, CustomUser, Doctor, EmailOTP, Brand, MonthlyReport, Order,PrescriptionRequest,Product, YearlyReport
+from .models import  Appointment, Cart, CartItem, Category, CategoryClosure, CustomUser, Doctor, EmailOTP, Brand, MonthlyReport, Order, OutboundEmail, PaymentEvent, PrescriptionRequest,Product, ProductDailySales, YearlyReport
 from django.db import transaction
-from django.core.mail import send_mail
+from .media import media_url
 from django.utils import timezone
 from django.utils.html import format_html
 from .helpers import get_available_time_slots
@@ -47,6 +47,13 @@ class CategoryAdmin(admin.ModelAdmin):
     search_fields = ("name",)
     list_filter = ("is_active", "created_at")
 
+# Category closure (maintained by signals, see users/categories.py)
+@admin.register(CategoryClosure)
+class CategoryClosureAdmin(admin.ModelAdmin):
+    list_display = ("id", "ancestor", "descendant", "depth")
+    search_fields = ("ancestor__name", "descendant__name")
+    list_filter = ("depth",)
+
 # Product model
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
@@ -120,7 +127,8 @@ class PrescriptionRequestAdmin(admin.ModelAdmin):
     # Image preview method
     def image_preview(self, obj):
         if obj.uploaded_image:
-            return format_html('<a href="{}" target="_blank"><img src="{}" width="100" /></a>', obj.uploaded_image.url, obj.uploaded_image.url)
+            url = media_url(obj, "uploaded_image")
+            return format_html('<a href="{}" target="_blank"><img src="{}" width="100" /></a>', url, url)
         return "-"
     image_preview.short_description = "Prescription"
 
@@ -167,6 +175,14 @@ class OrderAdmin(admin.ModelAdmin):
     # Optional: add items_list to readonly_fields if you want to see it
     readonly_fields += ("items_list",)
 
+# --- Payment Event ---
+@admin.register(PaymentEvent)
+class PaymentEventAdmin(admin.ModelAdmin):
+    list_display = ("id", "tran_id", "event", "callback_id", "transitioned", "created_at")
+    search_fields = ("tran_id", "callback_id")
+    list_filter = ("event", "transitioned", "created_at")
+    readonly_fields = ("tran_id", "event", "callback_id", "payload", "transitioned", "created_at")
+
 # --- Monthly Report ---
 @admin.register(MonthlyReport)
 class MonthlyReportAdmin(admin.ModelAdmin):
@@ -223,6 +239,21 @@ class YearlyReportAdmin(admin.ModelAdmin):
         "updated_at",
     )
 
+# --- Product Daily Sales ---
+@admin.register(ProductDailySales)
+class ProductDailySalesAdmin(admin.ModelAdmin):
+    list_display = ("id", "date", "product_name", "quantity", "income", "cost", "profit")
+    search_fields = ("product_name",)
+    list_filter = ("date",)
+
+# --- Outbound Email ---
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ("id", "subject", "recipient_list", "status", "attempts", "next_attempt_at", "created_at", "sent_at")
+    search_fields = ("subject",)
+    list_filter = ("status", "created_at")
+    readonly_fields = ("created_at", "sent_at", "last_error")
+
 # --- Doctor ---
 @admin.register(Doctor)
 class DoctorAdmin(admin.ModelAdmin):
@@ -259,12 +290,11 @@ class AppointmentAdmin(admin.ModelAdmin):
 
             # Send email if admin confirms appointment
             if obj.status == "confirmed":
-                send_mail(
+                OutboundEmail.enqueue(
                     subject="Your Appointment is Confirmed",
                     message=f"Hello {obj.patient.full_name},\n\nYour appointment with {obj.doctor.full_name} on {obj.date} at {obj.time_slot} is confirmed.",
                     from_email=EMAIL_HOST_USER,
                     recipient_list=[obj.patient.email],
-                    fail_silently=True,
                 )
 
         except Exception as e:
@@ -6,4 +6,9 @@ class UsersConfig(AppConfig):
     name = "users"
 
     def ready(self):
+        from django.core import checks
+
         import users.signals
+        from users.response_cache import check_response_cache
+
+        checks.register(check_response_cache, checks.Tags.caches, deploy=True)
@@ -0,0 +1,283 @@
+# users/catalog_import.py
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Brand, Category, Product
+from .response_cache import invalidate_all
+from .search import build_search_text
+from .slugs import SlugAllocator
+from .suggest import invalidate_suggest_index
+
+IMPORT_FORMATS = ("csv", "ndjson")
+IMPORT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+
+# Importable columns by type. Files exported from /exports/products/ can be
+# imported as is: computed and read-only columns (new_price, slug, ...) are ignored.
+TEXT_FIELDS = (
+    "name", "description", "generic_name", "indication", "adult_dose", "child_dose",
+    "contraindication", "precaution", "side_effect", "unit", "unit_value", "weight_unit",
+    "image1", "image2", "image3",
+)
+DECIMAL_FIELDS = ("actual_price", "price", "offer_price")
+INTEGER_FIELDS = ("stock", "weight_value")
+BOOLEAN_FIELDS = ("prescription_required", "is_active")
+VALUE_FIELDS = (*TEXT_FIELDS, *DECIMAL_FIELDS, *INTEGER_FIELDS, *BOOLEAN_FIELDS)
+# brand / category: id, name or slug; *_id and *__name are the export column names
+RELATION_COLUMNS = {
+    "category": "category", "category_id": "category", "category__name": "category",
+    "brand": "brand", "brand_id": "brand", "brand__name": "brand",
+}
+REQUIRED_FOR_NEW = ("name", "price", "category")
+
+# Columns written by the upsert for rows whose sku already exists
+UPSERT_FIELDS = (
+    *VALUE_FIELDS, "category", "brand",
+    "new_price", "discount_price", "package_quantity", "weight_display", "unit_display",
+    "search_text", "updated_at",
+)
+
+CHOICES = {
+    "unit": {value for value, _ in Product.UNIT_CHOICES},
+    "weight_unit": {value for value, _ in Product.WEIGHT_CHOICES},
+}
+MAX_OFFER_PERCENT = 100
+IMAGE_FIELDS = ("image1", "image2", "image3")
+# Not checked by full_clean: relations are resolved from the in-memory maps (no
+# existence query per row), image values are stored Cloudinary references
+CLEAN_EXCLUDE = ("category", "brand", *IMAGE_FIELDS, "media")
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, {column: value}) from a text stream, one row at a time."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "ndjson":
+        for line_num, line in enumerate(stream, 1):
+            if line.strip():
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    row = e  # reported as a row error, the rest of the file still imports
+                yield line_num, row
+    else:
+        raise ValueError(f"Unsupported format '{fmt}', use one of {', '.join(IMPORT_FORMATS)}")
+
+
+def _convert(name, value):
+    if isinstance(value, str):
+        value = value.strip()
+    if name in DECIMAL_FIELDS:
+        try:
+            value = Decimal(str(value))
+            if not value.is_finite():
+                raise InvalidOperation
+        except InvalidOperation:
+            raise ImportRowError(f"{name}: '{value}' is not a number")
+        if value < 0:
+            raise ImportRowError(f"{name}: must not be negative")
+        if name == "offer_price" and value > MAX_OFFER_PERCENT:
+            raise ImportRowError(f"{name}: is a percentage and must be at most {MAX_OFFER_PERCENT}")
+        return value
+    if name in INTEGER_FIELDS:
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ImportRowError(f"{name}: '{value}' is not an integer")
+        if value < 0:
+            raise ImportRowError(f"{name}: must not be negative")
+        return value
+    if name in BOOLEAN_FIELDS:
+        if isinstance(value, bool):
+            return value
+        if str(value).lower() in ("1", "true", "yes"):
+            return True
+        if str(value).lower() in ("0", "false", "no"):
+            return False
+        raise ImportRowError(f"{name}: '{value}' is not true or false")
+    value = str(value)
+    max_length = Product._meta.get_field(name).max_length
+    if max_length and len(value) > max_length:
+        raise ImportRowError(f"{name}: longer than {max_length} characters")
+    if name in CHOICES and value not in CHOICES[name]:
+        raise ImportRowError(f"{name}: '{value}' is not one of {', '.join(sorted(CHOICES[name]))}")
+    return value
+
+
+class RelationMap:
+    """
+    In-memory lookup of brands or categories by id, lower-case name and slug,
+    loaded with one query. Unknown names are created on demand when allowed.
+    """
+
+    def __init__(self, model, create_missing):
+        self.model = model
+        self.create_missing = create_missing
+        self.names = {}
+        self.keys = {}
+        for pk, name, slug in model.objects.values_list("pk", "name", "slug"):
+            self._add(pk, name, slug)
+
+    def _add(self, pk, name, slug):
+        self.names[pk] = name
+        self.keys[str(pk)] = self.keys[name.lower()] = self.keys[slug] = pk
+
+    def resolve(self, value):
+        key = str(value).strip()
+        pk = self.keys.get(key) or self.keys.get(key.lower())
+        if pk is None:
+            if not self.create_missing or key.isdigit():
+                raise ImportRowError(f"unknown {self.model._meta.model_name} '{key}'")
+            obj = self.model(name=key)
+            obj.save()  # through save(): slug and signals (closure, caches) stay consistent
+            self._add(obj.pk, obj.name, obj.slug)
+            pk = obj.pk
+        return pk
+
+
+class ProductImporter:
+    """
+    Upsert products keyed on sku from rows of a CSV / NDJSON catalogue.
+
+    Rows are processed in chunks: one SELECT loads the chunk's existing
+    products, the row values are applied in memory (prices and display fields
+    via Product.apply_derived_fields, the search document, new slugs), and one
+    INSERT ... ON CONFLICT (sku) DO UPDATE writes the whole chunk. Empty cells
+    (and null JSON values) leave a field unchanged. Bulk writes send no
+    signals, so the product caches and the suggestion index are invalidated
+    once at the end.
+    """
+
+    def __init__(self, chunk_size=IMPORT_CHUNK_SIZE, create_missing=False):
+        self.chunk_size = chunk_size
+        self.brands = RelationMap(Brand, create_missing)
+        self.categories = RelationMap(Category, create_missing)
+        self.slugs = SlugAllocator(Product)
+        self.report = {"rows": 0, "created": 0, "updated": 0, "failed": 0, "ignored_columns": [], "errors": []}
+
+    def run(self, rows):
+        chunk = []
+        for line_num, row in rows:
+            chunk.append((line_num, row))
+            if len(chunk) >= self.chunk_size:
+                self.import_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.import_chunk(chunk)
+        if self.report["created"] or self.report["updated"]:
+            invalidate_all("products")
+            transaction.on_commit(invalidate_suggest_index)
+        return self.report
+
+    def error(self, line_num, sku, message):
+        self.report["failed"] += 1
+        if len(self.report["errors"]) < MAX_REPORTED_ERRORS:
+            self.report["errors"].append({"line": line_num, "sku": sku, "error": message})
+
+    def import_chunk(self, chunk):
+        # Last row wins when a sku repeats within the chunk
+        rows = {}
+        for line_num, row in chunk:
+            self.report["rows"] += 1
+            if not isinstance(row, dict):
+                self.error(line_num, None, f"invalid row: {row}")
+                continue
+            sku = str(row.get("sku") or "").strip()
+            if not sku:
+                self.error(line_num, None, "sku is required")
+                continue
+            rows[sku] = (line_num, row)
+
+        existing = {product.sku: product for product in Product.objects.filter(sku__in=rows)}
+        products = []
+        for sku, (line_num, row) in rows.items():
+            product = existing.get(sku)
+            try:
+                product = self.apply_row(product or Product(sku=sku), row, is_new=product is None)
+            except ImportRowError as e:
+                self.error(line_num, sku, str(e))
+                continue
+            products.append(product)
+
+        new_products = [product for product in products if product.sku not in existing]
+        self.assign_slugs(new_products)
+        with transaction.atomic():
+            Product.objects.bulk_create(
+                products,
+                update_conflicts=True,
+                unique_fields=["sku"],
+                update_fields=list(UPSERT_FIELDS),
+            )
+        self.report["created"] += len(new_products)
+        self.report["updated"] += len(products) - len(new_products)
+
+    def apply_row(self, product, row, is_new):
+        for column, value in row.items():
+            if value is None or value == "":
+                continue
+            if column in RELATION_COLUMNS:
+                relation = RELATION_COLUMNS[column]
+                pk = (self.categories if relation == "category" else self.brands).resolve(value)
+                setattr(product, f"{relation}_id", pk)
+            elif column in VALUE_FIELDS:
+                setattr(product, column, _convert(column, value))
+            elif column != "sku" and column not in self.report["ignored_columns"]:
+                self.report["ignored_columns"].append(column)
+
+        if is_new:
+            missing = [
+                name for name in REQUIRED_FOR_NEW
+                if getattr(product, f"{name}_id" if name == "category" else name) in (None, "")
+            ]
+            if missing:
+                raise ImportRowError(f"new product needs {', '.join(missing)}")
+            product.image1 = product.image1 or ""  # image1 is NOT NULL; images can be added later
+
+        product.apply_derived_fields()
+        try:
+            # Field limits (lengths, digits, integer range) checked here, not by the database mid-chunk
+            product.full_clean(exclude=CLEAN_EXCLUDE, validate_unique=False, validate_constraints=False)
+        except ValidationError as e:
+            raise ImportRowError(
+                "; ".join(f"{field}: {' '.join(messages)}" for field, messages in e.message_dict.items())
+            )
+        product.search_text = build_search_text(
+            product.name, product.generic_name, product.sku,
+            self.brands.names.get(product.brand_id, ""), product.indication,
+        )
+        return product
+
+    def assign_slugs(self, products):
+        """Give new products unique slugs (one prefix query per chunk, see users/slugs.py)."""
+        if products:
+            for product, slug in zip(products, self.slugs.allocate_many([p.name for p in products])):
+                product.slug = slug
+
+
+def import_products(stream, fmt, chunk_size=IMPORT_CHUNK_SIZE, create_missing=False, dry_run=False):
+    """
+    Import a catalogue stream and return the report. Each chunk commits on its
+    own, so a failure keeps the chunks already written; dry_run runs the whole
+    import in one transaction and rolls it back.
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}', use one of {', '.join(IMPORT_FORMATS)}")
+    rows = read_rows(stream, fmt)
+    if dry_run:
+        with transaction.atomic():
+            report = ProductImporter(chunk_size, create_missing).run(rows)
+            transaction.set_rollback(True)
+    else:
+        report = ProductImporter(chunk_size, create_missing).run(rows)
+    report["dry_run"] = dry_run
+    return report
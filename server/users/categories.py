@@ -0,0 +1,141 @@
+# users/categories.py
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .media import media_url
+from .models import Category, CategoryClosure
+
+CATEGORY_TREE_CACHE_KEY = "category-tree"
+CATEGORY_TREE_TIMEOUT = 60 * 60  # seconds; signals invalidate it on every change
+
+
+def closure_rows(parents):
+    """
+    Yield (ancestor_id, descendant_id, depth) for a {category_id: parent_id} map,
+    including the depth 0 self row. A parent cycle stops at the repeated node.
+    """
+    for node in parents:
+        current, depth, seen = node, 0, set()
+        while current is not None and current not in seen:
+            seen.add(current)
+            yield current, node, depth
+            current = parents.get(current)
+            depth += 1
+
+
+def rebuild_category_closure():
+    """Recompute the whole closure table from Category.parent (one read, one bulk insert)."""
+    with transaction.atomic():
+        parents = dict(Category.objects.values_list("id", "parent_id"))
+        CategoryClosure.objects.all().delete()
+        CategoryClosure.objects.bulk_create(
+            [
+                CategoryClosure(ancestor_id=ancestor, descendant_id=descendant, depth=depth)
+                for ancestor, descendant, depth in closure_rows(parents)
+            ],
+            batch_size=1000,
+        )
+
+
+def is_descendant(category_id, ancestor_id):
+    """True if category_id is ancestor_id itself or below it."""
+    return CategoryClosure.objects.filter(ancestor_id=ancestor_id, descendant_id=category_id).exists()
+
+
+def attach_category(category):
+    """
+    Link a new or re-parented category (and its subtree) under its current
+    parent with a fixed number of queries: drop the links from the old
+    ancestors, then insert one row per (new ancestor, subtree node) pair.
+    """
+    with transaction.atomic():
+        CategoryClosure.objects.bulk_create(
+            [CategoryClosure(ancestor_id=category.pk, descendant_id=category.pk, depth=0)],
+            ignore_conflicts=True,
+        )
+        subtree = list(
+            CategoryClosure.objects.filter(ancestor_id=category.pk).values_list("descendant_id", "depth")
+        )
+        subtree_ids = [descendant for descendant, _ in subtree]
+        if category.parent_id in subtree_ids:
+            raise ValueError("A category cannot be moved under itself or one of its descendants.")
+
+        CategoryClosure.objects.filter(descendant_id__in=subtree_ids).exclude(
+            ancestor_id__in=subtree_ids
+        ).delete()
+        if category.parent_id is None:
+            return
+        ancestors = CategoryClosure.objects.filter(descendant_id=category.parent_id).values_list(
+            "ancestor_id", "depth"
+        )
+        CategoryClosure.objects.bulk_create(
+            [
+                CategoryClosure(ancestor_id=ancestor, descendant_id=descendant, depth=a_depth + d_depth + 1)
+                for ancestor, a_depth in ancestors
+                for descendant, d_depth in subtree
+            ],
+            batch_size=1000,
+        )
+
+
+def detach_category(category):
+    """
+    Before a delete: children become roots (parent is SET_NULL), so drop the
+    links from the category's ancestors into its subtree. Rows of the category
+    itself go with the FK cascade.
+    """
+    subtree_ids = list(
+        CategoryClosure.objects.filter(ancestor_id=category.pk).values_list("descendant_id", flat=True)
+    )
+    CategoryClosure.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+
+
+def subtree_filter(category_ids, field="category"):
+    """
+    Filter kwargs selecting rows whose `field` is one of the categories or any
+    of their descendants (a semi-join on the closure table, no recursion).
+    """
+    descendants = CategoryClosure.objects.filter(ancestor_id__in=category_ids).values("descendant_id")
+    return {f"{field}__in": descendants}
+
+
+# --- Cached full tree ---
+
+def build_category_tree():
+    """Nested [{id, name, slug, image, is_active, children: [...]}, ...] from one query."""
+    nodes, roots = {}, []
+    categories = Category.objects.order_by("name").only(
+        "id", "name", "slug", "image", "media", "parent", "is_active"
+    )
+    for category in categories:
+        nodes[category.pk] = {
+            "id": category.pk,
+            "name": category.name,
+            "slug": category.slug,
+            "image": media_url(category, "image"),
+            "is_active": category.is_active,
+            "parent": category.parent_id,
+            "children": [],
+        }
+    for node in nodes.values():
+        parent = nodes.get(node["parent"])
+        (parent["children"] if parent else roots).append(node)
+    return roots
+
+
+def get_category_tree():
+    """Return (tree, etag) from the cache, building it on a miss."""
+    cached = cache.get(CATEGORY_TREE_CACHE_KEY)
+    if cached is None:
+        tree = build_category_tree()
+        body = json.dumps(tree, sort_keys=True, separators=(",", ":"))
+        cached = (tree, f'"{hashlib.md5(body.encode()).hexdigest()}"')
+        cache.set(CATEGORY_TREE_CACHE_KEY, cached, CATEGORY_TREE_TIMEOUT)
+    return cached
+
+
+def invalidate_category_tree():
+    cache.delete(CATEGORY_TREE_CACHE_KEY)
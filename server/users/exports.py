@@ -0,0 +1,111 @@
+# users/exports.py
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from .models import MonthlyReport, Order, OrderItem, Product, YearlyReport
+
+# Exportable tables: queryset, allowed columns (default projection), date lookup
+# used by start_date/end_date and a converter for the date value.
+EXPORT_TABLES = {
+    "orders": {
+        "queryset": Order.objects.order_by("id"),
+        "fields": (
+            "id", "user_id", "payment_method", "status", "payment_status", "tran_id",
+            "name", "email", "phone", "city", "postal_code",
+            "total_price", "total_new_price", "total_discount", "total_amount",
+            "created_at", "updated_at",
+        ),
+        "date_lookup": "created_at__date",
+    },
+    "order-items": {
+        "queryset": OrderItem.objects.order_by("id"),
+        "fields": (
+            "id", "order_id", "order__created_at", "order__payment_status", "product_id",
+            "product_name", "quantity", "actual_price", "price", "subtotal",
+        ),
+        "date_lookup": "order__created_at__date",
+    },
+    "monthly-reports": {
+        "queryset": MonthlyReport.objects.order_by("month"),
+        "fields": (
+            "month", "total_income", "total_profit", "total_orders",
+            "total_products_sold", "top_product", "products_details",
+        ),
+        "date_lookup": "month",
+    },
+    "yearly-reports": {
+        "queryset": YearlyReport.objects.order_by("year"),
+        "fields": (
+            "year", "total_income", "total_profit", "total_orders",
+            "total_products_sold", "top_product", "products_details",
+        ),
+        "date_lookup": "year",
+        "date_value": lambda d: d.year,
+    },
+    "products": {
+        "queryset": Product.objects.order_by("id"),
+        "fields": (
+            "id", "sku", "name", "slug", "generic_name", "category_id", "category__name",
+            "brand_id", "brand__name", "actual_price", "price", "new_price", "offer_price",
+            "discount_price", "stock", "unit", "unit_display", "weight_display",
+            "package_quantity", "prescription_required", "is_active", "created_at", "updated_at",
+        ),
+        "date_lookup": "created_at__date",
+    },
+}
+
+
+class Echo:
+    """File-like object that returns what is written (for csv.writer streaming)."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, header, filename):
+    """Stream an iterable of row tuples as a CSV download."""
+    writer = csv.writer(Echo())
+
+    def generate():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(generate(), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def stream_json(rows):
+    """Stream an iterable of dicts as a single JSON array, one element at a time."""
+    encoder = DjangoJSONEncoder()
+
+    def generate():
+        yield "["
+        first = True
+        for row in rows:
+            yield ("" if first else ",") + encoder.encode(row)
+            first = False
+        yield "]"
+
+    return StreamingHttpResponse(generate(), content_type="application/json")
+
+
+def stream_ndjson(rows, filename):
+    """Stream an iterable of dicts as newline-delimited JSON (one object per line)."""
+    encoder = DjangoJSONEncoder()
+    response = StreamingHttpResponse(
+        (encoder.encode(row) + "\n" for row in rows), content_type="application/x-ndjson"
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def csv_value(value):
+    """JSON-encode nested values (e.g. products_details) so they fit in one CSV cell."""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    return value
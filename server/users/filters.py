@@ -0,0 +1,145 @@
+# users/filters.py
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import BooleanField, Case, CharField, Count, Value, When
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .categories import subtree_filter
+
+# Upper bounds of the price facet bands on new_price; the last band is open-ended
+PRICE_BANDS = (100, 250, 500, 1000)
+
+TRUE_VALUES = {"1", "true", "yes"}
+FALSE_VALUES = {"0", "false", "no"}
+
+
+def _bool_param(params, name):
+    value = params.get(name)
+    if value is None or value == "":
+        return None
+    value = value.lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValidationError({name: "Must be true or false."})
+
+
+def _int_list_param(params, name):
+    value = params.get(name)
+    if not value:
+        return []
+    try:
+        return [int(v) for v in value.split(",") if v.strip()]
+    except ValueError:
+        raise ValidationError({name: "Must be an id or a comma separated list of ids."})
+
+
+def _decimal_param(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise ValidationError({name: "Must be a number."})
+
+
+def filter_products(queryset, params):
+    """
+    Apply catalogue filters from query params:
+    category (id, includes sub-categories), brand (ids), min_price / max_price
+    (on new_price), prescription_required, is_active and in_stock.
+    """
+    categories = _int_list_param(params, "category")
+    if categories:
+        queryset = queryset.filter(**subtree_filter(categories))
+
+    brands = _int_list_param(params, "brand")
+    if brands:
+        queryset = queryset.filter(brand_id__in=brands)
+
+    min_price = _decimal_param(params, "min_price")
+    if min_price is not None:
+        queryset = queryset.filter(new_price__gte=min_price)
+    max_price = _decimal_param(params, "max_price")
+    if max_price is not None:
+        queryset = queryset.filter(new_price__lte=max_price)
+
+    for name in ("prescription_required", "is_active"):
+        value = _bool_param(params, name)
+        if value is not None:
+            queryset = queryset.filter(**{name: value})
+
+    in_stock = _bool_param(params, "in_stock")
+    if in_stock is not None:
+        queryset = queryset.filter(stock__gt=0) if in_stock else queryset.filter(stock=0)
+    return queryset
+
+
+class ProductFilterBackend(BaseFilterBackend):
+    """DRF filter backend wrapping filter_products for ProductViewSet."""
+
+    def filter_queryset(self, request, queryset, view):
+        return filter_products(queryset, request.query_params)
+
+
+def _band_label(index):
+    lower = PRICE_BANDS[index - 1] if index else 0
+    if index == len(PRICE_BANDS):
+        return f"{lower}+"
+    return f"{lower}-{PRICE_BANDS[index]}"
+
+
+def product_facets(queryset):
+    """
+    Facet counts for a filtered product queryset in one GROUP BY query:
+    rows are grouped by category, brand, price band, prescription_required
+    and in-stock, then folded into per-facet counts in Python.
+    """
+    price_band = Case(
+        *[When(new_price__lt=upper, then=Value(_band_label(i))) for i, upper in enumerate(PRICE_BANDS)],
+        default=Value(_band_label(len(PRICE_BANDS))),
+        output_field=CharField(),
+    )
+    in_stock = Case(When(stock__gt=0, then=Value(True)), default=Value(False), output_field=BooleanField())
+    rows = (
+        queryset.order_by()
+        .annotate(price_band=price_band, in_stock=in_stock)
+        .values(
+            "category_id", "category__name", "brand_id", "brand__name",
+            "price_band", "prescription_required", "in_stock",
+        )
+        .annotate(count=Count("id"))
+    )
+
+    categories, brands = {}, {}
+    bands = {_band_label(i): 0 for i in range(len(PRICE_BANDS) + 1)}
+    prescription = {"true": 0, "false": 0}
+    stock = {"true": 0, "false": 0}
+    total = 0
+    for row in rows:
+        n = row["count"]
+        total += n
+        category = categories.setdefault(
+            row["category_id"], {"id": row["category_id"], "name": row["category__name"], "count": 0}
+        )
+        category["count"] += n
+        brand = brands.setdefault(
+            row["brand_id"], {"id": row["brand_id"], "name": row["brand__name"], "count": 0}
+        )
+        brand["count"] += n
+        bands[row["price_band"]] += n
+        prescription["true" if row["prescription_required"] else "false"] += n
+        stock["true" if row["in_stock"] else "false"] += n
+
+    by_count = lambda item: (-item["count"], item["name"] or "")
+    return {
+        "total": total,
+        "category": sorted(categories.values(), key=by_count),
+        "brand": sorted(brands.values(), key=by_count),
+        "price": [{"band": band, "count": n} for band, n in bands.items()],
+        "prescription_required": prescription,
+        "in_stock": stock,
+    }
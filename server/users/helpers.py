@@ -1,46 +1,60 @@
 # users/helpers.py
-from datetime import datetime, timedelta
+from collections import defaultdict
 from .models import Appointment
-import math
+from .slots import available_slots, build_slot_template
+
+
+def doctor_slot_template(doctor):
+    """The doctor's precompiled slot_template, built on the fly if it is empty (e.g. after a queryset update)."""
+    return doctor.slot_template or build_slot_template(doctor.available_time, doctor.max_patients_per_day)
+
 
 def get_available_time_slots(doctor, date):
     """
     Returns available small slots for a doctor on a date based on max_patients_per_day.
     Minimum 10 minutes per slot. Skips slots that would be less than 10 minutes.
     """
-    booked_slots = Appointment.objects.filter(
-        doctor=doctor,
-        date=date,
-        status__in=["pending", "confirmed"]
-    ).values_list("time_slot", flat=True)
-
-    small_slots = []
-
-    # Calculate total minutes of all ranges
-    total_minutes = 0
-    time_ranges = []
-    for time_range in doctor.available_time:
-        start_str, end_str = time_range.split("-")
-        start = datetime.strptime(start_str, "%H:%M")
-        end = datetime.strptime(end_str, "%H:%M")
-        minutes = int((end - start).total_seconds() // 60)
-        total_minutes += minutes
-        time_ranges.append((start, end, minutes))
-
-    if total_minutes == 0 or doctor.max_patients_per_day == 0:
-        return []
-
-    # Determine interval per patient
-    interval = max(10, math.floor(total_minutes / doctor.max_patients_per_day))  # at least 10 min
-
-    slots_count = 0
-    for start, end, minutes in time_ranges:
-        current = start
-        while current + timedelta(minutes=interval) <= end and slots_count < doctor.max_patients_per_day:
-            slot_str = current.strftime("%H:%M")
-            if slot_str not in booked_slots:
-                small_slots.append(slot_str)
-                slots_count += 1
-            current += timedelta(minutes=interval)
-
-    return small_slots
+    booked_slots = frozenset(
+        Appointment.objects.filter(
+            doctor=doctor,
+            date=date,
+            status__in=["pending", "confirmed"]
+        ).values_list("time_slot", flat=True)
+    )
+
+    return available_slots(doctor_slot_template(doctor), booked_slots, doctor.max_patients_per_day)
+
+
+def booked_slots_index(doctor_ids, start_date, end_date):
+    """
+    One query for all active bookings of the given doctors between two dates.
+    Returns {(doctor_id, date): set of "HH:MM"}.
+    """
+    index = defaultdict(set)
+    booked = Appointment.objects.filter(
+        doctor_id__in=doctor_ids,
+        date__range=(start_date, end_date),
+        status__in=["pending", "confirmed"],
+    ).values_list("doctor_id", "date", "time_slot")
+    for doctor_id, day, time_slot in booked:
+        index[(doctor_id, day)].add(time_slot)
+    return index
+
+
+def week_availability(doctor, days, booked_index):
+    """
+    {date: [slots]} for the given days using the doctor's precompiled
+    slot_template and a booked_slots_index (no queries).
+    """
+    template = doctor_slot_template(doctor)
+    availability = {}
+    for day in days:
+        if day.strftime("%A") in doctor.available_days:
+            slots = available_slots(
+                template,
+                booked_index.get((doctor.id, day), ()),
+                doctor.max_patients_per_day,
+            )
+            if slots:
+                availability[str(day)] = slots
+    return availability
@@ -0,0 +1,95 @@
+# users/mailer.py
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 60  # 1, 2, 4, 8 ... minutes between retries
+CLAIM_SECONDS = 10 * 60  # a claimed email whose worker died is retried after this
+
+
+def claim_batch(batch_size, now):
+    """
+    Claim up to batch_size due emails in a short transaction: they become
+    "sending" until now + CLAIM_SECONDS, so no other worker picks them up
+    and no lock or transaction stays open while SMTP runs. Claims of a
+    crashed worker expire and are claimed again.
+    """
+    with transaction.atomic():
+        # skip_locked lets several workers claim concurrently without waiting on each other
+        batch = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(Q(status="pending") | Q(status="sending"), next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        if batch:
+            OutboundEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+                status="sending", next_attempt_at=now + timedelta(seconds=CLAIM_SECONDS)
+            )
+    return batch
+
+
+def send_queued(batch_size=50, max_attempts=MAX_ATTEMPTS, backend=None):
+    """
+    Send up to batch_size due emails over one reused connection
+    (EMAIL_BACKEND by default; locmem/console work for tests).
+    Each email's outcome is committed on its own right after its send, so a
+    crash mid-batch re-sends at most the email that was in flight.
+    Failed sends are retried with exponential backoff and marked
+    "failed" after max_attempts. Returns (sent, failed) counts.
+    """
+    now = timezone.now()
+    sent = failed = 0
+
+    batch = claim_batch(batch_size, now)
+    if not batch:
+        return 0, 0
+
+    connection = get_connection(backend=backend)
+    try:
+        connection.open()
+    except Exception as e:
+        # Couldn't reach the mail server: reschedule the whole batch
+        for email in batch:
+            _schedule_retry(email, e, now, max_attempts)
+        return 0, len(batch)
+
+    try:
+        for email in batch:
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.message,
+                from_email=email.from_email,
+                to=email.recipient_list,
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as e:
+                _schedule_retry(email, e, now, max_attempts)
+                failed += 1
+            else:
+                OutboundEmail.objects.filter(pk=email.pk).update(
+                    status="sent", attempts=email.attempts + 1, sent_at=timezone.now(), last_error=""
+                )
+                sent += 1
+    finally:
+        connection.close()
+
+    return sent, failed
+
+
+def _schedule_retry(email, error, now, max_attempts):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= max_attempts:
+        email.status = "failed"
+    else:
+        email.status = "pending"
+        email.next_attempt_at = now + timedelta(seconds=BACKOFF_SECONDS * 2 ** (email.attempts - 1))
+    email.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
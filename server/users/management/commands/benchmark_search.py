@@ -0,0 +1,78 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from ...models import Brand, Category, Product
+from ...search import build_search_text, search_products
+
+NAMES = ["Napa", "Ace", "Seclo", "Maxpro", "Fexo", "Amoxil", "Losectil", "Monas", "Alatrol", "Zimax"]
+GENERICS = ["Paracetamol", "Omeprazole", "Esomeprazole", "Fexofenadine", "Amoxicillin",
+            "Montelukast", "Cetirizine", "Azithromycin", "Metformin", "Losartan"]
+INDICATIONS = ["fever and pain", "acid reflux", "allergic rhinitis", "bacterial infection",
+               "asthma", "type 2 diabetes", "hypertension", "urticaria"]
+
+
+def legacy_search(queryset, text):
+    """Unindexed OR of icontains over every searched column (what a naive endpoint would do)."""
+    return queryset.filter(
+        Q(name__icontains=text) | Q(generic_name__icontains=text) | Q(sku__icontains=text)
+        | Q(brand__name__icontains=text) | Q(indication__icontains=text)
+    ).order_by("name")
+
+
+class Command(BaseCommand):
+    help = "Benchmark /products/search/ on a synthetic catalogue (rolled back afterwards)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100_000, help="Synthetic products to create")
+        parser.add_argument("--number", type=int, default=20, help="Runs per query")
+        parser.add_argument(
+            "--queries", nargs="+", default=["nap", "para", "omeprazole 20", "fever", "paracetmol"],
+            help="Search strings to measure",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.populate(options["products"])
+            self.stdout.write(f"backend: {connection.vendor}, products: {Product.objects.count()}")
+            self.stdout.write(f"{'query':>16} {'hits':>6} {'legacy ms':>10} {'search ms':>10}")
+            for text in options["queries"]:
+                legacy = self.measure(lambda: list(legacy_search(Product.objects.all(), text)[:20]), options["number"])
+                hits = len(search_products(Product.objects.all(), text)[:20])
+                ranked = self.measure(lambda: list(search_products(Product.objects.all(), text)[:20]), options["number"])
+                self.stdout.write(f"{text:>16} {hits:>6} {legacy:>10.2f} {ranked:>10.2f}")
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("Done (synthetic data rolled back)"))
+
+    def measure(self, func, number):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        return (time.perf_counter() - start) / number * 1000
+
+    def populate(self, count):
+        rng = random.Random(42)
+        category = Category.objects.create(name="Benchmark category")
+        brands = Brand.objects.bulk_create(
+            [Brand(name=f"Bench Pharma {i}", slug=f"bench-pharma-{i}") for i in range(50)]
+        )
+        products = []
+        for i in range(count):
+            brand = rng.choice(brands)
+            name = f"{rng.choice(NAMES)} {rng.choice([10, 20, 250, 500])}"
+            generic = f"{rng.choice(GENERICS)} {rng.choice([10, 20, 250, 500])} mg"
+            indication = rng.choice(INDICATIONS)
+            sku = f"BENCH-{i:07d}"
+            products.append(Product(
+                sku=sku, name=name, slug=f"bench-{i}", generic_name=generic, indication=indication,
+                category=category, brand=brand, price=10, new_price=10, stock=100,
+                image1="products/benchmark",
+                search_text=build_search_text(name, generic, sku, brand.name, indication),
+            ))
+        Product.objects.bulk_create(products, batch_size=5000)
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE users_product")
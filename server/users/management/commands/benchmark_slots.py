@@ -0,0 +1,76 @@
+import math
+import timeit
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+
+from ...slots import available_slots, build_slot_template
+
+
+def legacy_slots(available_time, max_patients_per_day, booked_slots):
+    """Previous get_available_time_slots body (strptime + list membership), for comparison."""
+    small_slots = []
+    total_minutes = 0
+    time_ranges = []
+    for time_range in available_time:
+        start_str, end_str = time_range.split("-")
+        start = datetime.strptime(start_str, "%H:%M")
+        end = datetime.strptime(end_str, "%H:%M")
+        minutes = int((end - start).total_seconds() // 60)
+        total_minutes += minutes
+        time_ranges.append((start, end, minutes))
+
+    if total_minutes == 0 or max_patients_per_day == 0:
+        return []
+
+    interval = max(10, math.floor(total_minutes / max_patients_per_day))
+    slots_count = 0
+    for start, end, minutes in time_ranges:
+        current = start
+        while current + timedelta(minutes=interval) <= end and slots_count < max_patients_per_day:
+            slot_str = current.strftime("%H:%M")
+            if slot_str not in booked_slots:
+                small_slots.append(slot_str)
+                slots_count += 1
+            current += timedelta(minutes=interval)
+    return small_slots
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark doctor slot generation (no database access)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--number", type=int, default=200, help="Calls per measurement")
+        parser.add_argument(
+            "--patients", type=int, nargs="+", default=[10, 50, 100, 500, 1000],
+            help="max_patients_per_day values to measure",
+        )
+
+    def handle(self, *args, **options):
+        number = options["number"]
+        available_time = ["00:00-12:00", "12:30-23:50"]
+
+        self.stdout.write(f"{'patients':>9} {'slots':>6} {'legacy us':>10} {'new us':>8} {'cached us':>10}")
+        for patients in options["patients"]:
+            template = build_slot_template(available_time, patients)
+            booked = template[::2]  # half of the day already booked
+
+            expected = legacy_slots(available_time, patients, booked)
+            if available_slots(template, frozenset(booked), patients) != expected:
+                self.stderr.write(self.style.ERROR(f"Mismatch for max_patients_per_day={patients}"))
+                return
+
+            legacy = timeit.timeit(lambda: legacy_slots(available_time, patients, booked), number=number)
+            new = timeit.timeit(
+                lambda: available_slots(
+                    build_slot_template(available_time, patients), frozenset(booked), patients
+                ),
+                number=number,
+            )
+            cached = timeit.timeit(
+                lambda: available_slots(template, frozenset(booked), patients), number=number
+            )
+            self.stdout.write(
+                f"{patients:>9} {len(template):>6} {legacy / number * 1e6:>10.1f} "
+                f"{new / number * 1e6:>8.1f} {cached / number * 1e6:>10.1f}"
+            )
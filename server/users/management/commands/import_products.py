@@ -0,0 +1,38 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...catalog_import import IMPORT_CHUNK_SIZE, IMPORT_FORMATS, import_products
+
+
+class Command(BaseCommand):
+    help = "Create or update products (keyed on sku) from a CSV or NDJSON catalogue file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=IMPORT_FORMATS, help="Default: from the file extension")
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+        parser.add_argument("--create-missing", action="store_true", help="Create unknown brands and categories")
+        parser.add_argument("--dry-run", action="store_true", help="Validate and report, then roll back")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+        if not os.path.isfile(path):
+            raise CommandError(f"File not found: {path}")
+
+        with open(path, encoding="utf-8-sig", newline="") as stream:
+            report = import_products(
+                stream, fmt,
+                chunk_size=options["chunk_size"],
+                create_missing=options["create_missing"],
+                dry_run=options["dry_run"],
+            )
+
+        for error in report["errors"]:
+            self.stderr.write(f"line {error['line']} ({error['sku']}): {error['error']}")
+        if report["ignored_columns"]:
+            self.stdout.write(self.style.WARNING(f"Ignored columns: {', '.join(report['ignored_columns'])}"))
+        summary = json.dumps({k: report[k] for k in ("rows", "created", "updated", "failed", "dry_run")})
+        self.stdout.write(self.style.SUCCESS(summary))
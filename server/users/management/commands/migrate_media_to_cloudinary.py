@@ -1,30 +1,264 @@
-from django.core.management.base import BaseCommand
-from ...models import Brand, Category, Product
-import cloudinary.uploader
+import hashlib
+import json
 import os
+import posixpath
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from cloudinary import CloudinaryResource
 from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from ...media import image_field_names, media_record
+from ...models import Brand, Category, PrescriptionRequest, Product
+
+MODELS = (Brand, Category, Product, PrescriptionRequest)
+
+
+class DryRunUploader:
+    """Fake media backend for --dry-run: no network, returns a resource named after the content hash."""
+
+    def upload(self, file, options):
+        return CloudinaryResource(
+            public_id=posixpath.join(options.get("folder", ""), options["public_id"]),
+            format=posixpath.splitext(file.name)[1].lstrip(".") or None,
+            version=0,
+            type=options.get("type", "upload"),
+            resource_type=options.get("resource_type", "image"),
+            metadata={"bytes": file.size},
+        )
+
+    def url(self, resource):
+        return f"dry-run://{resource.public_id}.{resource.format}"
+
+    def variants(self, resource, file=None):
+        return None
+
+
+def file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest(), os.path.getsize(path)
+
+
+class Checkpoint:
+    """
+    JSON file of finished uploads, {digest: {"value": stored field value, "record": media record}}.
+    Rows are only marked done by their DB update, so a rerun skips migrated
+    rows and reuses uploads that finished before the crash.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.uploads = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.uploads = json.load(f)["uploads"]
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"uploads": self.uploads}, f)
+        os.replace(tmp, self.path)  # atomic: a crash never leaves a truncated checkpoint
+
 
 class Command(BaseCommand):
-    help = "Migrate local media files to Cloudinary"
-
-    def handle(self, *args, **kwargs):
-        models_with_images = [
-            (Brand, ["image"]),
-            (Category, ["image"]),
-            (Product, ["image1", "image2", "image3"]),
-        ]
-
-        for model, fields in models_with_images:
-            for obj in model.objects.all():
-                for field in fields:
-                    img_field = getattr(obj, field, None)
-                    if img_field and img_field.name:
-                        local_path = os.path.join(settings.BASE_DIR, "media", img_field.name)
-                        if os.path.exists(local_path):
-                            self.stdout.write(f"Uploading {local_path} to Cloudinary...")
-                            res = cloudinary.uploader.upload(local_path, folder=field)
-                            # Save the new Cloudinary URL
-                            setattr(obj, field, res["secure_url"])
-                            obj.save(update_fields=[field])
-                        else:
-                            self.stdout.write(self.style.WARNING(f"File not found: {local_path}"))
+    help = (
+        "Upload local media files (MEDIA_ROOT) of image fields to Cloudinary in parallel. "
+        "Identical files are uploaded once, rows are updated in batches and progress is "
+        "checkpointed so an interrupted run resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8, help="Concurrent uploads")
+        parser.add_argument("--batch-size", type=int, default=200, help="Rows per bulk update")
+        parser.add_argument(
+            "--checkpoint", default=os.path.join(settings.BASE_DIR, ".media_migration.json"),
+            help="Checkpoint file of finished uploads ('' to disable)",
+        )
+        parser.add_argument(
+            "--uploader",
+            help="Dotted path of the media backend class used to upload "
+            "(default: users.media.CloudinaryMediaBackend, or a fake uploader with --dry-run)",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Hash and dedup everything with a fake uploader (or --uploader); no DB or checkpoint writes",
+        )
+        parser.add_argument("--report-every", type=float, default=5, help="Seconds between progress lines")
+
+    def handle(self, *args, **options):
+        self.dry_run = options["dry_run"]
+        uploader_path = options["uploader"]
+        if uploader_path is None and self.dry_run:
+            self.uploader = DryRunUploader()
+        else:
+            uploader_path = uploader_path or "users.media.CloudinaryMediaBackend"
+            try:
+                self.uploader = import_string(uploader_path)()
+            except ImportError as e:
+                raise CommandError(f"Cannot load uploader {uploader_path}: {e}")
+        self.batch_size = options["batch_size"]
+        self.checkpoint = Checkpoint(None if self.dry_run else options["checkpoint"])
+
+        jobs = self.collect_jobs()
+        if not jobs:
+            self.stdout.write("No local media files to migrate.")
+            return
+
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            by_digest = self.hash_files(pool, jobs)
+            self.upload_all(pool, by_digest, options["workers"], options["report_every"])
+
+    # --- Scan ---
+
+    def collect_jobs(self):
+        """{local path: [(model, obj, field name), ...]} for every image still pointing at a local file."""
+        self.objects = {model: {} for model in MODELS}
+        jobs, missing = {}, 0
+        for model in MODELS:
+            fields = image_field_names(model)
+            for obj in model.objects.only("pk", "media", *fields).iterator(chunk_size=2000):
+                for name in fields:
+                    image = getattr(obj, name)
+                    if not image:
+                        continue
+                    filename = f"{image.public_id}.{image.format}" if image.format else image.public_id
+                    path = os.path.join(settings.MEDIA_ROOT, filename)
+                    if not os.path.isfile(path):
+                        # Uploaded values carry a version or a media record; anything else lost its file
+                        if not (image.version or (obj.media or {}).get(name)):
+                            missing += 1
+                        continue
+                    self.objects[model][obj.pk] = obj
+                    jobs.setdefault(path, []).append((model, obj, name))
+        if missing:
+            self.stdout.write(self.style.WARNING(f"{missing} images have no local file and no upload; skipped"))
+        return jobs
+
+    def hash_files(self, pool, jobs):
+        """Group the jobs by content hash: {digest: (path, size, [(model, obj, field), ...])}."""
+        by_digest = {}
+        paths = list(jobs)
+        for path, (digest, size) in zip(paths, pool.map(file_digest, paths)):
+            entry = by_digest.setdefault(digest, (path, size, []))
+            entry[2].extend(jobs[path])
+        rows = sum(len(targets) for _, _, targets in by_digest.values())
+        self.stdout.write(
+            f"{rows} images in {len(paths)} files, {len(by_digest)} unique contents "
+            f"({len(self.checkpoint.uploads)} already uploaded)"
+        )
+        return by_digest
+
+    # --- Upload ---
+
+    def upload_one(self, path, digest, field):
+        with open(path, "rb") as f:
+            file = File(f, name=os.path.basename(path))
+            options = {
+                "type": field.type,
+                "resource_type": field.resource_type,
+                **field.options,
+                # Content-addressed name: a retried upload overwrites nothing new
+                "public_id": digest[:32],
+                "overwrite": False,
+            }
+            resource = self.uploader.upload(file, options)
+            record = {
+                **media_record(resource, self.uploader.url(resource)),
+                "variants": self.uploader.variants(resource, file),
+            }
+        return {"value": field.get_prep_value(resource), "record": record}
+
+    def upload_all(self, pool, by_digest, workers, report_every):
+        self.pending = {model: set() for model in MODELS}
+        self.pending_count = 0
+        stats = {"uploaded": 0, "reused": 0, "failed": 0, "bytes": 0, "rows": 0}
+        total = len(by_digest)
+        started = last_report = time.monotonic()
+
+        todo = iter(by_digest.items())
+        in_flight = {}
+        while True:
+            # Keep at most 2 uploads per worker queued: bounded memory and open files
+            while len(in_flight) < workers * 2:
+                item = next(todo, None)
+                if item is None:
+                    break
+                digest, (path, size, targets) = item
+                if digest in self.checkpoint.uploads:
+                    stats["reused"] += 1
+                    self.apply(self.checkpoint.uploads[digest], targets, stats)
+                    continue
+                model, _, name = targets[0]
+                future = pool.submit(self.upload_one, path, digest, model._meta.get_field(name))
+                in_flight[future] = (digest, path, size, targets)
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, timeout=report_every, return_when=FIRST_COMPLETED)
+            for future in done:
+                digest, path, size, targets = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    stats["failed"] += 1
+                    self.stderr.write(f"Failed {path}: {e}")
+                    continue
+                stats["uploaded"] += 1
+                stats["bytes"] += size
+                self.checkpoint.uploads[digest] = result
+                self.apply(result, targets, stats)
+
+            now = time.monotonic()
+            if now - last_report >= report_every:
+                last_report = now
+                self.report(stats, total, now - started)
+
+        self.flush()
+        self.report(stats, total, time.monotonic() - started)
+        if stats["failed"]:
+            self.stdout.write(self.style.WARNING(f"{stats['failed']} uploads failed; rerun to retry them"))
+        elif self.checkpoint.path and os.path.exists(self.checkpoint.path):
+            os.remove(self.checkpoint.path)
+        self.stdout.write(self.style.SUCCESS("Dry run finished" if self.dry_run else "Migration finished"))
+
+    def report(self, stats, total, elapsed):
+        done = stats["uploaded"] + stats["reused"] + stats["failed"]
+        rate = stats["uploaded"] / elapsed if elapsed else 0
+        eta = f"{(total - done) / rate:.0f}s" if rate else "?"
+        self.stdout.write(
+            f"{done}/{total} files ({stats['uploaded']} uploaded, {stats['reused']} from checkpoint, "
+            f"{stats['failed']} failed), {stats['rows']} rows, {rate:.1f} files/s, "
+            f"{stats['bytes'] / elapsed / 2**20 if elapsed else 0:.2f} MB/s, eta {eta}"
+        )
+
+    # --- DB writes ---
+
+    def apply(self, result, targets, stats):
+        for model, obj, name in targets:
+            field = model._meta.get_field(name)
+            setattr(obj, name, field.to_python(result["value"]))
+            obj.media = {**(obj.media or {}), name: result["record"]}
+            self.pending[model].add(obj.pk)
+            self.pending_count += 1
+            stats["rows"] += 1
+        if self.pending_count >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Persist the checkpoint, then bulk_update the rows changed since the last flush."""
+        if not self.dry_run:
+            self.checkpoint.save()
+            for model, pks in self.pending.items():
+                if pks:
+                    objs = [self.objects[model][pk] for pk in pks]
+                    model.objects.bulk_update(objs, [*image_field_names(model), "media"], batch_size=self.batch_size)
+        self.pending = {model: set() for model in MODELS}
+        self.pending_count = 0
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from ...categories import invalidate_category_tree, rebuild_category_closure
+from ...models import CategoryClosure
+
+
+class Command(BaseCommand):
+    help = "Recompute the category closure table from Category.parent and drop the cached tree"
+
+    def handle(self, *args, **options):
+        rebuild_category_closure()
+        invalidate_category_tree()
+        self.stdout.write(self.style.SUCCESS(f"Category closure rebuilt ({CategoryClosure.objects.count()} rows)"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from ...reports import rebuild_reports
+
+
+class Command(BaseCommand):
+    help = "Recompute daily product sales and Monthly/Yearly reports from paid orders"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, help="Only rebuild reports of this year")
+
+    def handle(self, *args, **options):
+        year = options.get("year")
+        rebuild_reports(year=year)
+        scope = f"year {year}" if year else "all years"
+        self.stdout.write(self.style.SUCCESS(f"Reports rebuilt for {scope}"))
@@ -0,0 +1,51 @@
+import cloudinary.api
+from django.core.management.base import BaseCommand
+
+from ...media import get_media_backend, image_field_names, media_record
+from ...models import Brand, Category, PrescriptionRequest, Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the stored image metadata and variant URLs (media) of existing rows; "
+        "--remote also fetches bytes/width/height"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--remote", action="store_true", help="Fetch size and dimensions from the Cloudinary API")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        backend = get_media_backend()
+        for model in (Brand, Category, Product, PrescriptionRequest):
+            fields = image_field_names(model)
+            pending, updated = [], 0
+            for obj in model.objects.only("pk", "media", *fields).iterator(chunk_size=batch_size):
+                media = dict(obj.media or {})
+                for name in fields:
+                    image = getattr(obj, name)
+                    if not image:
+                        media.pop(name, None)
+                        continue
+                    stored = media.get(name) or {}
+                    if stored.get("public_id") == image.public_id and (stored.get("bytes") or not options["remote"]):
+                        continue
+                    if options["remote"]:
+                        try:
+                            image.metadata = cloudinary.api.resource(image.public_id)
+                        except Exception as e:
+                            self.stderr.write(f"{model.__name__} {obj.pk} {name}: {e}")
+                    media[name] = {
+                        **media_record(image, backend.url(image)),
+                        "variants": backend.variants(image),
+                    }
+                if media != obj.media:
+                    obj.media = media
+                    pending.append(obj)
+                if len(pending) >= batch_size:
+                    updated += model.objects.bulk_update(pending, ["media"])
+                    pending = []
+            if pending:
+                updated += model.objects.bulk_update(pending, ["media"])
+            self.stdout.write(self.style.SUCCESS(f"{model.__name__}: {updated} rows updated"))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...mailer import MAX_ATTEMPTS, send_queued
+
+
+class Command(BaseCommand):
+    help = "Send queued OutboundEmail rows (run with --loop as a worker process)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+        parser.add_argument("--loop", action="store_true", help="Keep polling the queue")
+        parser.add_argument("--interval", type=float, default=5, help="Seconds between polls when idle")
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_queued(
+                batch_size=options["batch_size"], max_attempts=options["max_attempts"]
+            )
+            if sent or failed:
+                self.stdout.write(f"Sent {sent}, failed {failed}")
+            if not options["loop"]:
+                break
+            # Drain full batches immediately, otherwise wait for new mail
+            if sent + failed < options["batch_size"]:
+                time.sleep(options["interval"])
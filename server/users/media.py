@@ -0,0 +1,233 @@
+# users/media.py
+import posixpath
+from io import BytesIO
+
+from cloudinary import CloudinaryResource, uploader
+from cloudinary.models import CloudinaryField
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import UploadedFile
+from django.utils.module_loading import import_string
+
+# Responsive variants generated for every uploaded image: name -> max width (px)
+IMAGE_VARIANTS = {"thumbnail": 150, "medium": 480, "large": 1024}
+# Modern formats offered next to the fallback (original-like) format, best first
+IMAGE_VARIANT_FORMATS = ("avif", "webp")
+
+
+def media_record(resource, url):
+    """Metadata kept for one uploaded image (from the upload response)."""
+    metadata = resource.metadata or {}
+    return {
+        "public_id": resource.public_id,
+        "version": resource.version,
+        "format": resource.format,
+        "bytes": metadata.get("bytes"),
+        "width": metadata.get("width"),
+        "height": metadata.get("height"),
+        "url": url,
+    }
+
+
+# --- Media backends ---
+
+class CloudinaryMediaBackend:
+    """
+    Upload to Cloudinary. Variants are Cloudinary transformations: their URLs
+    are built once at upload and the derived images are generated eagerly
+    (asynchronously) by Cloudinary.
+    """
+
+    def _variant_options(self, width, fmt):
+        options = {"width": width, "crop": "limit", "quality": "auto"}
+        if fmt:
+            options["format"] = fmt
+        return options
+
+    def upload(self, file, options):
+        options = {
+            **options,
+            "eager": [
+                self._variant_options(width, fmt)
+                for width in IMAGE_VARIANTS.values()
+                for fmt in IMAGE_VARIANT_FORMATS
+            ],
+            "eager_async": True,
+        }
+        return uploader.upload_resource(file, **options)
+
+    def url(self, resource):
+        return resource.url
+
+    def variants(self, resource, file=None):
+        # crop=limit never upscales, so a variant is at most as wide as the original
+        original_width = (resource.metadata or {}).get("width")
+        return {
+            name: {
+                "width": min(width, original_width) if original_width else width,
+                **{fmt: resource.build_url(**self._variant_options(width, fmt)) for fmt in IMAGE_VARIANT_FORMATS},
+                "fallback": resource.build_url(**self._variant_options(width, None)),
+            }
+            for name, width in IMAGE_VARIANTS.items()
+        }
+
+
+class LocalMediaBackend:
+    """
+    Store originals and Pillow-generated variants on the local filesystem
+    (MEDIA_ROOT). For tests and development without Cloudinary.
+    """
+
+    def __init__(self):
+        self.storage = FileSystemStorage(location=settings.MEDIA_ROOT, base_url=settings.MEDIA_URL)
+
+    def upload(self, file, options):
+        from PIL import Image
+
+        if hasattr(file, "seekable") and file.seekable():
+            file.seek(0)
+        name = self.storage.save(posixpath.join(options.get("folder", ""), file.name), file)
+        public_id, extension = posixpath.splitext(name)
+        file.seek(0)
+        with Image.open(file) as image:
+            width, height = image.size
+        return CloudinaryResource(
+            public_id=public_id,
+            format=extension.lstrip(".") or None,
+            type=options.get("type", "upload"),
+            resource_type=options.get("resource_type", "image"),
+            metadata={"bytes": file.size, "width": width, "height": height},
+        )
+
+    def url(self, resource):
+        return self.storage.url(f"{resource.public_id}.{resource.format}")
+
+    def variants(self, resource, file=None):
+        if file is None:
+            return None  # variants need the original file
+        from PIL import Image, ImageOps, features
+
+        formats = [fmt for fmt in IMAGE_VARIANT_FORMATS if features.check(fmt)]
+        file.seek(0)
+        with Image.open(file) as original:
+            original = ImageOps.exif_transpose(original)
+            has_alpha = original.mode in ("RGBA", "LA", "P")
+            fallback = "png" if has_alpha else "jpeg"
+            result = {}
+            for name, width in IMAGE_VARIANTS.items():
+                image = original.copy()
+                image.thumbnail((width, width * 10))  # limit width, keep ratio, never upscale
+                image = image.convert("RGBA" if has_alpha else "RGB")
+                sources = {"width": image.width}
+                for fmt in (*formats, fallback):
+                    buffer = BytesIO()
+                    image.save(buffer, format=fmt.upper(), quality=80)
+                    extension = "jpg" if fmt == "jpeg" else fmt
+                    saved = self.storage.save(
+                        f"{resource.public_id}_{name}.{extension}", ContentFile(buffer.getvalue())
+                    )
+                    sources["fallback" if fmt == fallback else fmt] = self.storage.url(saved)
+                result[name] = sources
+        return result
+
+
+_backend = None
+
+
+def get_media_backend():
+    """Return the configured backend (settings.MEDIA_BACKEND), created once per process."""
+    global _backend
+    if _backend is None:
+        _backend = import_string(getattr(settings, "MEDIA_BACKEND", "users.media.CloudinaryMediaBackend"))()
+    return _backend
+
+
+# --- Model field ---
+
+class MediaCloudinaryField(CloudinaryField):
+    """
+    CloudinaryField that uploads through the media backend and records the
+    upload (metadata, URL, responsive variants) in the model's `media`
+    JSONField under the field name, so reads never rebuild URLs or call the
+    Cloudinary API.
+
+    Django computes field values in declaration order when saving, so
+    `media` must be declared after the image fields of the model.
+    """
+
+    def deconstruct(self):
+        # Same column as CloudinaryField, only the upload differs: migrations
+        # reference the library field and never import this module
+        name, path, args, kwargs = super().deconstruct()
+        return name, "cloudinary.models.CloudinaryField", args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = getattr(model_instance, self.attname)
+        media = dict(model_instance.media or {})
+        if isinstance(value, UploadedFile):
+            backend = get_media_backend()
+            options = {"type": self.type, "resource_type": self.resource_type}
+            options.update({key: val(model_instance) if callable(val) else val for key, val in self.options.items()})
+            resource = backend.upload(value, options)
+            setattr(model_instance, self.attname, resource)
+            media[self.name] = {
+                **media_record(resource, backend.url(resource)),
+                "variants": backend.variants(resource, value),
+            }
+            model_instance.media = media
+            return self.get_prep_value(resource)
+
+        value = super().pre_save(model_instance, add)
+        if not value and self.name in media:
+            media.pop(self.name)
+            model_instance.media = media
+        return value
+
+
+# --- Reading ---
+
+def _current_record(instance, field_name):
+    image = getattr(instance, field_name)
+    if not image:
+        return None
+    record = (getattr(instance, "media", None) or {}).get(field_name)
+    if record and record.get("public_id") == getattr(image, "public_id", None):
+        return record
+    return None
+
+
+def media_url(instance, field_name):
+    """Delivery URL of an image field: the stored one, or built on the fly for legacy rows."""
+    image = getattr(instance, field_name)
+    if not image:
+        return None
+    record = _current_record(instance, field_name)
+    return record["url"] if record else image.url
+
+
+def media_variants(instance, field_name):
+    """
+    srcset-style structure for an image field, or None when no variants are stored:
+      {"thumbnail": {"width": 150, "avif": url, "webp": url, "fallback": url}, ...,
+       "srcset": {"avif": "url 150w, url 480w, ...", "webp": ..., "fallback": ...}}
+    Clients use one <source type="image/avif|webp" srcset=...> per format.
+    """
+    record = _current_record(instance, field_name)
+    variants = record and record.get("variants")
+    if not variants:
+        return None
+    srcset, widths = {}, set()
+    for sources in variants.values():
+        if sources["width"] in widths:
+            continue  # original smaller than this variant: same image as the previous one
+        widths.add(sources["width"])
+        for fmt, url in sources.items():
+            if fmt != "width":
+                srcset.setdefault(fmt, []).append(f"{url} {sources['width']}w")
+    return {**variants, "srcset": {fmt: ", ".join(entries) for fmt, entries in srcset.items()}}
+
+
+def image_field_names(model):
+    """Names of the MediaCloudinaryField fields of a model."""
+    return [f.name for f in model._meta.fields if isinstance(f, MediaCloudinaryField)]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:22
+
+import math
+
+from django.db import migrations, models
+
+
+def slot_template(available_time, max_patients_per_day):
+    # Frozen copy of users.slots.build_slot_template as of this migration
+    ranges, total_minutes = [], 0
+    for time_range in available_time:
+        start, end = (
+            int(part.split(":")[0]) * 60 + int(part.split(":")[1]) for part in time_range.split("-")
+        )
+        total_minutes += end - start
+        ranges.append((start, end))
+    if total_minutes == 0 or not max_patients_per_day:
+        return []
+    interval = max(10, math.floor(total_minutes / max_patients_per_day))
+    return [
+        f"{m // 60:02d}:{m % 60:02d}"
+        for start, end in ranges
+        for m in range(start, end - interval + 1, interval)
+    ]
+
+
+def fill_slot_templates(apps, schema_editor):
+    Doctor = apps.get_model('users', 'Doctor')
+    for doctor in Doctor.objects.all():
+        doctor.slot_template = slot_template(doctor.available_time, doctor.max_patients_per_day)
+        doctor.save(update_fields=['slot_template'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0035_productdailysales'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctor',
+            name='slot_template',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(fill_slot_templates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0037_outboundemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tran_id', models.CharField(max_length=100)),
+                ('event', models.CharField(choices=[('success', 'Success'), ('fail', 'Fail'), ('cancel', 'Cancel')], max_length=10)),
+                ('payload', models.JSONField(default=dict)),
+                ('transitioned', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'unique_together': {('tran_id', 'event')},
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:29
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, Lower
+
+
+def fill_search_text(apps, schema_editor):
+    # Same document as users.search.build_search_text at the time of this migration
+    Product = apps.get_model('users', 'Product')
+    Brand = apps.get_model('users', 'Brand')
+    brand_name = Subquery(Brand.objects.filter(pk=OuterRef('brand_id')).values('name')[:1])
+    space = Value(' ')
+    Product.objects.update(
+        search_text=Lower(
+            Concat(
+                'name', space, 'generic_name', space, 'sku', space,
+                Coalesce(brand_name, Value('')), space, 'indication',
+            )
+        )
+    )
+
+
+def create_search_indexes(apps, schema_editor):
+    # GIN indexes are PostgreSQL-only; other backends use the LIKE fallback in users/search.py
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS users_product_search_fts ON users_product "
+        "USING gin (to_tsvector('simple'::regconfig, COALESCE(search_text, '')))"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS users_product_name_trgm ON users_product "
+        "USING gin (name gin_trgm_ops)"
+    )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS users_product_search_fts")
+    schema_editor.execute("DROP INDEX IF EXISTS users_product_name_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0038_paymentevent'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
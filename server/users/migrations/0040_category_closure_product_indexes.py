@@ -0,0 +1,72 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_category_closure(apps, schema_editor):
+    # One row per (ancestor, descendant) pair incl. depth 0 self rows; a parent cycle stops at the repeated node
+    Category = apps.get_model('users', 'Category')
+    CategoryClosure = apps.get_model('users', 'CategoryClosure')
+    parents = dict(Category.objects.values_list('id', 'parent_id'))
+    rows = []
+    for node in parents:
+        current, depth, seen = node, 0, set()
+        while current is not None and current not in seen:
+            seen.add(current)
+            rows.append(CategoryClosure(ancestor_id=current, descendant_id=node, depth=depth))
+            current = parents.get(current)
+            depth += 1
+    CategoryClosure.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0039_product_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'is_active', 'new_price'], name='product_cat_active_price'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['brand', 'is_active', 'new_price'], name='product_brand_active_price'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'new_price'], name='product_active_price'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['prescription_required', 'is_active'], name='product_rx_active'),
+        ),
+        migrations.AddField(
+            model_name='categoryclosure',
+            name='ancestor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='users.category'),
+        ),
+        migrations.AddField(
+            model_name='categoryclosure',
+            name='descendant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='users.category'),
+        ),
+        migrations.AddIndex(
+            model_name='categoryclosure',
+            index=models.Index(fields=['descendant', 'depth'], name='users_categ_descend_5dc04c_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='categoryclosure',
+            unique_together={('ancestor', 'descendant')},
+        ),
+        migrations.RunPython(fill_category_closure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:50
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0042_media_metadata'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='ProductSalesRollup',
+        ),
+    ]
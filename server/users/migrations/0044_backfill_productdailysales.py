@@ -0,0 +1,51 @@
+from django.db import migrations
+from django.db.models import F, Max, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_sales(apps, schema_editor):
+    """
+    Recompute ProductDailySales from paid orders, so report product summaries
+    (rebuilt from these rows on the next payment) keep their history.
+    """
+    OrderItem = apps.get_model("users", "OrderItem")
+    ProductDailySales = apps.get_model("users", "ProductDailySales")
+
+    rows = (
+        OrderItem.objects.filter(order__payment_status="paid")
+        .annotate(day=TruncDate("order__created_at"))
+        .values("day", "product_id")
+        .annotate(
+            name=Max("product_name"),
+            total_qty=Sum("quantity"),
+            total_income=Sum("subtotal"),
+            total_cost=Sum(F("actual_price") * F("quantity")),
+        )
+    )
+    ProductDailySales.objects.all().delete()
+    ProductDailySales.objects.bulk_create(
+        [
+            ProductDailySales(
+                date=row["day"],
+                product_id=row["product_id"],
+                product_name=row["name"],
+                quantity=row["total_qty"] or 0,
+                income=row["total_income"] or 0,
+                cost=row["total_cost"] or 0,
+                profit=(row["total_income"] or 0) - (row["total_cost"] or 0),
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0043_delete_productsalesrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_daily_sales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0045_outboundemail_sending_status'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='paymentevent',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='paymentevent',
+            name='callback_id',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddConstraint(
+            model_name='paymentevent',
+            constraint=models.UniqueConstraint(condition=models.Q(('event', 'success')), fields=('tran_id',), name='paymentevent_one_success'),
+        ),
+        migrations.AddConstraint(
+            model_name='paymentevent',
+            constraint=models.UniqueConstraint(condition=models.Q(('callback_id', ''), _negated=True), fields=('tran_id', 'event', 'callback_id'), name='paymentevent_unique_callback'),
+        ),
+    ]
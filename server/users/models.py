@@ -1,26 +1,26 @@
-from cloudinary.models import CloudinaryField
 from cloudinary_storage.storage import RawMediaCloudinaryStorage
-import cloudinary
-import cloudinary.api
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
 from django.forms import ValidationError
 from django.utils import timezone
 from datetime import date, datetime, timedelta
 from django.conf import settings
 
-from django.core.mail import send_mail
 from shasthomeds.settings import EMAIL_HOST_USER
 
 # store/models.py
-from uuid import uuid4
 from decimal import Decimal, InvalidOperation
-from django.utils.text import slugify
 
 from django.core.validators import MinValueValidator
 
 from django.db.models import JSONField # if using PostgreSQL
 
+from .media import MediaCloudinaryField
+from .search import SEARCH_SOURCE_FIELDS, build_search_text
+from .slots import build_slot_template
+from .slugs import unique_slug
+from .tracking import TrackedFieldsMixin
+
 
 # Custom user model
 class CustomUser(AbstractUser):
@@ -54,35 +54,61 @@ class EmailOTP(models.Model):
     def __str__(self):
         return f"{self.user.email} - OTP: {self.otp_code}"
     
-# Image size validator
-def validate_image_size(image):
-    if not image:
-        return
+# Outbound email queue (sent by `manage.py send_queued_mail`)
+class OutboundEmail(models.Model):
+    # "sending": claimed by a worker; next_attempt_at is then the claim's expiry
+    STATUSES = (("pending", "Pending"), ("sending", "Sending"), ("sent", "Sent"), ("failed", "Failed"))
+
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    from_email = models.CharField(max_length=255)
+    recipient_list = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUSES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
 
-    max_size = 2 * 1024 * 1024  # 2 MB
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipient_list)} ({self.status})"
+
+    @classmethod
+    def enqueue(cls, subject, message, recipient_list, from_email=None):
+        """Queue an email for the mail worker instead of sending it in the request."""
+        return cls.objects.create(
+            subject=subject,
+            message=message,
+            from_email=from_email or settings.EMAIL_HOST_USER,
+            recipient_list=list(recipient_list),
+        )
 
-    try:
-        # Cloudinary stores file metadata, fetch it
-        public_id = image.public_id if hasattr(image, "public_id") else str(image).rsplit(".", 1)[0]
-        resource = cloudinary.api.resource(public_id)
-        size_in_bytes = resource.get("bytes", 0)
+# Image size validator
+MAX_IMAGE_SIZE = 2 * 1024 * 1024  # 2 MB
 
-        if size_in_bytes > max_size:
-            raise ValidationError("Image size must be 2 MB or less.")
 
-    except cloudinary.exceptions.NotFound:
-        # image not yet uploaded, skip check
-        pass
-    except Exception as e:
-        # fallback if API call fails
-        print("Cloudinary validation error:", e)
-        pass
+def validate_image_size(image):
+    """
+    Check the size of a newly uploaded file locally (no Cloudinary API call).
+    Already stored images were checked when they were uploaded.
+    """
+    if not image:
+        return
+    size = getattr(image, "size", None)
+    if size is not None and size > MAX_IMAGE_SIZE:
+        raise ValidationError("Image size must be 2 MB or less.")
 
 # Brand model
-class Brand(models.Model):
+class Brand(TrackedFieldsMixin, models.Model):
+    tracked_fields = ("name",)
+
     name = models.CharField(max_length=120)
     slug = models.SlugField(unique=True, blank=True)
-    image = CloudinaryField('image', folder='brands', null=True, blank=True, validators=[validate_image_size])
+    image = MediaCloudinaryField('image', folder='brands', null=True, blank=True, validators=[validate_image_size])
+    media = models.JSONField(default=dict, blank=True, editable=False)  # upload metadata, see users/media.py
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -91,22 +117,21 @@ class Brand(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            base_slug = slugify(self.name)
-            slug = base_slug
-            while Brand.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{uuid4().hex[:6]}"
-                self.slug = slug
+            self.slug = unique_slug(Brand, self.name)
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
 
 # Category model
-class Category(models.Model):
+class Category(TrackedFieldsMixin, models.Model):
+    tracked_fields = ("parent_id",)
+
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=255, unique=True)
     slug = models.SlugField(max_length=255, unique=True, blank=True)
-    image = CloudinaryField('image', folder='categories', validators=[validate_image_size], null=True, blank=True)
+    image = MediaCloudinaryField('image', folder='categories', validators=[validate_image_size], null=True, blank=True)
+    media = models.JSONField(default=dict, blank=True, editable=False)  # upload metadata, see users/media.py
     parent = models.ForeignKey(
         "self", on_delete=models.SET_NULL, null=True, blank=True, related_name="children"
     )
@@ -114,16 +139,41 @@ class Category(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def clean(self):
+        # Closure rows exist for saved categories only; a new one has no subtree yet
+        if self.pk and self.parent_id and CategoryClosure.objects.filter(
+            ancestor_id=self.pk, descendant_id=self.parent_id
+        ).exists():
+            raise ValidationError({"parent": "A category cannot be placed under itself or its sub-categories."})
+
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+            self.slug = unique_slug(Category, self.name)
+        # The closure is maintained in post_save (attach_category), which rejects
+        # cycles: the row write is rolled back with it, even outside a transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
-    
+
+
+# Category closure table: one row per (ancestor, descendant) pair, including
+# depth 0 self rows, so a subtree is a single indexed join (see users/categories.py)
+class CategoryClosure(models.Model):
+    ancestor = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="descendant_links")
+    descendant = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="ancestor_links")
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ("ancestor", "descendant")
+        indexes = [models.Index(fields=["descendant", "depth"])]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
 # Product model
-class Product(models.Model):
+class Product(TrackedFieldsMixin, models.Model):
     UNIT_CHOICES = (
         ('pcs', 'Pieces'),
         ('tablet', 'Tablet'),
@@ -143,6 +193,8 @@ class Product(models.Model):
         ('1 pack', '1 Pack'),
     )
 
+    tracked_fields = ("stock", "price", *SEARCH_SOURCE_FIELDS)
+
     sku = models.CharField(max_length=100, unique=True)
     name = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, unique=True, blank=True)
@@ -188,16 +240,28 @@ class Product(models.Model):
 
     prescription_required = models.BooleanField(default=False)
 
-    image1 = CloudinaryField('image1', folder='products', validators=[validate_image_size])
-    image2 = CloudinaryField('image2', folder='products', null=True, blank=True, validators=[validate_image_size])
-    image3 = CloudinaryField('image3', folder='products', null=True, blank=True, validators=[validate_image_size])
+    image1 = MediaCloudinaryField('image1', folder='products', validators=[validate_image_size])
+    image2 = MediaCloudinaryField('image2', folder='products', null=True, blank=True, validators=[validate_image_size])
+    image3 = MediaCloudinaryField('image3', folder='products', null=True, blank=True, validators=[validate_image_size])
+    media = models.JSONField(default=dict, blank=True, editable=False)  # upload metadata, see users/media.py
 
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalised search document (name, generic name, sku, brand, indication), see users/search.py
+    search_text = models.TextField(blank=True, editable=False)
+
     class Meta:
         ordering = ["name"]
+        # Catalogue filters (users/filters.py)
+        indexes = [
+            models.Index(fields=["category", "is_active", "new_price"], name="product_cat_active_price"),
+            models.Index(fields=["brand", "is_active", "new_price"], name="product_brand_active_price"),
+            models.Index(fields=["is_active", "new_price"], name="product_active_price"),
+            models.Index(fields=["prescription_required", "is_active"], name="product_rx_active"),
+            models.Index(fields=["name", "id"], name="product_name_id"),  # cursor pagination
+        ]
 
     def save(self, *args, **kwargs):
         # Debug stock before save
@@ -205,12 +269,40 @@ class Product(models.Model):
 
         # Auto-generate slug if blank
         if not self.slug:
-            base_slug = slugify(self.name)
-            slug = base_slug
-            while Product.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{uuid4().hex[:6]}"
-            self.slug = slug
+            self.slug = unique_slug(Product, self.name)
+
+        self.apply_derived_fields()
+
+        # Keep the search document in sync with its source fields (only when one changed:
+        # the brand name costs a query)
+        update_fields = kwargs.get("update_fields")
+        saves_sources = update_fields is None or set(update_fields) & {*SEARCH_SOURCE_FIELDS, "brand"}
+        if saves_sources and self.search_source_changed():
+            self.search_text = build_search_text(
+                self.name, self.generic_name, self.sku,
+                self.brand.name if self.brand_id else "", self.indication,
+            )
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "search_text"}
+
+        super().save(*args, **kwargs)
 
+        # Debug stock after save
+        print("After save -> Stock:", self.stock)
+
+    def search_source_changed(self):
+        """True if a search_text source differs from its loaded value (deferred, unset fields count as unchanged)."""
+        if self._state.adding:
+            return True
+        deferred = self.get_deferred_fields()
+        loaded = getattr(self, "_loaded_values", {})
+        return any(
+            name not in deferred and (name not in loaded or self.has_changed(name))
+            for name in SEARCH_SOURCE_FIELDS
+        )
+
+    def apply_derived_fields(self):
+        """Compute prices, package quantity and display fields from the editable ones (no queries)."""
         # Calculate new_price and discount_price
         if self.offer_price and self.offer_price > 0:
             self.new_price = self.price - (self.price * self.offer_price / 100)
@@ -227,7 +319,7 @@ class Product(models.Model):
         else:
             self.package_quantity = None
 
-        
+
         # auto-generate display fields before saving
         if self.weight_value and self.weight_unit:
             self.weight_display = f"{self.weight_value} {self.weight_unit}"
@@ -241,11 +333,6 @@ class Product(models.Model):
         else:
             self.unit_display = None
 
-        super().save(*args, **kwargs)
-
-        # Debug stock after save
-        print("After save -> Stock:", self.stock)
-
     def display_unit(self):
         """Return the unit with its value if available"""
         if self.unit_value:
@@ -305,7 +392,8 @@ class PrescriptionRequest(models.Model):
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="prescription_requests")
     product = models.ForeignKey("Product", on_delete=models.CASCADE, related_name="prescription_requests")
-    uploaded_image = CloudinaryField('prescription', folder='prescriptions', validators=[validate_image_size])
+    uploaded_image = MediaCloudinaryField('prescription', folder='prescriptions', validators=[validate_image_size])
+    media = models.JSONField(default=dict, blank=True, editable=False)  # upload metadata, see users/media.py
     notes = models.TextField(blank=True, null=True)
 
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
@@ -331,49 +419,43 @@ class PrescriptionRequest(models.Model):
             "-----------------------------\n"
             f"{self.product.name} | {self.product.sku} | 1"
         )
-        try:
-            send_mail(
-                subject="Prescription Approved - ShasthoMeds",
-                message=f"Hi {self.user.full_name},\n\n"
-                        f"Your prescription request has been approved.\n\n"
-                        f"The item(s) were added to your cart.\n\n{product_table}\n\n"
-                        f"Enjoy your medication!",
-                from_email=EMAIL_HOST_USER,
-                recipient_list=[self.user.email],
-                fail_silently=True,
-            )
-        except Exception as e:
-            print("Email send error (approve):", str(e))
+        OutboundEmail.enqueue(
+            subject="Prescription Approved - ShasthoMeds",
+            message=f"Hi {self.user.full_name},\n\n"
+                    f"Your prescription request has been approved.\n\n"
+                    f"The item(s) were added to your cart.\n\n{product_table}\n\n"
+                    f"Enjoy your medication!",
+            from_email=EMAIL_HOST_USER,
+            recipient_list=[self.user.email],
+        )
 
         # Delete request after action
         self.delete()
 
     def reject(self, reason=None):
         """Reject and delete prescription request."""
-        try:
-            send_mail(
-                subject="Prescription Rejected - ShasthoMeds",
-                message=f"Hi {self.user.full_name},\n\n"
-                        f"Your prescription for {self.product.name} was rejected.\n"
-                        f"Reason: {reason or self.admin_comment or 'Not specified'}\n\n"
-                        f"Try again later with a valid prescription.",
-                from_email=EMAIL_HOST_USER,
-                recipient_list=[self.user.email],
-                fail_silently=True,
-            )
-        except Exception as e:
-            print("Email send error (reject):", str(e))
+        OutboundEmail.enqueue(
+            subject="Prescription Rejected - ShasthoMeds",
+            message=f"Hi {self.user.full_name},\n\n"
+                    f"Your prescription for {self.product.name} was rejected.\n"
+                    f"Reason: {reason or self.admin_comment or 'Not specified'}\n\n"
+                    f"Try again later with a valid prescription.",
+            from_email=EMAIL_HOST_USER,
+            recipient_list=[self.user.email],
+        )
 
         # Delete request after action
         self.delete()
 
 # Order model
-class Order(models.Model):
+class Order(TrackedFieldsMixin, models.Model):
     PAYMENT_METHODS = (("cod", "Cash on Delivery"), ("card", "Card Payment"))
     STATUSES = (("pending", "Pending"), ("processing", "Processing"),
                 ("cancelled", "Cancelled"),("delivered", "Delivered"))
     PAY_STATUSES = (("pending", "Pending"), ("paid", "Paid"), ("failed", "Failed"), ("refunded", "Refunded"))
 
+    tracked_fields = ("payment_status", "status")
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="orders")
     payment_method = models.CharField(max_length=20, choices=PAYMENT_METHODS)
     status = models.CharField(max_length=20, choices=STATUSES, default="pending")
@@ -395,6 +477,40 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Cursor pagination of OrderViewSet (admin: all orders, customers: their own)
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="order_created_id"),
+            models.Index(fields=["user", "-created_at", "-id"], name="order_user_created_id"),
+        ]
+
+# Payment callback ledger (one row per callback; makes callbacks idempotent)
+class PaymentEvent(models.Model):
+    EVENTS = (("success", "Success"), ("fail", "Fail"), ("cancel", "Cancel"))
+
+    tran_id = models.CharField(max_length=100)
+    event = models.CharField(max_length=10, choices=EVENTS)
+    callback_id = models.CharField(max_length=100, blank=True)  # gateway id of the attempt (val_id / sessionkey)
+    payload = models.JSONField(default=dict)
+    transitioned = models.BooleanField(default=False)   # did this event change the order?
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # An order is paid once; fail/cancel repeat per payment attempt, so they
+        # are deduplicated by the attempt's gateway id when the payload has one
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tran_id"], condition=models.Q(event="success"), name="paymentevent_one_success",
+            ),
+            models.UniqueConstraint(
+                fields=["tran_id", "event", "callback_id"], condition=~models.Q(callback_id=""),
+                name="paymentevent_unique_callback",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.tran_id} - {self.event}"
+
 # OrderItem model
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
@@ -435,6 +551,23 @@ class YearlyReport(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+# Per-product daily sales fact table (paid orders only); backs products_details / top_product of the reports
+class ProductDailySales(models.Model):
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.PROTECT, related_name="daily_sales")
+    product_name = models.CharField(max_length=255)                         # snapshot from OrderItem
+    quantity = models.IntegerField(default=0)
+    income = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cost = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    profit = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # income - cost
+
+    class Meta:
+        unique_together = ("date", "product")
+        ordering = ["date", "product_name"]
+
+    def __str__(self):
+        return f"{self.product_name} ({self.date})"
+
 
 # Doctor model
 class Doctor(models.Model):
@@ -445,8 +578,17 @@ class Doctor(models.Model):
     consultation_fee = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
     available_days = models.JSONField(default=list)  # ["Monday", "Wednesday"]
     available_time = models.JSONField(default=list)  # ["10:00-12:00", "15:00-17:00"]
+    slot_template = models.JSONField(default=list, blank=True, editable=False)  # ["10:00", "10:12", ...]
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        # Precompile the day's candidate slots so listings don't parse available_time
+        self.slot_template = build_slot_template(self.available_time, self.max_patients_per_day)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"available_time", "max_patients_per_day"} & set(update_fields):
+            kwargs["update_fields"] = set(update_fields) | {"slot_template"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.full_name} ({self.specialization})"
 
@@ -468,6 +610,7 @@ class Appointment(models.Model):
 
     class Meta:
         unique_together = ("doctor", "date", "time_slot")
+        indexes = [models.Index(fields=["patient", "-id"], name="appointment_patient_id")]
 
     def __str__(self):
         return f"{self.patient.username} → {self.doctor.full_name} ({self.date} {self.time_slot})"
@@ -520,4 +663,4 @@ class Appointment(models.Model):
         subject = "Appointment Confirmed"
         message = f"Hello {self.patient.full_name},\n\nYour appointment with {self.doctor.full_name} on {self.date} at {self.time_slot} has been confirmed."
         recipient_list = [self.patient.email]
-        send_mail(subject, message, settings.EMAIL_HOST_USER, recipient_list)
+        OutboundEmail.enqueue(subject, message, recipient_list, settings.EMAIL_HOST_USER)
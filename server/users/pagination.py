@@ -0,0 +1,48 @@
+# users/pagination.py
+from rest_framework.pagination import CursorPagination
+
+
+# Cursor pagination for the sales report rows (ProductDailySales)
+class ReportCursorPagination(CursorPagination):
+    ordering = ("date", "id")
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+
+class CountedCursorPagination(CursorPagination):
+    """
+    Keyset pagination (no OFFSET scans) that keeps the `count` key of the
+    previous page-number responses. Clients paging deep can skip the
+    COUNT(*) with ?count=false.
+    """
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param, "").lower() not in ("0", "false", "no"):
+            self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data = {"count": self.count, **response.data}
+        return response
+
+
+# Orderings below are backed by indexes (see Product/Order/Appointment Meta)
+class ProductCursorPagination(CountedCursorPagination):
+    ordering = ("name", "id")
+
+
+class OrderCursorPagination(CountedCursorPagination):
+    ordering = ("-created_at", "-id")
+
+
+class NewestFirstCursorPagination(CountedCursorPagination):
+    """Users and appointments: newest first by primary key."""
+    ordering = ("-id",)
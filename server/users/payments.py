@@ -0,0 +1,152 @@
+# users/payments.py
+import threading
+from uuid import uuid4
+
+import requests
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+from sslcommerz_lib import SSLCOMMERZ
+from urllib3.util.retry import Retry
+
+from .models import Order, PaymentEvent
+from .reports import apply_order_to_reports
+
+
+# === Pooled HTTP session (shared keep-alive connections to the gateway) ===
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """Process-wide requests.Session with a connection pool sized for the web workers."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=getattr(settings, "PAYMENT_HTTP_POOL_SIZE", 10),
+                    # Only retry failed connects; never re-POST a session request
+                    max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.2),
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+# === Gateways ===
+class SSLCommerzGateway(SSLCOMMERZ):
+    """SSLCOMMERZ client that reuses pooled connections and enforces timeouts."""
+
+    def call_api(self, method, url, payload):
+        timeout = getattr(settings, "PAYMENT_HTTP_TIMEOUT", (5, 20))  # (connect, read) seconds
+        session = get_http_session()
+        try:
+            if method == 'POST':
+                response = session.post(url, data=payload, timeout=timeout)
+            elif method == 'GET':
+                response = session.get(url, params=payload, timeout=timeout)
+            else:
+                return {"status": "FAILED", "failedreason": f"Method {method} is not valid"}
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            # Same shape as a gateway-side failure so callers handle one case
+            return {"status": "FAILED", "failedreason": f"Payment gateway error: {e}"}
+
+
+class FakeGateway:
+    """
+    Local stand-in for SSLCommerz (tests / load tests): no network calls.
+    Select with PAYMENT_GATEWAY = "users.payments.FakeGateway".
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.sessions = {}
+
+    def createSession(self, post_body):
+        sessionkey = uuid4().hex.upper()
+        self.sessions[post_body["tran_id"]] = dict(post_body, sessionkey=sessionkey)
+        return {
+            "status": "SUCCESS",
+            "sessionkey": sessionkey,
+            "GatewayPageURL": f"{post_body['success_url']}?tran_id={post_body['tran_id']}",
+            "failedreason": "",
+        }
+
+
+_gateway = None
+
+
+def get_gateway(config):
+    """Return the configured gateway (settings.PAYMENT_GATEWAY), created once per process."""
+    global _gateway
+    if _gateway is None:
+        gateway_class = import_string(
+            getattr(settings, "PAYMENT_GATEWAY", "users.payments.SSLCommerzGateway")
+        )
+        _gateway = gateway_class(config)
+    return _gateway
+
+
+# === Callback processing ===
+EVENT_PAYMENT_STATUS = {"success": "paid", "fail": "failed", "cancel": "pending"}
+# Payload keys identifying one payment attempt at the gateway, most specific first
+CALLBACK_ID_KEYS = ("val_id", "sessionkey")
+
+
+def callback_id(payload):
+    """Gateway id of the attempt a callback belongs to ("" if the payload has none)."""
+    return next((str(payload[key]) for key in CALLBACK_ID_KEYS if payload.get(key)), "")
+
+
+def process_payment_event(tran_id, event, payload):
+    """
+    Record a gateway callback in the PaymentEvent ledger and apply it once.
+
+    Returns (order, transitioned):
+      order        -> the Order, or None if tran_id is unknown
+      transitioned -> True only the first time this callback changed the order
+
+    A success is applied once per tran_id. fail / cancel are recorded per
+    payment attempt (callback_id), so a customer who retries and fails again
+    gets a new event while a re-delivered callback is a duplicate.
+    The order is changed with one conditional UPDATE ... WHERE payment_status
+    != 'paid' (no pre_save SELECT, no post_save recompute), so duplicate
+    IPN/redirect hits and late fail/cancel after a success do nothing.
+    Reports are updated only when the order actually became paid.
+    """
+    try:
+        with transaction.atomic():
+            payment_event = PaymentEvent.objects.create(
+                tran_id=tran_id, event=event, callback_id=callback_id(payload), payload=payload
+            )
+
+            transitioned = bool(
+                Order.objects.filter(tran_id=tran_id)
+                .exclude(payment_status="paid")
+                .update(
+                    payment_status=EVENT_PAYMENT_STATUS[event],
+                    status="pending",
+                    updated_at=timezone.now(),
+                )
+            )
+            order = Order.objects.filter(tran_id=tran_id).first()
+            if order is None:
+                # Unknown tran_id: roll back the ledger row too
+                transaction.set_rollback(True)
+                return None, False
+
+            if transitioned:
+                PaymentEvent.objects.filter(pk=payment_event.pk).update(transitioned=True)
+                if event == "success":
+                    apply_order_to_reports(order, 1)
+            return order, transitioned
+    except IntegrityError:
+        # This callback (or a success for this tran_id) was already processed
+        return Order.objects.filter(tran_id=tran_id).first(), False
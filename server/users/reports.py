@@ -0,0 +1,196 @@
+# users/reports.py
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import ExtractYear, TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import MonthlyReport, OrderItem, ProductDailySales, YearlyReport
+
+
+def _as_date(value):
+    """TruncMonth returns a datetime on DateTimeFields; reports are keyed by date."""
+    return value.date() if hasattr(value, "date") else value
+
+
+def _next_month(month_start):
+    return date(month_start.year + month_start.month // 12, month_start.month % 12 + 1, 1)
+
+
+def order_delta(order):
+    """
+    Aggregate one order's items per product (single grouped query).
+    Returns (totals, per_product) where per_product is a list of dicts with
+    product_id, product_name, total_qty, total_income, total_actual, total_profit.
+    """
+    grouped = list(
+        OrderItem.objects.filter(order=order)
+        .values("product_id", "product_name")
+        .annotate(
+            total_qty=Sum("quantity"),
+            total_income=Sum("subtotal"),
+            total_actual=Sum(F("actual_price") * F("quantity")),
+            total_profit=Sum((F("price") - F("actual_price")) * F("quantity")),
+        )
+    )
+    totals = {
+        "income": sum((g["total_income"] or Decimal(0) for g in grouped), Decimal(0)),
+        "profit": sum((g["total_profit"] or Decimal(0) for g in grouped), Decimal(0)),
+        "quantity": sum(g["total_qty"] or 0 for g in grouped),
+    }
+    return totals, grouped
+
+
+def _refresh_product_summary(report, start, end):
+    """
+    Rebuild top_product / products_details of one report from the
+    ProductDailySales rows of [start, end), summed per product in one query.
+    """
+    rows = (
+        ProductDailySales.objects.filter(date__gte=start, date__lt=end)
+        .values("product_name")
+        .annotate(total_qty=Sum("quantity"), total_income=Sum("income"), total_cost=Sum("cost"))
+        .filter(total_qty__gt=0)
+        .order_by("-total_qty", "product_name")
+    )
+
+    products_details = [
+        {
+            "product": r["product_name"],
+            "quantity": r["total_qty"],
+            "income": float(r["total_income"]),
+            "actual": float(r["total_cost"]),
+            "profit": float(r["total_income"] - r["total_cost"]),
+        }
+        for r in rows
+    ]
+    report.top_product = products_details[0]["product"] if products_details else None
+    report.products_details = products_details
+    report.save(update_fields=["top_product", "products_details", "updated_at"])
+
+
+def _apply_daily(day, grouped, sign):
+    """Add or subtract per-product amounts on the ProductDailySales row of one day."""
+    ProductDailySales.objects.bulk_create(
+        [
+            ProductDailySales(date=day, product_id=g["product_id"], product_name=g["product_name"])
+            for g in grouped
+        ],
+        ignore_conflicts=True,
+    )
+    for g in grouped:
+        income = g["total_income"] or Decimal(0)
+        cost = g["total_actual"] or Decimal(0)
+        ProductDailySales.objects.filter(date=day, product_id=g["product_id"]).update(
+            quantity=F("quantity") + sign * (g["total_qty"] or 0),
+            income=F("income") + sign * income,
+            cost=F("cost") + sign * cost,
+            profit=F("profit") + sign * (income - cost),
+        )
+
+
+def apply_order_to_reports(order, sign=1):
+    """
+    Apply the delta of a single order to the Monthly and Yearly reports.
+    sign=1 when the order became paid, sign=-1 when it stopped being paid.
+    Cost depends on the number of products in the order, not on order history.
+    """
+    totals, grouped = order_delta(order)
+    day = timezone.localdate(order.created_at)
+    month_start, year_start = day.replace(day=1), day.replace(month=1, day=1)
+
+    with transaction.atomic():
+        # === Daily product facts (source of the per-product summaries) ===
+        _apply_daily(day, grouped, sign)
+
+        # === Monthly Report ===
+        report, _ = MonthlyReport.objects.get_or_create(month=month_start)
+        MonthlyReport.objects.filter(pk=report.pk).update(
+            total_income=F("total_income") + sign * totals["income"],
+            total_profit=F("total_profit") + sign * totals["profit"],
+            total_orders=F("total_orders") + sign,
+            total_products_sold=F("total_products_sold") + sign * totals["quantity"],
+        )
+        _refresh_product_summary(report, month_start, _next_month(month_start))
+
+        # === Yearly Report ===
+        y_report, _ = YearlyReport.objects.get_or_create(year=year_start.year)
+        YearlyReport.objects.filter(pk=y_report.pk).update(
+            total_income=F("total_income") + sign * totals["income"],
+            total_profit=F("total_profit") + sign * totals["profit"],
+            total_orders=F("total_orders") + sign,
+            total_products_sold=F("total_products_sold") + sign * totals["quantity"],
+        )
+        _refresh_product_summary(y_report, year_start, year_start.replace(year=year_start.year + 1))
+
+
+def rebuild_reports(year=None):
+    """
+    Full recompute of the ProductDailySales facts, MonthlyReport and
+    YearlyReport from paid OrderItems. Uses grouped queries only (no per-row Python loops).
+    """
+    items = OrderItem.objects.filter(order__payment_status="paid")
+    if year is not None:
+        items = items.filter(order__created_at__year=year)
+
+    amounts = dict(
+        total_qty=Sum("quantity"),
+        total_income=Sum("subtotal"),
+        total_actual=Sum(F("actual_price") * F("quantity")),
+        total_profit=Sum((F("price") - F("actual_price")) * F("quantity")),
+        total_orders=Count("order", distinct=True),
+    )
+    monthly = items.annotate(period_start=TruncMonth("order__created_at")).values("period_start")
+    yearly = items.annotate(period_year=ExtractYear("order__created_at")).values("period_year")
+
+    with transaction.atomic():
+        months = MonthlyReport.objects.all()
+        years = YearlyReport.objects.all()
+        daily = ProductDailySales.objects.all()
+        if year is not None:
+            months = months.filter(month__year=year)
+            years = years.filter(year=year)
+            daily = daily.filter(date__year=year)
+        months.delete()
+        years.delete()
+        daily.delete()
+
+        ProductDailySales.objects.bulk_create(
+            [
+                ProductDailySales(
+                    date=g["day"],
+                    product_id=g["product_id"],
+                    product_name=g["product_name"],
+                    quantity=g["total_qty"] or 0,
+                    income=g["total_income"] or 0,
+                    cost=g["total_actual"] or 0,
+                    profit=(g["total_income"] or 0) - (g["total_actual"] or 0),
+                )
+                for g in items.annotate(day=TruncDate("order__created_at"))
+                .values("day", "product_id")
+                .annotate(product_name=Max("product_name"), **amounts)
+            ]
+        )
+
+        for g in monthly.annotate(**amounts):
+            month_start = _as_date(g["period_start"])
+            report = MonthlyReport.objects.create(
+                month=month_start,
+                total_income=g["total_income"] or 0,
+                total_profit=g["total_profit"] or 0,
+                total_orders=g["total_orders"],
+                total_products_sold=g["total_qty"] or 0,
+            )
+            _refresh_product_summary(report, month_start, _next_month(month_start))
+
+        for g in yearly.annotate(**amounts):
+            y_report = YearlyReport.objects.create(
+                year=g["period_year"],
+                total_income=g["total_income"] or 0,
+                total_profit=g["total_profit"] or 0,
+                total_orders=g["total_orders"],
+                total_products_sold=g["total_qty"] or 0,
+            )
+            _refresh_product_summary(y_report, date(g["period_year"], 1, 1), date(g["period_year"] + 1, 1, 1))
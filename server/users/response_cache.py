@@ -0,0 +1,173 @@
+# users/response_cache.py
+import hashlib
+import threading
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+
+def get_cache():
+    """
+    Cache backend for rendered API data (settings.RESPONSE_CACHE_ALIAS).
+    With several worker processes it must be shared (Redis, database cache):
+    invalidation bumps versions in the cache, and a per-process locmem
+    cache would only see the bumps of its own process.
+    """
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def check_response_cache(app_configs, **kwargs):
+    """Deploy check (manage.py check --deploy): the response cache must be shared between workers."""
+    alias = getattr(settings, "RESPONSE_CACHE_ALIAS", "default")
+    backend = settings.CACHES.get(alias, {}).get("BACKEND")
+    if backend not in PROCESS_LOCAL_BACKENDS:
+        return []
+    return [
+        checks.Warning(
+            f"RESPONSE_CACHE_ALIAS '{alias}' uses {backend}, which is not shared between processes.",
+            hint="With more than one worker, other workers keep serving stale responses after writes. "
+            "Set CACHE_BACKEND to Redis or the database cache.",
+            id="users.W001",
+        )
+    ]
+
+
+# --- Versioned keys ---
+# Every cached entry embeds version counters; invalidation bumps a counter
+# instead of deleting keys, so it works on any backend and costs O(1).
+# Versions never expire, and a missing one (evicted, cache flushed) starts
+# from a fresh time-based value, never from a number used before.
+#   <ns>:all        every list and detail of the namespace (e.g. a nested brand changed)
+#   <ns>:list       list pages only
+#   <ns>:obj:<pk>   one detail response
+
+def _version_keys(namespace, pk):
+    scope = f"{namespace}:obj:{pk}" if pk is not None else f"{namespace}:list"
+    return [f"cache-version:{namespace}:all", f"cache-version:{scope}"]
+
+
+def _fresh_version():
+    return time.time_ns()
+
+
+def _bump(*keys):
+    cache = get_cache()
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _fresh_version(), None)
+
+
+def _versions(keys):
+    """Current versions of keys, creating missing ones (without expiry) from a fresh value."""
+    cache = get_cache()
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, _fresh_version(), None)  # add: keep a version another process just created
+        versions.update(cache.get_many(missing))
+    return versions
+
+
+def invalidate(namespace, pk=None):
+    """After commit, drop the namespace's list pages (and the detail of pk)."""
+    keys = [f"cache-version:{namespace}:list"]
+    if pk is not None:
+        keys.append(f"cache-version:{namespace}:obj:{pk}")
+    transaction.on_commit(lambda: _bump(*keys))
+
+
+def invalidate_all(namespace):
+    """After commit, drop every cached list and detail of the namespace."""
+    transaction.on_commit(lambda: _bump(f"cache-version:{namespace}:all"))
+
+
+def response_cache_key(namespace, request, pk=None, vary_on_date=False):
+    keys = _version_keys(namespace, pk)
+    versions = _versions(keys)
+    query = sorted((key, value) for key, values in request.query_params.lists() for value in values)
+    parts = [
+        request.path,
+        repr(query),
+        *(str(versions.get(key)) for key in keys),
+    ]
+    if vary_on_date:
+        parts.append(date.today().isoformat())
+    digest = hashlib.md5("|".join(parts).encode()).hexdigest()
+    return f"response:{namespace}:{digest}"
+
+
+# --- Hit-rate metrics (per process) ---
+
+class CacheMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, namespace, hit):
+        with self._lock:
+            counts = self._counts.setdefault(namespace, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                namespace: {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+                }
+                for namespace, (hits, misses) in self._counts.items()
+            }
+
+
+metrics = CacheMetrics()
+
+
+class CachedResponseMixin:
+    """
+    Cache the serialized data of successful GET list/retrieve responses per
+    (path, query params incl. page/cursor, versions). Set `cache_namespace`;
+    signals in users/signals.py invalidate it on model changes.
+    """
+    cache_namespace = None
+    cache_vary_on_date = False  # set when the payload depends on today's date
+
+    def cached_response(self, request, build):
+        if request.method != "GET" or not self.cache_namespace:
+            return build()
+        cache = get_cache()
+        pk = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        key = response_cache_key(self.cache_namespace, request, pk, self.cache_vary_on_date)
+        data = cache.get(key)
+        if data is not None:
+            metrics.record(self.cache_namespace, hit=True)
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        metrics.record(self.cache_namespace, hit=False)
+        response = build()
+        if response.status_code == 200:
+            cache.set(key, response.data, getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300))
+        response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs)
+        )
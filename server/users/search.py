@@ -0,0 +1,89 @@
+# users/search.py
+import re
+
+from django.db import connection
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Concat, Lower
+
+# Columns (attnames) that make up Product.search_text (brand name is denormalised into it)
+SEARCH_SOURCE_FIELDS = ("name", "generic_name", "sku", "brand_id", "indication")
+
+
+def build_search_text(name, generic_name, sku, brand_name, indication):
+    """Lower-cased document indexed for search; must stay in sync with refresh_search_text."""
+    return " ".join([name or "", generic_name or "", sku or "", brand_name or "", indication or ""]).lower()
+
+
+def refresh_search_text(queryset):
+    """Recompute search_text for a product queryset with a single UPDATE (used on brand rename)."""
+    Brand = queryset.model._meta.get_field("brand").related_model
+    brand_name = Subquery(Brand.objects.filter(pk=OuterRef("brand_id")).values("name")[:1])
+    space = Value(" ")
+    return queryset.update(
+        search_text=Lower(
+            Concat(
+                "name", space, "generic_name", space, "sku", space,
+                Coalesce(brand_name, Value("")), space, "indication",
+            )
+        )
+    )
+
+
+def search_terms(text):
+    """Split user input into lower-case word tokens (drops tsquery operators and punctuation)."""
+    return re.findall(r"\w+", text.lower())
+
+
+def search_products(queryset, text):
+    """
+    Filter and rank products matching `text`. The last word is matched as a
+    prefix so partial input works for type-ahead.
+
+    On PostgreSQL this uses the GIN indexes from migration 0039: a full-text
+    prefix query over search_text, plus pg_trgm similarity on name for typos.
+    Elsewhere (SQLite in tests) it falls back to LIKE matching with a simple
+    name-first ranking.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+    if connection.vendor == "postgresql":
+        return _search_postgres(queryset, text, terms)
+    return _search_fallback(queryset, " ".join(terms), terms)
+
+
+def _search_postgres(queryset, text, terms):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+
+    # Same expression as the users_product_search_fts index
+    document = SearchVector("search_text", config="simple")
+    query = SearchQuery(
+        " & ".join(f"{term}:*" for term in terms), config="simple", search_type="raw"
+    )
+    return (
+        queryset.annotate(
+            document=document,
+            rank=SearchRank(document, query) + TrigramSimilarity("name", text),
+        )
+        .filter(Q(document=query) | Q(name__trigram_similar=text))
+        .order_by("-rank", "name")
+    )
+
+
+def _search_fallback(queryset, phrase, terms):
+    condition = Q()
+    for term in terms:
+        condition &= Q(search_text__contains=term)
+    return (
+        queryset.filter(condition)
+        .annotate(
+            rank=Case(
+                When(name__istartswith=phrase, then=Value(3)),
+                When(name__icontains=phrase, then=Value(2)),
+                When(generic_name__icontains=phrase, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        )
+        .order_by(F("rank").desc(), "name")
+    )
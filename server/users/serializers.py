@@ -1,12 +1,15 @@
 from datetime import date, timedelta
+from django.db import transaction
 from django.utils import timezone
 from rest_framework import serializers
-from users.helpers import get_available_time_slots
+from users.helpers import booked_slots_index, week_availability
+from .categories import is_descendant
+from .media import media_url, media_variants
 from shasthomeds.settings import EMAIL_HOST_USER
 from django.contrib.auth.password_validation import validate_password
 import random
 from django.core.mail import send_mail
-from .models import Appointment, Brand, Cart, CartItem,Category, Doctor, MonthlyReport, Order, OrderItem, PrescriptionRequest,Product, YearlyReport
+from .models import Appointment, Brand, Cart, CartItem,Category, Doctor, MonthlyReport, Order, OrderItem, PrescriptionRequest,Product, YearlyReport, validate_image_size
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer  # pyright: ignore[reportMissingImports]
 
 # Models
@@ -119,41 +122,57 @@ class UserProfileSerializer(serializers.ModelSerializer):
 
 # Serializer for Brand
 class BrandSerializer(serializers.ModelSerializer):
-    image = serializers.ImageField(required=False, allow_null=True) # write_only field
+    image = serializers.ImageField(required=False, allow_null=True, validators=[validate_image_size]) # write_only field
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Brand
-        fields = ["id", "name", "slug", "image", "created_at", "updated_at"]
+        fields = ["id", "name", "slug", "image", "image_variants", "created_at", "updated_at"]
         read_only_fields = ["id", "created_at", "updated_at"]
 
     def to_representation(self, instance):
         """Return Cloudinary URL for image instead of file path"""
         ret = super().to_representation(instance)
-        if instance.image:
-            ret['image'] = instance.image.url  # Cloudinary URL
-        else:
-            ret['image'] = None
+        ret['image'] = media_url(instance, "image")  # stored Cloudinary URL
         return ret
 
+    def get_image_variants(self, obj):
+        return media_variants(obj, "image")
+
 
 # Serializer for Category
 class CategorySerializer(serializers.ModelSerializer):
-    image = serializers.ImageField(required=False, allow_null=True) # write_only field
+    image = serializers.ImageField(required=False, allow_null=True, validators=[validate_image_size]) # write_only field
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Category
-        fields = ["id", "name", "slug", "image", "parent", "is_active", "created_at", "updated_at"]
+        fields = ["id", "name", "slug", "image", "image_variants", "parent", "is_active", "created_at", "updated_at"]
         read_only_fields = ["id", "created_at", "updated_at"]
 
+    def validate_parent(self, parent):
+        if parent and self.instance and is_descendant(parent.pk, self.instance.pk):
+            raise serializers.ValidationError("A category cannot be placed under itself or its sub-categories.")
+        return parent
+
     def to_representation(self, instance):
         """Return Cloudinary URL for image instead of file path"""
         ret = super().to_representation(instance)
-        if instance.image:
-            ret['image'] = instance.image.url  # Cloudinary URL
-        else:
-            ret['image'] = None
+        ret['image'] = media_url(instance, "image")  # stored Cloudinary URL
         return ret
 
+    def get_image_variants(self, obj):
+        return media_variants(obj, "image")
+
+# Lightweight product representation for catalogue grids (?view=list):
+# skips the long medical text columns (indication, doses, side effects, ...)
+PRODUCT_LIST_FIELDS = (
+    "id", "sku", "name", "slug", "generic_name", "brand", "category",
+    "price", "new_price", "offer_price", "discount_price", "stock",
+    "unit", "unit_value", "unit_display", "weight_display", "package_quantity",
+    "display_unit", "prescription_required", "image1", "image1_variants", "is_active",
+)
+
 # Serializer for Product
 class ProductSerializer(serializers.ModelSerializer):
     # Replace brand/category IDs with full nested objects
@@ -170,10 +189,13 @@ class ProductSerializer(serializers.ModelSerializer):
 
 
     # Return full Cloudinary URLs
-    image1 = serializers.ImageField(required=False, allow_null=True) # write_only field
-    image2 = serializers.ImageField(required=False, allow_null=True)
-    image3 = serializers.ImageField(required=False, allow_null=True)
+    image1 = serializers.ImageField(required=False, allow_null=True, validators=[validate_image_size]) # write_only field
+    image2 = serializers.ImageField(required=False, allow_null=True, validators=[validate_image_size])
+    image3 = serializers.ImageField(required=False, allow_null=True, validators=[validate_image_size])
     display_unit = serializers.SerializerMethodField()
+    image1_variants = serializers.SerializerMethodField()
+    image2_variants = serializers.SerializerMethodField()
+    image3_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
@@ -184,19 +206,56 @@ class ProductSerializer(serializers.ModelSerializer):
         # "brand_id", "category_id","is_active",
         # "image1", "image2", "image3","created_at", "updated_at",
         # ]
-        fields = "__all__"
+        exclude = ["search_text", "media"]  # internal search document / image metadata
         read_only_fields = ["id", "created_at", "updated_at", "slug", "new_price", "discount_price"]
 
+    # Columns a non-model field reads (used to build the only() column list)
+    SOURCE_COLUMNS = {
+        "display_unit": ("unit", "unit_value"),
+        "image1": ("image1", "media"),
+        "image2": ("image2", "media"),
+        "image3": ("image3", "media"),
+        "image1_variants": ("image1", "media"),
+        "image2_variants": ("image2", "media"),
+        "image3_variants": ("image3", "media"),
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Sparse fieldset: context["fields"] restricts the output fields
+        fields = self.context.get("fields")
+        if fields:
+            for name in set(self.fields) - set(fields):
+                if not self.fields[name].write_only:
+                    self.fields.pop(name)
+
+    @classmethod
+    def columns_for(cls, fields):
+        """Model columns needed to render the given output fields."""
+        columns = {"id"}
+        for name in fields:
+            columns.update(cls.SOURCE_COLUMNS.get(name, (name,)))
+        return columns
+
     def to_representation(self, instance):
         rep = super().to_representation(instance)
-        rep["image1"] = instance.image1.url if instance.image1 else None
-        rep["image2"] = instance.image2.url if instance.image2 else None
-        rep["image3"] = instance.image3.url if instance.image3 else None
+        for name in ("image1", "image2", "image3"):
+            if name in rep:
+                rep[name] = media_url(instance, name)
         return rep
 
     def get_display_unit(self, obj):
         return obj.display_unit()
 
+    def get_image1_variants(self, obj):
+        return media_variants(obj, "image1")
+
+    def get_image2_variants(self, obj):
+        return media_variants(obj, "image2")
+
+    def get_image3_variants(self, obj):
+        return media_variants(obj, "image3")
+
     # Removed validate_imageX methods as they are handled by model-level validator
 
 
@@ -214,7 +273,12 @@ class CartItemSerializer(serializers.ModelSerializer):
 
 # Serializer for Cart
 class CartSerializer(serializers.ModelSerializer):
-    items = CartItemSerializer(many=True, read_only=True)
+    """
+    Reads items from `prefetched_items` (see CartViewSet.get_cart) and totals
+    from the DB annotations items_count / items_quantity / items_price when
+    present, otherwise computes them from the in-memory items.
+    """
+    items = serializers.SerializerMethodField()
     total_items = serializers.SerializerMethodField()
     total_quantity = serializers.SerializerMethodField()
     total_price = serializers.SerializerMethodField()
@@ -227,18 +291,34 @@ class CartSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "user", "created_at", "updated_at"]
 
+    def _items(self, obj):
+        items = getattr(obj, "prefetched_items", None)
+        if items is None:
+            items = list(obj.items.select_related("product__brand", "product__category"))
+            obj.prefetched_items = items
+        return items
+
+    def get_items(self, obj):
+        return CartItemSerializer(self._items(obj), many=True, context=self.context).data
+
     def get_total_items(self, obj):
         """Number of distinct cart items"""
-        return obj.items.count()
+        if hasattr(obj, "items_count"):
+            return obj.items_count
+        return len(self._items(obj))
 
     def get_total_quantity(self, obj):
         """Sum of quantities across all items"""
-        return sum(item.quantity for item in obj.items.all())
+        if hasattr(obj, "items_quantity"):
+            return obj.items_quantity or 0
+        return sum(item.quantity for item in self._items(obj))
 
     def get_total_price(self, obj):
         """Sum of product price × quantity"""
+        if hasattr(obj, "items_price"):
+            return round(float(obj.items_price or 0), 2)
         total = 0
-        for item in obj.items.all():
+        for item in self._items(obj):
             if item.product and item.product.price:
                 total += float(item.product.price) * item.quantity
         return round(total, 2)
@@ -250,7 +330,7 @@ class PrescriptionRequestSerializer(serializers.ModelSerializer):
     product_id = serializers.PrimaryKeyRelatedField(
         queryset=Product.objects.all(), write_only=True, source="product"
     )
-    uploaded_image = serializers.ImageField(write_only=True)  # user uploads image
+    uploaded_image = serializers.ImageField(write_only=True, validators=[validate_image_size])  # user uploads image
 
     class Meta:
         model = PrescriptionRequest
@@ -274,10 +354,7 @@ class PrescriptionRequestSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         """Return Cloudinary URL for uploaded_image instead of file path"""
         ret = super().to_representation(instance)
-        if instance.uploaded_image:
-            ret['uploaded_image'] = instance.uploaded_image.url  # Cloudinary URL
-        else:
-            ret['uploaded_image'] = None
+        ret['uploaded_image'] = media_url(instance, "uploaded_image")  # stored Cloudinary URL
         return ret
 
     def create(self, validated_data):
@@ -350,24 +427,47 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
     def create(self, validated_data):
+        """
+        Create the order and all its items in one transaction:
+        one in_bulk() for the products and one bulk_create() for the items.
+        """
         items_data = validated_data.pop('items')
-        order = Order.objects.create(**validated_data)
-
-        for item_data in items_data:
-            product = Product.objects.get(id=item_data['product_id'])
-
-            # Decide correct selling price
-            selling_price = product.new_price if product.new_price else product.price
-
-            OrderItem.objects.create(
-                order=order,
-                product=product,
-                product_name=item_data['product_name'],
-                quantity=item_data['quantity'],
-                actual_price=product.actual_price,    # snapshot from Product
-                price=selling_price,                  # snapshot final selling price
-                subtotal=item_data['subtotal']
+        product_ids = {item_data['product_id'] for item_data in items_data}
+        products = Product.objects.only("id", "price", "new_price", "actual_price").in_bulk(product_ids)
+
+        missing = product_ids - set(products)
+        if missing:
+            raise serializers.ValidationError(
+                {"items": f"Product(s) not found: {', '.join(map(str, sorted(missing)))}"}
             )
+
+        with transaction.atomic():
+            order = Order.objects.create(**validated_data)
+
+            order_items = []
+            for item_data in items_data:
+                product = products[item_data['product_id']]
+
+                # Decide correct selling price
+                selling_price = product.new_price if product.new_price else product.price
+
+                order_items.append(OrderItem(
+                    order=order,
+                    product=product,
+                    product_name=item_data['product_name'],
+                    quantity=item_data['quantity'],
+                    actual_price=product.actual_price,    # snapshot from Product
+                    price=selling_price,                  # snapshot final selling price
+                    subtotal=item_data['subtotal']
+                ))
+            OrderItem.objects.bulk_create(order_items)
+
+        # Serve order.items from memory so the response doesn't re-query them:
+        # a prefetched queryset, so filter()/count()/exists() still behave
+        items = order.items.all()
+        items._result_cache = order_items
+        items._prefetch_done = True
+        order._prefetched_objects_cache = {"items": items}
         return order
 
 # Serializer for Monthly Reports
@@ -393,16 +493,16 @@ class DoctorSerializer(serializers.ModelSerializer):
                   'available_time', 'availability', 'created_at']
 
     def get_availability(self, obj):
-        availability = {}
+        """
+        Free slots for the next 7 days. Uses context["booked_slots"] (built once
+        for a whole page of doctors by the views) when available.
+        """
         today = date.today()
-        for i in range(7):  # next 7 days
-            day = today + timedelta(days=i)
-            weekday = day.strftime("%A")
-            if weekday in obj.available_days:
-                slots = get_available_time_slots(obj, day)
-                if slots:
-                    availability[str(day)] = slots
-        return availability
+        days = [today + timedelta(days=i) for i in range(7)]  # next 7 days
+        booked = self.context.get("booked_slots")
+        if booked is None:
+            booked = booked_slots_index([obj.id], days[0], days[-1])
+        return week_availability(obj, days, booked)
 
 # Serializer for Appointment
 class AppointmentSerializer(serializers.ModelSerializer):
@@ -1,140 +1,117 @@
 # users/signals.py
 
-from django.db.models import Sum, F
-from django.db.models.signals import pre_save, post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
-from django.utils.timezone import make_aware
-from datetime import datetime
-from .models import MonthlyReport, Order, OrderItem, YearlyReport
-
-
-# --- Helper: check if payment_status changed ---
-@receiver(pre_save, sender=Order)
-def store_old_payment_status(sender, instance, **kwargs):
-    """Store old payment_status before saving (for comparison in post_save)."""
-    if instance.pk:  # Only if order already exists
-        try:
-            old_instance = Order.objects.get(pk=instance.pk)
-            instance._old_payment_status = old_instance.payment_status
-        except Order.DoesNotExist:
-            instance._old_payment_status = None
-    else:
-        instance._old_payment_status = None
+from .categories import attach_category, detach_category, invalidate_category_tree
+from .models import Appointment, Brand, Category, Doctor, Order, Product
+from .reports import apply_order_to_reports
+from .response_cache import invalidate, invalidate_all
+from .search import refresh_search_text
+from .suggest import brand_terms, product_terms, suggest_index
 
 
 @receiver(post_save, sender=Order)
 def update_reports(sender, instance, created, **kwargs):
     """
-    Update Monthly and Yearly Reports when an order is marked as paid.
-    Works for both new paid orders and updates from pending -> paid.
+    Update Monthly and Yearly Reports when an order's paid state changes.
+    Only the delta of this order is applied (see users/reports.py);
+    use `manage.py rebuild_reports` for a full recompute.
     """
+    # Previous value comes from the in-memory snapshot (TrackedFieldsMixin), no query
+    old_status = None if created else instance.previous("payment_status")
+    was_paid = old_status == "paid"
+    is_paid = instance.payment_status == "paid"
+
+    if was_paid == is_paid:
+        return  # paid state unchanged, nothing to apply
+
+    sign = 1 if is_paid else -1
+    # Run after commit so items saved in the same transaction are included
+    transaction.on_commit(lambda: apply_order_to_reports(instance, sign))
+
+
+@receiver(post_save, sender=Brand)
+def refresh_brand_products_search(sender, instance, created, **kwargs):
+    """Brand name is part of Product.search_text; re-index the brand's products on rename."""
+    if not created and instance.has_changed("name"):
+        refresh_search_text(instance.products.all())
+
+
+# --- Keep the in-process suggestion index (users/suggest.py) current ---
+# Applied on commit so a rolled-back save or delete never reaches the index
+def _suggest_set(source, terms):
+    if suggest_index.built_at is not None:
+        suggest_index.set_source(source, terms)
+
+
+@receiver(post_save, sender=Product)
+def suggest_product_saved(sender, instance, **kwargs):
+    source, terms = ("product", instance.pk), product_terms(instance)
+    transaction.on_commit(lambda: _suggest_set(source, terms))
+
+
+@receiver(post_delete, sender=Product)
+def suggest_product_deleted(sender, instance, **kwargs):
+    source = ("product", instance.pk)
+    transaction.on_commit(lambda: suggest_index.remove_source(source))
+
+
+@receiver(post_save, sender=Brand)
+def suggest_brand_saved(sender, instance, **kwargs):
+    source, terms = ("brand", instance.pk), brand_terms(instance)
+    transaction.on_commit(lambda: _suggest_set(source, terms))
+
+
+@receiver(post_delete, sender=Brand)
+def suggest_brand_deleted(sender, instance, **kwargs):
+    source = ("brand", instance.pk)
+    transaction.on_commit(lambda: suggest_index.remove_source(source))
+
+
+# --- Category closure table and cached tree (users/categories.py) ---
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created, **kwargs):
+    if created or instance.has_changed("parent_id"):
+        attach_category(instance)
+    transaction.on_commit(invalidate_category_tree)
+
+
+@receiver(pre_delete, sender=Category)
+def category_deleting(sender, instance, **kwargs):
+    detach_category(instance)
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_category_tree)
+
+
+# --- Response cache invalidation (users/response_cache.py) ---
+# Products embed their brand and category, so those changes drop all product responses.
+@receiver([post_save, post_delete], sender=Product)
+def product_cache_changed(sender, instance, **kwargs):
+    invalidate("products", instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Brand)
+def brand_cache_changed(sender, instance, **kwargs):
+    invalidate("brands", instance.pk)
+    invalidate_all("products")
+
+
+@receiver([post_save, post_delete], sender=Category)
+def category_cache_changed(sender, instance, **kwargs):
+    invalidate("categories", instance.pk)
+    invalidate_all("products")
+
+
+@receiver([post_save, post_delete], sender=Doctor)
+def doctor_cache_changed(sender, instance, **kwargs):
+    invalidate("doctors", instance.pk)
+
 
-    # If just created as paid OR changed from not-paid to paid
-    if not created and getattr(instance, "_old_payment_status", None) == "paid":
-        return  # already paid before, no need to recalc
-
-    if instance.payment_status != "paid":
-        return
-
-    # === Monthly Report ===
-    month_start = datetime(instance.created_at.year, instance.created_at.month, 1)
-    month_start = make_aware(month_start)
-
-    report, _ = MonthlyReport.objects.get_or_create(month=month_start)
-
-    paid_orders = Order.objects.filter(
-        payment_status="paid",
-        created_at__year=month_start.year,
-        created_at__month=month_start.month,
-    )
-    items = OrderItem.objects.filter(order__in=paid_orders)
-
-    total_income = items.aggregate(total=Sum("subtotal"))["total"] or 0
-    total_profit = sum([(i.price - i.actual_price) * i.quantity for i in items])
-    total_orders = paid_orders.count()
-    total_products_sold = items.aggregate(total=Sum("quantity"))["total"] or 0
-
-    # Top-selling product
-    top_item = (
-        items.values("product_name")
-        .annotate(total=Sum("quantity"))
-        .order_by("-total")
-        .first()
-    )
-    top_product = top_item["product_name"] if top_item else None
-
-    # Products details
-    products_details = []
-    grouped = (
-        items.values("product_name")
-        .annotate(
-            total_qty=Sum("quantity"),
-            total_income=Sum("subtotal"),
-            total_actual=Sum(F("actual_price") * F("quantity")),
-        )
-    )
-    for g in grouped:
-        profit = g["total_income"] - g["total_actual"]
-        products_details.append({
-            "product": g["product_name"],
-            "quantity": g["total_qty"],
-            "income": float(g["total_income"]or 0),
-            "actual": float(g["total_actual"] or 0),   # ensure not None
-            "profit": float(profit),
-        })
-
-    report.total_income = total_income
-    report.total_profit = total_profit
-    report.total_orders = total_orders
-    report.total_products_sold = total_products_sold
-    report.top_product = top_product
-    report.products_details = products_details
-    report.save()
-
-    # === Yearly Report ===
-    year = instance.created_at.year
-    y_report, _ = YearlyReport.objects.get_or_create(year=year)
-
-    paid_orders_year = Order.objects.filter(payment_status="paid", created_at__year=year)
-    items_year = OrderItem.objects.filter(order__in=paid_orders_year)
-
-    total_income_year = items_year.aggregate(total=Sum("subtotal"))["total"] or 0
-    total_profit_year = sum([(i.price - i.actual_price) * i.quantity for i in items_year])
-    total_orders_year = paid_orders_year.count()
-    total_products_sold_year = items_year.aggregate(total=Sum("quantity"))["total"] or 0
-
-    top_item_year = (
-        items_year.values("product_name")
-        .annotate(total=Sum("quantity"))
-        .order_by("-total")
-        .first()
-    )
-    top_product_year = top_item_year["product_name"] if top_item_year else None
-
-    # Products details yearly
-    products_details_year = []
-    grouped_year = (
-        items_year.values("product_name")
-        .annotate(
-            total_qty=Sum("quantity"),
-            total_income=Sum("subtotal"),
-            total_actual=Sum(F("actual_price") * F("quantity")),
-        )
-    )
-    for g in grouped_year:
-        profit = g["total_income"] - g["total_actual"]
-        products_details_year.append({
-            "product": g["product_name"],
-            "quantity": g["total_qty"],
-            "income": float(g["total_income"]or 0),
-            "actual": float(g["total_actual"] or 0),   # ensure not None
-            "profit": float(profit),
-        })
-
-    y_report.total_income = total_income_year
-    y_report.total_profit = total_profit_year
-    y_report.total_orders = total_orders_year
-    y_report.total_products_sold = total_products_sold_year
-    y_report.top_product = top_product_year
-    y_report.products_details = products_details_year
-    y_report.save()
+@receiver([post_save, post_delete], sender=Appointment)
+def appointment_cache_changed(sender, instance, **kwargs):
+    # Doctor responses include booked-slot availability
+    invalidate("doctors", instance.doctor_id)
@@ -0,0 +1,64 @@
+# users/slots.py
+# Pure doctor slot helpers (no DB access) shared by models, helpers and serializers.
+# Slots are generated as minute offsets from midnight and only formatted at the end.
+import math
+
+
+def parse_minutes(hhmm):
+    """'10:30' -> 630"""
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def format_slot(minutes):
+    """630 -> '10:30'"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def slot_offsets(available_time, max_patients_per_day):
+    """
+    Candidate slot starts (minutes from midnight) for ranges like ["10:00-12:00"].
+    Interval per patient = total available minutes / max_patients_per_day,
+    minimum 10 minutes. A slot is kept only if it fits fully inside its range.
+    """
+    ranges = []
+    total_minutes = 0
+    for time_range in available_time:
+        start_str, end_str = time_range.split("-")
+        start, end = parse_minutes(start_str), parse_minutes(end_str)
+        total_minutes += end - start
+        ranges.append((start, end))
+
+    if total_minutes == 0 or not max_patients_per_day:
+        return []
+
+    interval = max(10, math.floor(total_minutes / max_patients_per_day))  # at least 10 min
+
+    offsets = []
+    for start, end in ranges:
+        offsets.extend(range(start, end - interval + 1, interval))
+    return offsets
+
+
+def build_slot_template(available_time, max_patients_per_day):
+    """
+    Return every candidate slot start ("HH:MM") of a doctor's day, in order.
+    Booked slots are removed later (see available_slots), so the template is
+    not capped at max_patients_per_day here.
+    """
+    return [format_slot(m) for m in slot_offsets(available_time, max_patients_per_day)]
+
+
+def available_slots(template, booked, max_patients_per_day):
+    """
+    First max_patients_per_day template slots that are not booked.
+    `booked` is materialized once as a frozenset so each check is O(1).
+    """
+    booked = booked if isinstance(booked, (set, frozenset)) else frozenset(booked)
+    slots = []
+    for slot in template:
+        if len(slots) >= max_patients_per_day:
+            break
+        if slot not in booked:
+            slots.append(slot)
+    return slots
@@ -0,0 +1,67 @@
+# users/slugs.py
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from django.utils.text import slugify
+
+SUFFIX_ROOM = 6  # room kept for "-<n>" under the field's max_length
+
+
+class SlugAllocator:
+    """
+    Reserve unique slugs for a model: "name", then "name-2", "name-3", ...
+
+    The slugs already in use for a batch of base slugs are read with a single
+    slug__startswith query, and collisions are resolved in memory. One
+    allocator can serve a whole bulk import: loaded prefixes and the slugs it
+    handed out are remembered, so rows of the same batch never collide.
+    """
+
+    def __init__(self, model, field="slug"):
+        self.model = model
+        self.field = field
+        self.max_length = model._meta.get_field(field).max_length
+        self.taken = {}  # base -> slugs in use that are the base or base-<n>
+        self.reserved = set()
+
+    def base(self, text):
+        base = slugify(text or "")[: self.max_length - SUFFIX_ROOM].strip("-")
+        return base or self.model._meta.model_name
+
+    def _load(self, bases):
+        missing = {base for base in bases if base not in self.taken}
+        if not missing:
+            return
+        for base in missing:
+            self.taken[base] = set()
+        query = reduce(or_, (Q(**{f"{self.field}__startswith": base}) for base in missing))
+        for slug in self.model._default_manager.filter(query).values_list(self.field, flat=True).iterator():
+            if slug in missing:
+                self.taken[slug].add(slug)
+            head, _, tail = slug.rpartition("-")
+            if tail.isdigit() and head in missing:
+                self.taken[head].add(slug)
+
+    def _resolve(self, base):
+        taken = self.taken[base]
+        slug, n = base, 1
+        while slug in taken or slug in self.reserved:
+            n += 1
+            slug = f"{base}-{n}"
+        self.reserved.add(slug)
+        return slug
+
+    def allocate_many(self, texts):
+        """Unique slugs for texts (in order), with one query for all new bases."""
+        bases = [self.base(text) for text in texts]
+        self._load(bases)
+        return [self._resolve(base) for base in bases]
+
+    def allocate(self, text):
+        return self.allocate_many([text])[0]
+
+
+def unique_slug(model, text):
+    """Unique slug for one new row of model (a single prefix query)."""
+    return SlugAllocator(model).allocate(text)
@@ -0,0 +1,47 @@
+# users/stock.py
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Product
+from .response_cache import invalidate
+
+
+class InsufficientStock(Exception):
+    """Raised when a product does not have enough stock for the requested quantity."""
+
+    def __init__(self, product_id, requested):
+        self.product_id = product_id
+        self.requested = requested
+        super().__init__(f"Not enough stock for product {product_id} (requested {requested})")
+
+
+def order_quantities(items):
+    """Sum quantities per product_id from order item dicts (same product may repeat)."""
+    quantities = Counter()
+    for item in items:
+        quantities[int(item["product_id"])] += int(item["quantity"])
+    return quantities
+
+
+def reserve_stock(quantities):
+    """
+    Atomically decrement stock for {product_id: quantity}.
+
+    Each product is decremented with a conditional UPDATE
+    (stock >= qty -> stock = stock - qty), so concurrent checkouts can't
+    oversell or lose updates. Rows are updated in ascending id order so two
+    orders always take their row locks in the same order (no deadlocks).
+    Raises InsufficientStock and rolls everything back if any product is short.
+    """
+    with transaction.atomic():
+        for product_id in sorted(quantities):
+            quantity = quantities[product_id]
+            updated = Product.objects.filter(pk=product_id, stock__gte=quantity).update(
+                stock=F("stock") - quantity
+            )
+            if not updated:
+                raise InsufficientStock(product_id, quantity)
+            # Queryset updates send no signals; drop the cached product responses
+            invalidate("products", product_id)
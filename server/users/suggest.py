@@ -0,0 +1,186 @@
+# users/suggest.py
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+MAX_LABEL_LENGTH = 100
+
+
+class PrefixIndex:
+    """
+    In-process type-ahead index: a sorted list of (key, kind) pairs searched
+    with bisect, so a lookup is O(log n + limit) with no database access.
+
+    Each source object (a product or a brand) contributes a few labels; labels
+    shared by several products (e.g. a generic name) are reference counted so
+    incremental updates from signals stay correct.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = []   # sorted [(key, kind)]
+        self._labels = {}    # (key, kind) -> [label, refcount]
+        self._sources = {}   # (source_kind, pk) -> ((key, kind, label), ...)
+        self.built_at = None
+        self.hits = 0
+        self.misses = 0
+        self.dropped = 0
+
+    # --- building / incremental updates ---
+
+    def build(self, sources):
+        """Replace the whole index from an iterable of (source, terms)."""
+        labels, by_source = {}, {}
+        for source, terms in sources:
+            terms = _normalise(terms)
+            by_source[source] = terms
+            for key, kind, label in terms:
+                entry = labels.get((key, kind))
+                if entry:
+                    entry[1] += 1
+                elif len(labels) < self.max_entries:
+                    labels[(key, kind)] = [label, 1]
+        with self._lock:
+            self._labels = labels
+            self._sources = by_source
+            self._entries = sorted(labels)
+            self.dropped = sum(
+                1 for terms in by_source.values() for key, kind, _ in terms if (key, kind) not in labels
+            )
+            self.built_at = time.monotonic()
+
+    def set_source(self, source, terms):
+        """Add or replace the labels contributed by one object."""
+        terms = _normalise(terms)
+        with self._lock:
+            for key, kind, _ in self._sources.pop(source, ()):
+                self._release(key, kind)
+            for key, kind, label in terms:
+                self._acquire(key, kind, label)
+            if terms:
+                self._sources[source] = terms
+
+    def remove_source(self, source):
+        with self._lock:
+            for key, kind, _ in self._sources.pop(source, ()):
+                self._release(key, kind)
+
+    def _acquire(self, key, kind, label):
+        entry = self._labels.get((key, kind))
+        if entry:
+            entry[1] += 1
+            return
+        if len(self._labels) >= self.max_entries:
+            self.dropped += 1
+            return
+        self._labels[(key, kind)] = [label, 1]
+        position = bisect_left(self._entries, (key, kind))
+        self._entries.insert(position, (key, kind))
+
+    def _release(self, key, kind):
+        entry = self._labels.get((key, kind))
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del self._labels[(key, kind)]
+            position = bisect_left(self._entries, (key, kind))
+            if position < len(self._entries) and self._entries[position] == (key, kind):
+                del self._entries[position]
+
+    # --- queries ---
+
+    def lookup(self, prefix, limit=10):
+        """Return up to `limit` {"text", "type"} suggestions whose label starts with prefix."""
+        prefix = " ".join(prefix.lower().split())
+        results = []
+        with self._lock:
+            position = bisect_left(self._entries, (prefix,))
+            entries = self._entries
+            while position < len(entries) and len(results) < limit:
+                key, kind = entries[position]
+                if not key.startswith(prefix):
+                    break
+                results.append({"text": self._labels[(key, kind)][0], "type": kind})
+                position += 1
+            if results:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return results
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "sources": len(self._sources),
+                "max_entries": self.max_entries,
+                "dropped": self.dropped,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "age_seconds": round(time.monotonic() - self.built_at, 1) if self.built_at else None,
+            }
+
+    def is_stale(self, ttl):
+        return self.built_at is None or (ttl and time.monotonic() - self.built_at > ttl)
+
+
+def _normalise(terms):
+    """(kind, label) pairs -> unique ((key, kind, label), ...) with lower-case, single-spaced keys."""
+    seen = {}
+    for kind, label in terms:
+        label = " ".join((label or "").split())[:MAX_LABEL_LENGTH]
+        if label:
+            seen.setdefault((label.lower(), kind), label)
+    return tuple((key, kind, label) for (key, kind), label in seen.items())
+
+
+def product_terms(product):
+    if not product.is_active:
+        return ()
+    return (("product", product.name), ("generic", product.generic_name))
+
+
+def brand_terms(brand):
+    return (("brand", brand.name),)
+
+
+suggest_index = PrefixIndex(getattr(settings, "SUGGEST_MAX_ENTRIES", 200_000))
+_build_lock = threading.Lock()
+
+
+def get_suggest_index():
+    """
+    Return the process-wide index, (re)building it from the database on first
+    use and after SUGGEST_INDEX_TTL seconds. Signals keep it current within a
+    process; the TTL bounds staleness across worker processes.
+    """
+    ttl = getattr(settings, "SUGGEST_INDEX_TTL", 300)
+    if suggest_index.is_stale(ttl):
+        with _build_lock:
+            if suggest_index.is_stale(ttl):
+                rebuild_suggest_index()
+    return suggest_index
+
+
+def rebuild_suggest_index():
+    """Load all active products and brands with two values_list queries."""
+    from .models import Brand, Product
+
+    products = Product.objects.filter(is_active=True).values_list("pk", "name", "generic_name")
+    brands = Brand.objects.values_list("pk", "name")
+    sources = [
+        (("product", pk), (("product", name), ("generic", generic_name)))
+        for pk, name, generic_name in products.iterator()
+    ] + [(("brand", pk), (("brand", name),)) for pk, name in brands.iterator()]
+    suggest_index.build(sources)
+
+
+def invalidate_suggest_index():
+    """Mark this process's index stale (e.g. after bulk writes that send no signals); the next lookup rebuilds it."""
+    suggest_index.built_at = None
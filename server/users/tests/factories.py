@@ -0,0 +1,40 @@
+# users/tests/factories.py
+from decimal import Decimal
+
+from users.models import Brand, Category, CustomUser, Order, OrderItem, Product
+
+
+def make_user(email="patient@example.com", **kwargs):
+    return CustomUser.objects.create_user(username=email.split("@")[0], email=email, password="pass", **kwargs)
+
+
+def make_catalogue():
+    """(category, brand, napa, ace): two products with stock 100."""
+    category = Category.objects.create(name="Pain Relief")
+    brand = Brand.objects.create(name="Beximco")
+    napa = Product.objects.create(
+        sku="NAPA-500", name="Napa", generic_name="Paracetamol", category=category, brand=brand,
+        price=Decimal("10.00"), actual_price=Decimal("6.00"), stock=100, image1="products/napa",
+    )
+    ace = Product.objects.create(
+        sku="ACE-500", name="Ace", generic_name="Paracetamol", category=category, brand=brand,
+        price=Decimal("20.00"), actual_price=Decimal("15.00"), stock=100, image1="products/ace",
+    )
+    return category, brand, napa, ace
+
+
+def make_order(user, items, payment_status="pending", **kwargs):
+    """Order with one OrderItem per (product, quantity), priced from the product."""
+    order = Order.objects.create(
+        user=user, payment_method="card", payment_status=payment_status,
+        name="Patient", email=user.email, phone="01700000000", city="Dhaka",
+        postal_code="1200", address="Road 1",
+        total_price=0, total_new_price=0, total_discount=0, total_amount=0,
+        **kwargs,
+    )
+    for product, quantity in items:
+        OrderItem.objects.create(
+            order=order, product=product, product_name=product.name, quantity=quantity,
+            actual_price=product.actual_price, price=product.price, subtotal=product.price * quantity,
+        )
+    return order
@@ -0,0 +1,52 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from users.models import CartItem, Product
+
+from .factories import make_catalogue, make_user
+
+
+class CartTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.category, self.brand, self.napa, self.ace = make_catalogue()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add(self, product, quantity):
+        return self.client.post("/cart/add/", {"product_id": product.pk, "quantity": quantity}, secure=True)
+
+    def totals(self, data):
+        return data["total_items"], data["total_quantity"], data["total_price"]
+
+    def test_adding_merges_quantities_and_updates_totals(self):
+        self.assertEqual(self.totals(self.add(self.napa, 2).data), (1, 2, 20.0))
+        self.assertEqual(self.totals(self.add(self.napa, 1).data), (1, 3, 30.0))
+        response = self.add(self.ace, 1)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.totals(response.data), (2, 4, 50.0))
+        self.assertEqual(CartItem.objects.get(product=self.napa).quantity, 3)
+
+        response = self.client.get("/cart/", secure=True)
+        self.assertEqual(self.totals(response.data), (2, 4, 50.0))
+        self.assertEqual({item["product"]["name"] for item in response.data["items"]}, {"Napa", "Ace"})
+
+    def test_reading_the_cart_does_not_query_per_item(self):
+        self.add(self.napa, 1)
+        with self.assertNumQueries(2):  # cart with totals + prefetched items
+            self.client.get("/cart/", secure=True)
+        self.add(self.ace, 1)
+        with self.assertNumQueries(2):
+            self.client.get("/cart/", secure=True)
+
+    def test_remove_and_prescription_products(self):
+        item_id = self.add(self.napa, 2).data["items"][0]["id"]
+        response = self.client.delete("/cart/remove/", {"cart_item_id": item_id}, secure=True)
+        self.assertEqual(self.totals(response.data), (0, 0, 0))
+        response = self.client.delete("/cart/remove/", {"cart_item_id": item_id}, secure=True)
+        self.assertEqual(response.status_code, 404)
+
+        Product.objects.filter(pk=self.ace.pk).update(prescription_required=True)
+        response = self.add(self.ace, 1)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(CartItem.objects.exists())
@@ -0,0 +1,92 @@
+import io
+from decimal import Decimal
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from users.catalog_import import import_products
+from users.models import CustomUser, Product
+
+from .factories import make_catalogue
+
+
+class ImportProductsTests(TestCase):
+    def setUp(self):
+        self.category, self.brand, self.napa, self.ace = make_catalogue()
+
+    def run_import(self, text, fmt="csv", **kwargs):
+        return import_products(io.StringIO(text), fmt, **kwargs)
+
+    def test_creates_and_updates_by_sku(self):
+        report = self.run_import(
+            "sku,name,price,offer_price,category,brand,unit,unit_value\n"
+            f"NAPA-500,,12,25,,,tablet,10\n"
+            f"ZINC-20,Zinc,5,,{self.category.name},{self.brand.slug},,\n"
+        )
+        self.assertEqual((report["created"], report["updated"], report["failed"]), (1, 1, 0))
+        self.napa.refresh_from_db()
+        self.assertEqual(self.napa.name, "Napa")  # empty cell leaves the field unchanged
+        self.assertEqual(self.napa.new_price, Decimal("9.00"))
+        self.assertEqual(self.napa.discount_price, Decimal("3.00"))
+        self.assertEqual(self.napa.unit_display, "10 Tablet")
+        zinc = Product.objects.get(sku="ZINC-20")
+        self.assertEqual((zinc.slug, zinc.brand_id, zinc.new_price), ("zinc", self.brand.pk, Decimal("5.00")))
+        self.assertIn("beximco", zinc.search_text)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        rows = [
+            ("NAN", "Nan", "NaN", ""),
+            ("INF", "Inf", "Infinity", ""),
+            ("HUGE", "Huge", "1e20", ""),
+            ("PRECISE", "Precise", "1.005", ""),
+            ("OFFER", "Offer", "10", "500"),
+            ("LONG", "x" * 300, "10", ""),
+            ("s" * 120, "Long sku", "10", ""),
+            ("NOCAT", "No category", "10", ""),
+            ("OK", "Ok", "10", "5"),
+        ]
+        text = "sku,name,price,offer_price,category\n" + "".join(
+            f"{sku},{name},{price},{offer},{'' if sku == 'NOCAT' else self.category.pk}\n"
+            for sku, name, price, offer in rows
+        )
+        report = self.run_import(text)
+
+        self.assertEqual((report["created"], report["failed"]), (1, 8))
+        errors = {error["line"]: error["error"] for error in report["errors"]}
+        self.assertIn("not a number", errors[2])
+        self.assertIn("not a number", errors[3])
+        self.assertIn("digits", errors[4])
+        self.assertIn("decimal places", errors[5])
+        self.assertIn("at most 100", errors[6])
+        self.assertIn("longer than 255", errors[7])
+        self.assertIn("at most 100 characters", errors[8])
+        self.assertIn("category", errors[9])
+        self.assertTrue(Product.objects.filter(sku="OK").exists())
+
+    def test_ndjson_with_broken_lines(self):
+        text = (
+            f'{{"sku": "ND-1", "name": "Nd", "price": "9.50", "category": {self.category.pk}, '
+            '"prescription_required": true}\n'
+            "not json\n"
+            '{"name": "no sku"}\n'
+        )
+        report = self.run_import(text, "ndjson")
+        self.assertEqual((report["created"], report["failed"]), (1, 2))
+        self.assertTrue(Product.objects.get(sku="ND-1").prescription_required)
+
+    def test_dry_run_rolls_back(self):
+        report = self.run_import(
+            f"sku,name,price,category\nDRY-1,Dry,1,{self.category.pk}\n", dry_run=True
+        )
+        self.assertEqual(report["created"], 1)
+        self.assertFalse(Product.objects.filter(sku="DRY-1").exists())
+
+    def test_endpoint_reports_non_finite_price_as_row_error(self):
+        admin = CustomUser.objects.create_superuser("admin", "admin@example.com", "pass")
+        client = APIClient()
+        client.force_authenticate(admin)
+        upload = SimpleUploadedFile("catalogue.csv", f"sku,name,price,category\nB1,X,NaN,{self.category.pk}\n".encode())
+        response = client.post("/products/import/", {"file": upload}, format="multipart", secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["failed"], 1)
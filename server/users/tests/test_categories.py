@@ -0,0 +1,103 @@
+from django.core.exceptions import ValidationError
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from users.categories import closure_rows, subtree_filter
+from users.models import Category, CategoryClosure, Product
+
+from .factories import make_catalogue
+
+
+class CategoryClosureTests(TestCase):
+    def setUp(self):
+        self.medicine = Category.objects.create(name="Medicine")
+        self.pain = Category.objects.create(name="Pain", parent=self.medicine)
+        self.headache = Category.objects.create(name="Headache", parent=self.pain)
+        self.care = Category.objects.create(name="Personal Care")
+
+    def links(self):
+        return set(CategoryClosure.objects.values_list("ancestor_id", "descendant_id", "depth"))
+
+    def expected_links(self):
+        """What a full rebuild from Category.parent would store."""
+        return set(closure_rows(dict(Category.objects.values_list("id", "parent_id"))))
+
+    def test_new_categories_are_linked_to_all_ancestors(self):
+        self.assertEqual(self.links(), self.expected_links())
+        self.assertIn((self.medicine.pk, self.headache.pk, 2), self.links())
+
+    def test_reparenting_moves_the_subtree(self):
+        self.pain.parent = self.care
+        self.pain.save()
+        self.assertEqual(self.links(), self.expected_links())
+        self.assertIn((self.care.pk, self.headache.pk, 2), self.links())
+        self.assertNotIn(self.medicine.pk, {a for a, d, _ in self.links() if d == self.headache.pk})
+
+        self.pain.parent = None
+        self.pain.save()
+        self.assertEqual(self.links(), self.expected_links())
+
+    def test_category_cannot_move_under_its_descendant(self):
+        self.medicine.parent = self.headache
+        with self.assertRaises(ValidationError):
+            self.medicine.full_clean()
+        with self.assertRaises(ValueError):
+            self.medicine.save()
+        self.medicine.refresh_from_db()
+        self.assertIsNone(self.medicine.parent_id)
+        self.assertEqual(self.links(), self.expected_links())
+
+    def test_deleting_a_category_makes_its_children_roots(self):
+        self.pain.delete()
+        self.assertEqual(self.links(), self.expected_links())
+        self.assertEqual(
+            set(CategoryClosure.objects.filter(descendant=self.headache).values_list("ancestor_id", flat=True)),
+            {self.headache.pk},
+        )
+
+    def test_subtree_filter_includes_descendants(self):
+        category, _, napa, ace = make_catalogue()
+        Product.objects.filter(pk=napa.pk).update(category=self.headache)
+        Product.objects.filter(pk=ace.pk).update(category=self.care)
+        self.assertEqual(
+            list(Product.objects.filter(**subtree_filter([self.medicine.pk])).values_list("name", flat=True)),
+            ["Napa"],
+        )
+        self.assertFalse(Product.objects.filter(**subtree_filter([category.pk, self.pain.pk]), name="Ace").exists())
+
+
+class CategoryCycleOutsideTransactionTests(TransactionTestCase):
+    def test_rejected_move_leaves_the_row_unchanged(self):
+        root = Category.objects.create(name="Medicine")
+        child = Category.objects.create(name="Pain", parent=root)
+        root.parent = child
+        with self.assertRaises(ValueError):
+            root.save()  # autocommit: no surrounding atomic block
+        self.assertIsNone(Category.objects.get(pk=root.pk).parent_id)
+        self.assertEqual(
+            set(CategoryClosure.objects.values_list("ancestor_id", "descendant_id", "depth")),
+            {(root.pk, root.pk, 0), (child.pk, child.pk, 0), (root.pk, child.pk, 1)},
+        )
+
+
+class CategoryProductsTests(TestCase):
+    def setUp(self):
+        self.category, _, self.napa, self.ace = make_catalogue()
+        self.headache = Category.objects.create(name="Headache", parent=self.category)
+        self.care = Category.objects.create(name="Personal Care")
+        Product.objects.filter(pk=self.napa.pk).update(category=self.headache)
+        self.client = APIClient()
+
+    def get(self, pk):
+        return self.client.get(f"/categories/{pk}/products/", secure=True)
+
+    def test_lists_products_of_the_subtree(self):
+        response = self.get(self.category.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual([product["name"] for product in response.data["results"]], ["Ace", "Napa"])
+        self.assertEqual(self.get(self.care.pk).data["count"], 0)
+
+    def test_unknown_or_invalid_category_is_404(self):
+        self.assertEqual(self.get(self.care.pk + 100).status_code, 404)
+        self.assertEqual(self.get("abc").status_code, 404)
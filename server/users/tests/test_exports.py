@@ -0,0 +1,58 @@
+import csv
+import io
+import json
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from users.reports import rebuild_reports
+
+from .factories import make_catalogue, make_order, make_user
+
+
+class ExportTableTests(TestCase):
+    def setUp(self):
+        self.admin = make_user("admin@example.com", is_staff=True)
+        _, _, self.napa, self.ace = make_catalogue()
+        self.order = make_order(self.admin, [(self.napa, 2)], payment_status="paid")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get(self, table, **params):
+        return self.client.get(f"/exports/{table}/", params, secure=True)
+
+    def csv_rows(self, response):
+        return list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+
+    def test_csv_with_column_projection(self):
+        response = self.get("products", fields="sku,name,brand__name,stock")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="products.csv"')
+        self.assertEqual(
+            self.csv_rows(response),
+            [["sku", "name", "brand__name", "stock"], ["NAPA-500", "Napa", "Beximco", "100"], ["ACE-500", "Ace", "Beximco", "100"]],
+        )
+
+    def test_ndjson_and_date_filters(self):
+        today = self.order.created_at.date().isoformat()
+        response = self.get("order-items", export="ndjson", fields="order_id,product_name,quantity", start_date=today)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(lines, [{"order_id": self.order.pk, "product_name": "Napa", "quantity": 2}])
+
+        response = self.get("orders", fields="id", end_date="2000-01-01")
+        self.assertEqual(self.csv_rows(response), [["id"]])
+
+    def test_nested_values_are_json_in_one_cell(self):
+        rebuild_reports()
+        rows = self.csv_rows(self.get("yearly-reports", fields="year,top_product,products_details"))
+        self.assertEqual(rows[1][1], "Napa")
+        self.assertEqual(json.loads(rows[1][2])[0]["product"], "Napa")
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.get("users").status_code, 404)
+        response = self.get("orders", fields="id,password")
+        self.assertEqual((response.status_code, response.data["error"]), (400, "Unknown fields: password"))
+        self.assertEqual(self.get("orders", start_date="yesterday").status_code, 400)
+        self.client.force_authenticate(make_user())
+        self.assertEqual(self.get("orders").status_code, 403)
@@ -0,0 +1,63 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import TestCase
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from users.filters import filter_products, product_facets
+from users.models import Brand, Category, Product
+
+from .factories import make_catalogue
+
+
+class CatalogueFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.pain, self.beximco, self.napa, self.ace = make_catalogue()
+        self.fever = Category.objects.create(name="Fever", parent=self.pain)
+        self.square = Brand.objects.create(name="Square")
+        self.zinc = Product.objects.create(
+            sku="ZINC-20", name="Zinc", category=self.fever, brand=self.square, price=Decimal("300.00"),
+            stock=0, prescription_required=True, image1="products/zinc",
+        )
+
+    def names(self, query):
+        return sorted(filter_products(Product.objects.all(), QueryDict(query)).values_list("name", flat=True))
+
+    def test_filters(self):
+        self.assertEqual(self.names(f"category={self.pain.pk}"), ["Ace", "Napa", "Zinc"])  # includes Fever
+        self.assertEqual(self.names(f"category={self.fever.pk}"), ["Zinc"])
+        self.assertEqual(self.names(f"brand={self.beximco.pk},{self.square.pk}&max_price=20"), ["Ace", "Napa"])
+        self.assertEqual(self.names("min_price=15"), ["Ace", "Zinc"])
+        self.assertEqual(self.names("in_stock=false"), ["Zinc"])
+        self.assertEqual(self.names("prescription_required=no&in_stock=1"), ["Ace", "Napa"])
+
+    def test_invalid_values_are_validation_errors(self):
+        for query in ("category=pain", "min_price=cheap", "in_stock=maybe"):
+            with self.assertRaises(ValidationError):
+                self.names(query)
+        response = APIClient().get("/products/?brand=x", secure=True)
+        self.assertEqual(response.status_code, 400)
+
+    def test_facets_count_the_filtered_products_in_one_query(self):
+        with self.assertNumQueries(1):
+            facets = product_facets(filter_products(Product.objects.all(), QueryDict(f"category={self.pain.pk}")))
+        self.assertEqual(facets["total"], 3)
+        self.assertEqual(
+            [(c["name"], c["count"]) for c in facets["category"]], [("Pain Relief", 2), ("Fever", 1)]
+        )
+        self.assertEqual([(b["name"], b["count"]) for b in facets["brand"]], [("Beximco", 2), ("Square", 1)])
+        self.assertEqual(
+            facets["price"],
+            [{"band": "0-100", "count": 2}, {"band": "100-250", "count": 0}, {"band": "250-500", "count": 1},
+             {"band": "500-1000", "count": 0}, {"band": "1000+", "count": 0}],
+        )
+        self.assertEqual(facets["in_stock"], {"true": 2, "false": 1})
+        self.assertEqual(facets["prescription_required"], {"true": 1, "false": 2})
+
+    def test_facets_endpoint(self):
+        response = APIClient().get(f"/products/facets/?brand={self.square.pk}", secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total"], 1)
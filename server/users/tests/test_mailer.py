@@ -0,0 +1,66 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from users.mailer import BACKOFF_SECONDS, CLAIM_SECONDS, send_queued
+from users.models import OutboundEmail
+
+LOCMEM = "django.core.mail.backends.locmem.EmailBackend"
+FAILING = "users.tests.test_mailer.FailingBackend"
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError("smtp down")
+
+
+@override_settings(EMAIL_BACKEND=LOCMEM)
+class SendQueuedTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.email = OutboundEmail.enqueue("Order placed", "Thanks", ["patient@example.com"], "shop@example.com")
+        OutboundEmail.objects.filter(pk=self.email.pk).update(next_attempt_at=self.now)
+
+    def send(self, at, backend=None, **kwargs):
+        with mock.patch("users.mailer.timezone.now", return_value=at):
+            result = send_queued(backend=backend, **kwargs)
+        self.email.refresh_from_db()
+        return result
+
+    def test_sends_due_email_once(self):
+        self.assertEqual(self.send(self.now), (1, 0))
+        self.assertEqual((self.email.status, self.email.attempts, self.email.last_error), ("sent", 1, ""))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["patient@example.com"])
+
+        self.assertEqual(self.send(self.now + timedelta(days=1)), (0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failures_back_off_exponentially_then_give_up(self):
+        at = self.now
+        for attempt in (1, 2, 3):
+            self.assertEqual(self.send(at, FAILING, max_attempts=4), (0, 1))
+            self.assertEqual((self.email.status, self.email.attempts), ("pending", attempt))
+            self.assertEqual(self.email.last_error, "smtp down")
+            delay = timedelta(seconds=BACKOFF_SECONDS * 2 ** (attempt - 1))
+            self.assertEqual(self.email.next_attempt_at, at + delay)
+            # Not due before the backoff has passed
+            self.assertEqual(self.send(at + delay - timedelta(seconds=1), FAILING), (0, 0))
+            at += delay
+
+        self.assertEqual(self.send(at, FAILING, max_attempts=4), (0, 1))
+        self.assertEqual((self.email.status, self.email.attempts), ("failed", 4))
+        self.assertEqual(self.send(at + timedelta(days=1)), (0, 0))
+
+    def test_claim_of_a_crashed_worker_expires(self):
+        # A worker claimed the email and died before recording the outcome
+        OutboundEmail.objects.filter(pk=self.email.pk).update(
+            status="sending", next_attempt_at=self.now + timedelta(seconds=CLAIM_SECONDS)
+        )
+        self.assertEqual(self.send(self.now + timedelta(seconds=CLAIM_SECONDS - 1)), (0, 0))
+        self.assertEqual(self.send(self.now + timedelta(seconds=CLAIM_SECONDS)), (1, 0))
+        self.assertEqual(self.email.status, "sent")
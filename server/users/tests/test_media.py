@@ -0,0 +1,66 @@
+import os
+import tempfile
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+
+from users.media import IMAGE_VARIANTS, LocalMediaBackend, media_record
+
+
+def image_file(name, size, mode="RGB", fmt="JPEG"):
+    buffer = BytesIO()
+    Image.new(mode, size).save(buffer, format=fmt)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+class LocalMediaBackendTests(SimpleTestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.media_root = media_root.name
+        settings = override_settings(MEDIA_ROOT=self.media_root, MEDIA_URL="/media/")
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.backend = LocalMediaBackend()
+
+    def test_upload_records_the_original(self):
+        file = image_file("napa.jpg", (600, 300))
+        resource = self.backend.upload(file, {"folder": "products"})
+        record = media_record(resource, self.backend.url(resource))
+
+        self.assertEqual(
+            {key: record[key] for key in ("public_id", "format", "width", "height", "url")},
+            {
+                "public_id": "products/napa", "format": "jpg", "width": 600, "height": 300,
+                "url": "/media/products/napa.jpg",
+            },
+        )
+        self.assertEqual(record["bytes"], file.size)
+        self.assertTrue(os.path.isfile(os.path.join(self.media_root, "products", "napa.jpg")))
+
+    def test_variants_limit_width_and_never_upscale(self):
+        file = image_file("napa.jpg", (600, 300))
+        resource = self.backend.upload(file, {"folder": "products"})
+        variants = self.backend.variants(resource, file)
+
+        self.assertEqual(set(variants), set(IMAGE_VARIANTS))
+        self.assertEqual(
+            {name: sources["width"] for name, sources in variants.items()},
+            {"thumbnail": 150, "medium": 480, "large": 600},
+        )
+        self.assertEqual(variants["thumbnail"]["fallback"], "/media/products/napa_thumbnail.jpg")
+        path = os.path.join(self.media_root, "products", "napa_thumbnail.jpg")
+        with Image.open(path) as thumbnail:
+            self.assertEqual(thumbnail.size, (150, 75))
+
+    def test_transparent_images_fall_back_to_png(self):
+        file = image_file("logo.png", (200, 200), mode="RGBA", fmt="PNG")
+        resource = self.backend.upload(file, {"folder": "brands"})
+        variants = self.backend.variants(resource, file)
+        self.assertEqual(variants["thumbnail"]["fallback"], "/media/brands/logo_thumbnail.png")
+
+    def test_no_variants_without_the_original_file(self):
+        resource = self.backend.upload(image_file("napa.jpg", (10, 10)), {})
+        self.assertIsNone(self.backend.variants(resource))
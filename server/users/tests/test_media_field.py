@@ -0,0 +1,54 @@
+from unittest import mock
+
+from cloudinary import CloudinaryResource
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from users.media import media_url
+from users.models import Brand
+
+
+def uploaded_resource(file, **options):
+    return CloudinaryResource(
+        public_id=f"{options.get('folder', '')}/logo", version=7, format="png", type="upload",
+        resource_type="image", metadata={"bytes": 68, "width": 40, "height": 20},
+    )
+
+
+@override_settings(MEDIA_BACKEND="users.media.CloudinaryMediaBackend")
+@mock.patch("users.media._backend", None)
+@mock.patch("cloudinary.uploader.upload_resource", side_effect=uploaded_resource)
+class MediaFieldTests(TestCase):
+    def test_upload_metadata_is_stored_and_served(self, upload):
+        brand = Brand.objects.create(name="Square", image=SimpleUploadedFile("logo.png", b"png"))
+        self.assertEqual(upload.call_count, 1)
+        record = Brand.objects.get(pk=brand.pk).media["image"]
+        self.assertEqual(
+            {key: record[key] for key in ("public_id", "version", "format", "bytes", "width", "height")},
+            {"public_id": "brands/logo", "version": 7, "format": "png", "bytes": 68, "width": 40, "height": 20},
+        )
+        self.assertIn("brands/logo.png", record["url"])
+
+        brand = Brand.objects.get(pk=brand.pk)
+        with mock.patch.object(CloudinaryResource, "build_url") as build_url:
+            self.assertEqual(media_url(brand, "image"), record["url"])
+        build_url.assert_not_called()
+
+    def test_cleared_or_replaced_images_drop_the_record(self, upload):
+        brand = Brand.objects.create(name="Square", image=SimpleUploadedFile("logo.png", b"png"))
+        brand.image = "brands/other.png"  # a value set without an upload: the stored record no longer applies
+        brand.save()
+        brand = Brand.objects.get(pk=brand.pk)
+        self.assertNotEqual(media_url(brand, "image"), brand.media["image"]["url"])
+        self.assertIn("brands/other", media_url(brand, "image"))
+
+        brand.image = None
+        brand.save()
+        self.assertEqual(Brand.objects.get(pk=brand.pk).media, {})
+        self.assertIsNone(media_url(brand, "image"))
+
+    def test_legacy_rows_build_the_url(self, upload):
+        brand = Brand.objects.create(name="Square", image="brands/legacy.jpg")
+        upload.assert_not_called()
+        self.assertEqual(brand.media, {})
+        self.assertIn("brands/legacy", media_url(Brand.objects.get(pk=brand.pk), "image"))
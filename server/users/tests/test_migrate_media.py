@@ -0,0 +1,107 @@
+import io
+import os
+import posixpath
+import tempfile
+
+from cloudinary import CloudinaryResource
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from users.models import Brand, Product
+
+from .factories import make_catalogue
+
+UPLOADER = "users.tests.test_migrate_media.RecordingUploader"
+
+
+class RecordingUploader:
+    """Media backend stand-in that records uploads instead of sending them."""
+    uploads = []
+    fail_content = None
+
+    def upload(self, file, options):
+        if file.read() == RecordingUploader.fail_content:
+            raise ConnectionError("upload failed")
+        RecordingUploader.uploads.append(options["public_id"])
+        return CloudinaryResource(
+            public_id=posixpath.join(options.get("folder", ""), options["public_id"]),
+            format="jpg", version=1, type="upload", resource_type="image", metadata={"bytes": file.size},
+        )
+
+    def url(self, resource):
+        return f"https://cdn.test/{resource.public_id}.{resource.format}"
+
+    def variants(self, resource, file=None):
+        return None
+
+
+class MigrateMediaTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.media_root = media_root.name
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        RecordingUploader.uploads = []
+        RecordingUploader.fail_content = None
+
+        _, self.brand, self.napa, self.ace = make_catalogue()
+        # napa and ace share one file content, the brand logo differs
+        self.write("products/napa.jpg", b"same")
+        self.write("products/ace.jpg", b"same")
+        self.write("brands/logo.jpg", b"logo")
+        Product.objects.filter(pk=self.napa.pk).update(image1="products/napa.jpg")
+        Product.objects.filter(pk=self.ace.pk).update(image1="products/ace.jpg", image2="products/missing.jpg")
+        Brand.objects.filter(pk=self.brand.pk).update(image="brands/logo.jpg")
+        self.checkpoint = os.path.join(self.media_root, "checkpoint.json")
+
+    def write(self, name, content):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content)
+
+    def migrate(self, *args):
+        out = io.StringIO()
+        call_command(
+            "migrate_media_to_cloudinary", "--uploader", UPLOADER, "--checkpoint", self.checkpoint,
+            "--workers", "2", *args, stdout=out, stderr=io.StringIO(),
+        )
+        return out.getvalue()
+
+    def test_identical_files_are_uploaded_once(self):
+        output = self.migrate()
+        self.assertIn("3 images in 3 files, 2 unique contents", output)
+        self.assertIn("1 images have no local file", output)
+        self.assertEqual(len(RecordingUploader.uploads), 2)
+
+        napa, ace = Product.objects.get(pk=self.napa.pk), Product.objects.get(pk=self.ace.pk)
+        self.assertEqual(napa.image1.public_id, ace.image1.public_id)
+        self.assertEqual(napa.media["image1"]["url"], f"https://cdn.test/{napa.image1.public_id}.jpg")
+        self.assertEqual(Brand.objects.get(pk=self.brand.pk).media["image"]["bytes"], 4)
+        self.assertFalse(os.path.exists(self.checkpoint))  # removed after a clean run
+
+        self.assertIn("No local media files to migrate.", self.migrate())
+        self.assertEqual(len(RecordingUploader.uploads), 2)
+
+    def test_dry_run_writes_nothing(self):
+        output = self.migrate("--dry-run")
+        self.assertIn("Dry run finished", output)
+        self.assertEqual(str(Product.objects.get(pk=self.napa.pk).image1.public_id), "products/napa")
+        self.assertEqual(Product.objects.get(pk=self.napa.pk).media, {})
+
+    def test_rerun_after_a_failure_reuses_checkpointed_uploads(self):
+        RecordingUploader.fail_content = b"logo"
+        output = self.migrate()
+        self.assertIn("1 uploads failed; rerun to retry them", output)
+        self.assertTrue(os.path.exists(self.checkpoint))
+        self.assertEqual(str(Brand.objects.get(pk=self.brand.pk).image.public_id), "brands/logo")
+
+        # A product row was restored from a backup: its upload comes from the checkpoint
+        Product.objects.filter(pk=self.napa.pk).update(image1="products/napa.jpg", media={})
+        RecordingUploader.fail_content = None
+        output = self.migrate()
+        self.assertIn("1 uploaded, 1 from checkpoint, 0 failed", output)
+        self.assertEqual(len(RecordingUploader.uploads), 2)
+        self.assertTrue(Product.objects.get(pk=self.napa.pk).media["image1"]["url"].startswith("https://cdn.test/"))
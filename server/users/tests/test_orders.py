@@ -0,0 +1,53 @@
+from django.test import TestCase
+
+from users.models import OrderItem
+from users.serializers import OrderSerializer
+
+from .factories import make_catalogue, make_user
+
+
+class OrderSerializerTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        _, _, self.napa, self.ace = make_catalogue()
+
+    def serializer(self, items):
+        serializer = OrderSerializer(data={
+            "user": self.user.pk, "payment_method": "cod", "name": "Patient", "email": self.user.email, "phone": "01700000000",
+            "city": "Dhaka", "postal_code": "1200", "address": "Road 1",
+            "total_price": "40.00", "total_new_price": "40.00", "total_discount": "0.00", "total_amount": "40.00",
+            "items": items,
+        })
+        serializer.is_valid(raise_exception=True)
+        return serializer
+
+    def create_order(self, items):
+        return self.serializer(items).save()
+
+    def test_creates_items_with_product_price_snapshots(self):
+        serializer = self.serializer([
+            {"product_id": self.napa.pk, "product_name": "Napa", "quantity": 2, "price": "1.00", "subtotal": "20.00"},
+            {"product_id": self.ace.pk, "product_name": "Ace", "quantity": 1, "price": "1.00", "subtotal": "20.00"},
+        ])
+        with self.assertNumQueries(5):  # products, order, items (+ savepoint and release)
+            order = serializer.save()
+        self.assertEqual(
+            sorted(OrderItem.objects.filter(order=order).values_list("product_name", "quantity", "price", "actual_price")),
+            [("Ace", 1, 20, 15), ("Napa", 2, 10, 6)],
+        )
+
+    def test_items_served_from_memory_still_behave_like_a_queryset(self):
+        order = self.create_order([
+            {"product_id": self.napa.pk, "product_name": "Napa", "quantity": 2, "price": "10.00", "subtotal": "20.00"},
+            {"product_id": self.ace.pk, "product_name": "Ace", "quantity": 1, "price": "20.00", "subtotal": "20.00"},
+        ])
+        with self.assertNumQueries(0):
+            self.assertEqual(order.items.count(), 2)
+            self.assertEqual({item.product_name for item in order.items.all()}, {"Napa", "Ace"})
+        self.assertEqual(list(order.items.filter(quantity=2).values_list("product_name", flat=True)), ["Napa"])
+        self.assertTrue(order.items.filter(product=self.ace).exists())
+        self.assertEqual(len(OrderSerializer(order).data["items"]), 2)
+
+    def test_unknown_product_is_rejected(self):
+        with self.assertRaisesMessage(Exception, "Product(s) not found: 999"):
+            self.create_order([{"product_id": 999, "product_name": "Gone", "quantity": 1, "price": "1", "subtotal": "1"}])
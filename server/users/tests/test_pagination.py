@@ -0,0 +1,63 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from users.models import Product
+
+from .factories import make_catalogue, make_order, make_user
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category, self.brand, self.napa, self.ace = make_catalogue()
+        Product.objects.bulk_create(
+            Product(sku=f"ZINC-{n}", name=f"Zinc {n:02}", slug=f"zinc-{n}", category=self.category,
+                    price=Decimal("5.00"), image1="products/zinc")
+            for n in range(1, 6)
+        )
+        self.client = APIClient()
+
+    def collect(self, url):
+        """Follow `next` links; return (results of every page, count of the first page)."""
+        response = self.client.get(url, secure=True)
+        count, results = response.data.get("count"), []
+        while True:
+            results += response.data["results"]
+            if not response.data["next"]:
+                return results, count
+            response = self.client.get(response.data["next"], secure=True)
+
+    def test_products_are_paged_by_name(self):
+        results, count = self.collect("/products/?page_size=3&fields=name")
+        self.assertEqual(count, 7)
+        self.assertEqual(
+            [product["name"] for product in results],
+            ["Ace", "Napa", "Zinc 01", "Zinc 02", "Zinc 03", "Zinc 04", "Zinc 05"],
+        )
+
+    def test_count_can_be_skipped(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/products/?page_size=2&fields=name&count=false", secure=True)
+        self.assertNotIn("count", response.data)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_customers_page_through_their_own_orders(self):
+        customer, other = make_user(), make_user("other@example.com")
+        orders = [make_order(customer, [(self.napa, 1)]) for _ in range(3)]
+        make_order(other, [(self.ace, 1)])
+
+        self.client.force_authenticate(customer)
+        results, count = self.collect("/orders/?page_size=2")
+        self.assertEqual(count, 3)
+        self.assertEqual([order["id"] for order in results], [order.pk for order in reversed(orders)])
+
+    def test_users_are_listed_newest_first(self):
+        admin = make_user("admin@example.com", is_staff=True)
+        make_user("late@example.com")
+        self.client.force_authenticate(admin)
+        results, count = self.collect("/users/?page_size=1")
+        self.assertEqual(count, 2)
+        self.assertEqual([user["email"] for user in results], ["late@example.com", "admin@example.com"])
@@ -0,0 +1,95 @@
+from unittest import mock
+
+import requests
+from django.test import TestCase
+
+from users.models import MonthlyReport, OutboundEmail, PaymentEvent
+from users.payments import FakeGateway, SSLCommerzGateway, get_http_session, process_payment_event
+
+from .factories import make_catalogue, make_order, make_user
+
+
+class PaymentEventTests(TestCase):
+    def setUp(self):
+        _, _, napa, _ = make_catalogue()
+        self.order = make_order(make_user(), [(napa, 2)], tran_id="TRAN-1")
+
+    def assert_paid_once(self):
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, "paid")
+        self.assertEqual(MonthlyReport.objects.get().total_orders, 1)
+
+    def test_duplicate_success_is_applied_once(self):
+        order, transitioned = process_payment_event("TRAN-1", "success", {"val_id": "1"})
+        self.assertEqual((order.pk, transitioned), (self.order.pk, True))
+
+        order, transitioned = process_payment_event("TRAN-1", "success", {"val_id": "1"})
+        self.assertEqual((order.pk, transitioned), (self.order.pk, False))
+        self.assertEqual(PaymentEvent.objects.filter(tran_id="TRAN-1").count(), 1)
+        self.assert_paid_once()
+
+    def test_late_fail_or_cancel_does_not_undo_a_success(self):
+        process_payment_event("TRAN-1", "success", {})
+        self.assertEqual(process_payment_event("TRAN-1", "fail", {})[1], False)
+        self.assertEqual(process_payment_event("TRAN-1", "cancel", {})[1], False)
+
+        self.assert_paid_once()
+        self.assertEqual(
+            dict(PaymentEvent.objects.values_list("event", "transitioned")),
+            {"success": True, "fail": False, "cancel": False},
+        )
+
+    def test_success_after_fail_marks_the_order_paid(self):
+        self.assertEqual(process_payment_event("TRAN-1", "fail", {})[1], True)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, "failed")
+        self.assertFalse(MonthlyReport.objects.exists())
+
+        self.assertEqual(process_payment_event("TRAN-1", "success", {})[1], True)
+        self.assert_paid_once()
+
+    def test_failed_retry_is_a_new_event(self):
+        self.assertEqual(process_payment_event("TRAN-1", "fail", {"sessionkey": "S1"})[1], True)
+        self.assertEqual(process_payment_event("TRAN-1", "fail", {"sessionkey": "S1"})[1], False)  # re-delivery
+        self.assertEqual(process_payment_event("TRAN-1", "fail", {"sessionkey": "S2"})[1], True)
+        self.assertEqual(
+            list(PaymentEvent.objects.order_by("id").values_list("callback_id", "transitioned")),
+            [("S1", True), ("S2", True)],
+        )
+
+        self.assertEqual(process_payment_event("TRAN-1", "success", {"val_id": "V3"})[1], True)
+        self.assertEqual(process_payment_event("TRAN-1", "success", {"val_id": "V4"})[1], False)
+        self.assert_paid_once()
+
+    def test_fail_callback_emails_each_attempt(self):
+        for sessionkey in ("S1", "S1", "S2"):
+            response = self.client.post("/payment/fail/", {"tran_id": "TRAN-1", "sessionkey": sessionkey}, secure=True)
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(OutboundEmail.objects.filter(subject__startswith="Payment Failed").count(), 2)
+
+    def test_unknown_tran_id_is_not_recorded(self):
+        self.assertEqual(process_payment_event("UNKNOWN", "success", {}), (None, False))
+        self.assertFalse(PaymentEvent.objects.exists())
+
+
+class FakeGatewayTests(TestCase):
+    def test_session_redirects_to_success_url(self):
+        gateway = FakeGateway({})
+        response = gateway.createSession({"tran_id": "TRAN-1", "success_url": "https://shop.test/success/"})
+        self.assertEqual(response["status"], "SUCCESS")
+        self.assertEqual(response["GatewayPageURL"], "https://shop.test/success/?tran_id=TRAN-1")
+        self.assertEqual(gateway.sessions["TRAN-1"]["sessionkey"], response["sessionkey"])
+
+
+class SSLCommerzGatewayTests(TestCase):
+    def setUp(self):
+        self.gateway = SSLCommerzGateway({"store_id": "store", "store_pass": "pass", "issandbox": True})
+
+    def test_connections_come_from_one_pooled_session(self):
+        self.assertIs(get_http_session(), get_http_session())
+
+    def test_network_errors_look_like_gateway_failures(self):
+        with mock.patch.object(get_http_session(), "post", side_effect=requests.Timeout("read timed out")) as post:
+            response = self.gateway.call_api("POST", "https://sandbox.test/session", {"tran_id": "TRAN-1"})
+        self.assertEqual(response, {"status": "FAILED", "failedreason": "Payment gateway error: read timed out"})
+        self.assertEqual(post.call_args.kwargs["timeout"], (5, 20))
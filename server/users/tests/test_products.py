@@ -0,0 +1,38 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from users.serializers import PRODUCT_LIST_FIELDS
+
+from .factories import make_catalogue
+
+
+class ProductFieldsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category, self.brand, self.napa, self.ace = make_catalogue()
+        self.client = APIClient()
+
+    def get(self, url):
+        response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_sparse_fieldset(self):
+        product = self.get(f"/products/{self.napa.pk}/?fields=name,price,brand")
+        self.assertEqual(set(product), {"name", "price", "brand"})
+        self.assertEqual(product["name"], "Napa")
+
+    def test_list_view_returns_card_fields(self):
+        results = self.get("/products/?view=list")["results"]
+        self.assertEqual(set(results[0]), set(PRODUCT_LIST_FIELDS))
+
+    def test_list_query_count_does_not_grow_with_rows(self):
+        with self.assertNumQueries(2):  # count + page, brand and category joined
+            self.get("/products/?count=true")
+        cache.clear()
+        for n in range(5):
+            self.napa.pk, self.napa.sku, self.napa.slug = None, f"NAPA-{n}", f"napa-{n}"
+            self.napa.save()
+        with self.assertNumQueries(2):
+            self.assertEqual(self.get("/products/")["count"], 7)
@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from users.models import ProductDailySales
+
+from .factories import make_catalogue, make_user
+
+
+class OrdersReportItemsTests(TestCase):
+    def setUp(self):
+        _, _, self.napa, self.ace = make_catalogue()
+        ProductDailySales.objects.bulk_create([
+            ProductDailySales(date=date(2026, 1, day), product=product, product_name=product.name, quantity=quantity,
+                              income=Decimal(quantity * 10), cost=Decimal(quantity * 6), profit=Decimal(quantity * 4))
+            for day, product, quantity in (
+                (1, self.napa, 3), (1, self.ace, 1), (2, self.napa, 0), (3, self.napa, 2), (5, self.ace, 4),
+            )
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(make_user(is_staff=True))
+
+    def get(self, **params):
+        return self.client.get("/orders-report-items/", params, secure=True)
+
+    def test_rows_join_current_stock_and_skip_empty_days(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row["date"], row["product"], row["quantity_sold"]) for row in response.data["results"]],
+            [("2026-01-01", "Napa", 3), ("2026-01-01", "Ace", 1), ("2026-01-03", "Napa", 2), ("2026-01-05", "Ace", 4)],
+        )
+        self.assertEqual(
+            response.data["results"][0],
+            {"date": "2026-01-01", "product": "Napa", "quantity_sold": 3, "income": 30.0,
+             "actual_cost": 18.0, "profit": 12.0, "stock_remaining": 100},
+        )
+
+    def test_filters(self):
+        response = self.get(start_date="2026-01-02", end_date="2026-01-05", product=self.napa.pk)
+        self.assertEqual([row["date"] for row in response.data["results"]], ["2026-01-03"])
+        self.assertEqual(self.get(start_date="01/02/2026").status_code, 400)
+        self.assertEqual(self.get(product="napa").status_code, 400)
+
+    def test_cursor_pages_cover_every_row_once(self):
+        seen, params = [], {"page_size": 3}
+        response = self.get(**params)
+        while True:
+            seen += [(row["date"], row["product"]) for row in response.data["results"]]
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"], secure=True)
+        self.assertEqual(len(seen), 4)
+        self.assertEqual(len(set(seen)), 4)
+
+    def test_streaming_exports(self):
+        response = self.get(export="csv", product=self.ace.pk)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="orders_report.csv"')
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:3], ["date", "product", "quantity_sold"])
+        self.assertEqual([row[:3] for row in rows[1:]], [["2026-01-01", "Ace", "1"], ["2026-01-05", "Ace", "4"]])
+
+        response = self.get(export="json", start_date="2026-01-03")
+        data = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([(row["date"], row["product"]) for row in data], [("2026-01-03", "Napa"), ("2026-01-05", "Ace")])
+
+    def test_admin_only(self):
+        self.client.force_authenticate(make_user("customer@example.com"))
+        self.assertEqual(self.get().status_code, 403)
@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from users.models import MonthlyReport, ProductDailySales, YearlyReport
+from users.reports import rebuild_reports
+
+from .factories import make_catalogue, make_order, make_user
+
+
+class ReportDeltaTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        _, _, self.napa, self.ace = make_catalogue()
+        self.order = make_order(self.user, [(self.napa, 3), (self.ace, 1)])
+        self.day = timezone.localdate(self.order.created_at)
+
+    def set_payment_status(self, status):
+        self.order.payment_status = status
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.save()
+
+    def report_values(self):
+        monthly = MonthlyReport.objects.get(month=self.day.replace(day=1))
+        yearly = YearlyReport.objects.get(year=self.day.year)
+        sales = dict(ProductDailySales.objects.filter(date=self.day).values_list("product_name", "quantity"))
+        return {
+            "monthly": (monthly.total_income, monthly.total_profit, monthly.total_orders, monthly.total_products_sold),
+            "yearly": (yearly.total_income, yearly.total_profit, yearly.total_orders, yearly.total_products_sold),
+            "top_product": monthly.top_product,
+            "details": monthly.products_details,
+            "sales": sales,
+        }
+
+    def test_paid_transition_is_applied_once(self):
+        self.assertFalse(MonthlyReport.objects.exists())  # pending orders are not counted
+
+        self.set_payment_status("paid")
+        self.order.status = "processing"
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.order.save()  # still paid: no second delta
+        self.assertEqual(callbacks, [])
+
+        values = self.report_values()
+        self.assertEqual(values["monthly"], (Decimal("50.00"), Decimal("17.00"), 1, 4))
+        self.assertEqual(values["yearly"], values["monthly"])
+        self.assertEqual(values["top_product"], "Napa")
+        self.assertEqual(values["sales"], {"Napa": 3, "Ace": 1})
+        self.assertEqual(
+            values["details"][0],
+            {"product": "Napa", "quantity": 3, "income": 30.0, "actual": 18.0, "profit": 12.0},
+        )
+
+    def test_unpaying_reverses_the_delta(self):
+        self.set_payment_status("paid")
+        self.set_payment_status("refunded")
+
+        values = self.report_values()
+        self.assertEqual(values["monthly"], (Decimal("0.00"), Decimal("0.00"), 0, 0))
+        self.assertEqual(values["yearly"], values["monthly"])
+        self.assertIsNone(values["top_product"])
+        self.assertEqual(values["details"], [])
+        self.assertEqual(values["sales"], {"Napa": 0, "Ace": 0})
+
+    def test_deltas_match_a_full_rebuild(self):
+        other = make_order(self.user, [(self.ace, 2)])
+        self.set_payment_status("paid")
+        other.payment_status = "paid"
+        with self.captureOnCommitCallbacks(execute=True):
+            other.save()
+        self.set_payment_status("failed")
+        incremental = self.report_values()
+
+        rebuild_reports()
+        rebuilt = self.report_values()
+        self.assertEqual(rebuilt["monthly"], incremental["monthly"])
+        self.assertEqual(rebuilt["yearly"], incremental["yearly"])
+        self.assertEqual(rebuilt["details"], incremental["details"])
+        self.assertEqual(rebuilt["monthly"], (Decimal("40.00"), Decimal("10.00"), 1, 2))
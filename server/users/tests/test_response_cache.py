@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from users.response_cache import check_response_cache
+
+from .factories import make_catalogue
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category, self.brand, self.napa, self.ace = make_catalogue()
+        self.client = APIClient()
+
+    def get(self, url):
+        response = self.client.get(url, secure=True)
+        return response["X-Cache"], response.data
+
+    def save(self, obj, **values):
+        for name, value in values.items():
+            setattr(obj, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            obj.save()
+
+    def test_repeated_reads_are_served_from_cache(self):
+        self.assertEqual(self.get("/products/?fields=name")[0], "MISS")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get("/products/?fields=name")[0], "HIT")
+        self.assertEqual(self.get("/products/?fields=name,price")[0], "MISS")  # query params are part of the key
+
+    def test_product_change_drops_lists_and_its_own_detail(self):
+        self.get("/products/")
+        self.get(f"/products/{self.napa.pk}/")
+        self.get(f"/products/{self.ace.pk}/")
+
+        self.save(self.napa, price=12)
+        state, data = self.get(f"/products/{self.napa.pk}/")
+        self.assertEqual((state, data["price"]), ("MISS", "12.00"))
+        self.assertEqual(self.get("/products/")[0], "MISS")
+        self.assertEqual(self.get(f"/products/{self.ace.pk}/")[0], "HIT")
+
+    def test_brand_rename_drops_every_product_response(self):
+        self.get(f"/products/{self.ace.pk}/")
+        self.save(self.brand, name="Beximco Pharma")
+        self.assertEqual(self.get(f"/products/{self.ace.pk}/")[0], "MISS")
+
+    def test_invalidation_waits_for_commit(self):
+        self.get("/products/")
+        self.napa.price = 12
+        self.napa.save()  # not committed yet: the cached list is still served
+        self.assertEqual(self.get("/products/")[0], "HIT")
+
+    def test_evicted_version_never_serves_an_old_entry(self):
+        self.get("/products/")
+        cache.delete_many(["cache-version:products:all", "cache-version:products:list"])
+        self.assertEqual(self.get("/products/")[0], "MISS")
+        self.assertEqual(self.get("/products/")[0], "HIT")
+
+
+class ResponseCacheCheckTests(TestCase):
+    def test_process_local_backend_is_flagged(self):
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        redis = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://"}}
+        with override_settings(CACHES=locmem):
+            self.assertEqual([warning.id for warning in check_response_cache(None)], ["users.W001"])
+        with override_settings(CACHES=redis):
+            self.assertEqual(check_response_cache(None), [])
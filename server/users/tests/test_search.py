@@ -0,0 +1,50 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from users.models import Brand, Product
+from users.search import search_products
+
+from .factories import make_catalogue
+
+
+class SearchFallbackTests(TestCase):
+    def setUp(self):
+        self.category, self.brand, self.napa, self.ace = make_catalogue()
+        self.napa_extra = Product.objects.create(
+            sku="NAPA-EXTRA", name="Napa Extra", generic_name="Paracetamol + Caffeine",
+            category=self.category, price=Decimal("15.00"), image1="products/napa-extra",
+        )
+
+    def search(self, text):
+        return list(search_products(Product.objects.all(), text).values_list("name", flat=True))
+
+    def test_name_matches_rank_before_generic_matches(self):
+        self.assertEqual(self.search("napa"), ["Napa", "Napa Extra"])
+        self.assertEqual(self.search("paracetamol"), ["Ace", "Napa", "Napa Extra"])
+        self.assertEqual(self.search("caffeine"), ["Napa Extra"])
+
+    def test_every_term_must_match_and_last_is_a_prefix(self):
+        self.assertEqual(self.search("napa ext"), ["Napa Extra"])
+        self.assertEqual(self.search("PARACETAMOL, beximco!"), ["Ace", "Napa"])
+        self.assertEqual(self.search("napa zinc"), [])
+        self.assertEqual(self.search(" & | "), [])
+
+    def test_search_text_follows_source_fields(self):
+        square = Brand.objects.create(name="Square")
+        self.napa.brand = square
+        self.napa.save(update_fields=["brand"])
+        self.assertEqual(self.search("square"), ["Napa"])
+
+        self.napa.sku = "NAPA-1000"
+        self.napa.save()
+        self.assertEqual(self.search("napa-1000"), ["Napa"])
+
+        square.name = "Square Pharma"
+        square.save()
+        self.assertEqual(self.search("pharma"), ["Napa"])
+        self.assertEqual(self.search("beximco"), ["Ace"])
+
+        self.ace.brand_id = square.pk
+        self.ace.save(update_fields=["brand_id"])
+        self.assertEqual(self.search("pharma"), ["Ace", "Napa"])
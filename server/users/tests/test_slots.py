@@ -0,0 +1,71 @@
+from datetime import date, timedelta
+
+from django.test import SimpleTestCase, TestCase
+
+from users.helpers import booked_slots_index, get_available_time_slots, week_availability
+from users.models import Appointment, Doctor
+from users.slots import available_slots, build_slot_template, format_slot, parse_minutes, slot_offsets
+
+from .factories import make_user
+
+MONDAY = date(2026, 10, 19)
+
+
+class DoctorSlotTests(TestCase):
+    def setUp(self):
+        self.doctor = Doctor.objects.create(
+            full_name="Dr. Rahman", specialization="Medicine", max_patients_per_day=5,
+            available_days=["Monday", "Wednesday"], available_time=["10:00-11:00"],
+        )
+        patient = make_user()
+        # bulk_create: Appointment.save only accepts dates of the current week
+        Appointment.objects.bulk_create(
+            Appointment(patient=patient, doctor=self.doctor, date=MONDAY, time_slot=time_slot, status=status)
+            for time_slot, status in (("10:12", "pending"), ("10:24", "cancelled"), ("10:36", "confirmed"))
+        )
+
+    def week(self, doctor):
+        days = [MONDAY + timedelta(days=n) for n in range(7)]
+        return week_availability(doctor, days, booked_slots_index([doctor.pk], days[0], days[-1]))
+
+    def test_template_is_precompiled_on_save(self):
+        self.assertEqual(self.doctor.slot_template, ["10:00", "10:12", "10:24", "10:36", "10:48"])
+        self.assertEqual(
+            build_slot_template(["10:00-10:30", "15:00-15:30"], 4), ["10:00", "10:15", "15:00", "15:15"]
+        )
+        self.doctor.max_patients_per_day = 10
+        self.doctor.save(update_fields=["max_patients_per_day"])
+        self.doctor.refresh_from_db()
+        self.assertEqual(self.doctor.slot_template, ["10:00", "10:10", "10:20", "10:30", "10:40", "10:50"])
+
+    def test_active_bookings_are_excluded(self):
+        self.assertEqual(get_available_time_slots(self.doctor, MONDAY), ["10:00", "10:24", "10:48"])
+
+    def test_week_view_matches_the_single_day_helper(self):
+        week = self.week(self.doctor)
+        self.assertEqual(list(week), [str(MONDAY), str(MONDAY + timedelta(days=2))])
+        self.assertEqual(week[str(MONDAY)], get_available_time_slots(self.doctor, MONDAY))
+
+    def test_empty_template_falls_back_to_available_time(self):
+        Doctor.objects.filter(pk=self.doctor.pk).update(slot_template=[])
+        doctor = Doctor.objects.get(pk=self.doctor.pk)
+        self.assertEqual(get_available_time_slots(doctor, MONDAY), ["10:00", "10:24", "10:48"])
+        self.assertEqual(self.week(doctor), self.week(self.doctor))
+
+
+class SlotHelperTests(SimpleTestCase):
+    def test_minutes_round_trip(self):
+        self.assertEqual(parse_minutes("09:05"), 545)
+        self.assertEqual(format_slot(545), "09:05")
+
+    def test_interval_is_shared_across_ranges_and_at_least_ten_minutes(self):
+        # 60 + 30 minutes for 3 patients: one slot every 30 minutes
+        self.assertEqual(slot_offsets(["10:00-11:00", "15:00-15:30"], 3), [600, 630, 900])
+        self.assertEqual(slot_offsets(["10:00-10:30"], 100), [600, 610, 620])
+        self.assertEqual(slot_offsets([], 5), [])
+        self.assertEqual(slot_offsets(["10:00-11:00"], 0), [])
+
+    def test_available_slots_skip_booked_and_stop_at_the_daily_limit(self):
+        template = ["10:00", "10:10", "10:20", "10:30"]
+        self.assertEqual(available_slots(template, ["10:10"], 2), ["10:00", "10:20"])
+        self.assertEqual(available_slots(template, frozenset(template), 2), [])
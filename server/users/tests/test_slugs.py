@@ -0,0 +1,41 @@
+from django.test import TestCase
+
+from users.models import Brand, Product
+from users.slugs import SlugAllocator, unique_slug
+
+from .factories import make_catalogue
+
+
+class SlugAllocatorTests(TestCase):
+    def setUp(self):
+        self.category, self.brand, self.napa, self.ace = make_catalogue()
+
+    def test_batch_never_repeats_a_slug(self):
+        allocator = SlugAllocator(Product)
+        self.assertEqual(
+            allocator.allocate_many(["Napa", "Napa", "Napa 2", "Ace", "Zinc", "Zinc", "!!!"]),
+            ["napa-2", "napa-3", "napa-2-2", "ace-2", "zinc", "zinc-2", "product"],
+        )
+        # Slugs handed out earlier stay reserved for the rest of the import
+        self.assertEqual(allocator.allocate_many(["Zinc", "Napa"]), ["zinc-3", "napa-4"])
+
+    def test_only_numbered_variants_of_the_base_collide(self):
+        Product.objects.filter(pk=self.ace.pk).update(slug="napa-extra")
+        Product.objects.create(
+            sku="NAPA-7", name="Napa 7", category=self.category, price=10, image1="products/napa-7", slug="napa-7",
+        )
+        self.assertEqual(SlugAllocator(Product).allocate_many(["Napa"] * 3), ["napa-2", "napa-3", "napa-4"])
+
+    def test_one_query_per_batch(self):
+        allocator = SlugAllocator(Product)
+        with self.assertNumQueries(1):
+            allocator.allocate_many(["Napa", "Ace", "Zinc"] * 50)
+        with self.assertNumQueries(0):
+            allocator.allocate_many(["Napa", "Ace"])
+
+    def test_long_names_fit_the_field(self):
+        slug = unique_slug(Brand, "Beximco " * 20)
+        self.assertLessEqual(len(slug), Brand._meta.get_field("slug").max_length)
+        brand = Brand.objects.create(name="Beximco Pharmaceuticals " * 3)
+        other = Brand.objects.create(name="Beximco Pharmaceuticals " * 3 + "Ltd")
+        self.assertEqual(other.slug, f"{brand.slug}-2")
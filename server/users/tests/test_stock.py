@@ -0,0 +1,41 @@
+from django.test import TestCase
+
+from users.models import Product
+from users.stock import InsufficientStock, order_quantities, reserve_stock
+
+from .factories import make_catalogue
+
+
+class ReserveStockTests(TestCase):
+    def setUp(self):
+        _, _, self.napa, self.ace = make_catalogue()
+
+    def stock(self, product):
+        return Product.objects.values_list("stock", flat=True).get(pk=product.pk)
+
+    def test_quantities_of_repeated_products_are_summed(self):
+        items = [
+            {"product_id": str(self.napa.pk), "quantity": "2"},
+            {"product_id": self.ace.pk, "quantity": 1},
+            {"product_id": self.napa.pk, "quantity": 3},
+        ]
+        self.assertEqual(order_quantities(items), {self.napa.pk: 5, self.ace.pk: 1})
+
+    def test_reserves_all_products(self):
+        reserve_stock({self.napa.pk: 5, self.ace.pk: 100})
+        self.assertEqual((self.stock(self.napa), self.stock(self.ace)), (95, 0))
+
+    def test_insufficient_stock_rolls_back_every_product(self):
+        with self.assertRaises(InsufficientStock) as raised:
+            reserve_stock({self.napa.pk: 5, self.ace.pk: 101})
+        self.assertEqual((raised.exception.product_id, raised.exception.requested), (self.ace.pk, 101))
+        self.assertEqual((self.stock(self.napa), self.stock(self.ace)), (100, 100))
+
+    def test_racing_checkouts_cannot_oversell(self):
+        # Both checkouts saw stock 100; the check runs in the UPDATE, not on the stale read
+        self.assertEqual(self.napa.stock, 100)
+        reserve_stock({self.napa.pk: 60})
+        with self.assertRaises(InsufficientStock):
+            reserve_stock({self.napa.pk: 60})
+        reserve_stock({self.napa.pk: 40})
+        self.assertEqual(self.stock(self.napa), 0)
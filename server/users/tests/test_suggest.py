@@ -0,0 +1,53 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.test import TestCase
+
+from users.models import Brand, Product
+from users.suggest import rebuild_suggest_index, suggest_index
+
+from .factories import make_catalogue
+
+
+class SuggestIndexTests(TestCase):
+    def setUp(self):
+        self.category, self.brand, self.napa, self.ace = make_catalogue()
+        rebuild_suggest_index()
+        self.addCleanup(rebuild_suggest_index)
+
+    def suggest(self, prefix):
+        return [(item["type"], item["text"]) for item in suggest_index.lookup(prefix)]
+
+    def test_labels_are_prefix_matched_and_shared(self):
+        self.assertEqual(self.suggest("para"), [("generic", "Paracetamol")])
+        self.assertEqual(self.suggest("  BEX"), [("brand", "Beximco")])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.napa.delete()
+        self.assertEqual(self.suggest("napa"), [])
+        self.assertEqual(self.suggest("para"), [("generic", "Paracetamol")])  # Ace still has it
+
+    def test_committed_changes_update_the_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(
+                sku="ZINC-20", name="Zinc", category=self.category, price=Decimal("5.00"), image1="products/zinc",
+            )
+            self.ace.is_active = False
+            self.ace.save()
+            Brand.objects.create(name="Square")
+        self.assertEqual(self.suggest("zi"), [("product", "Zinc")])
+        self.assertEqual(self.suggest("ace"), [])
+        self.assertEqual(self.suggest("sq"), [("brand", "Square")])
+
+    def test_rolled_back_changes_never_reach_the_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Product.objects.create(
+                    sku="ZINC-20", name="Zinc", category=self.category, price=Decimal("5.00"), image1="products/zinc",
+                )
+                self.napa.name = "Napa Extend"
+                self.napa.save()
+                self.ace.delete()
+                transaction.set_rollback(True)
+        self.assertEqual(self.suggest("zi"), [])
+        self.assertEqual(self.suggest("napa"), [("product", "Napa")])
+        self.assertEqual(self.suggest("ace"), [("product", "Ace")])
@@ -0,0 +1,42 @@
+from django.test import TestCase
+
+from users.models import Brand, Order, Product
+
+from .factories import make_catalogue, make_order, make_user
+
+
+class TrackedFieldsTests(TestCase):
+    def setUp(self):
+        _, _, napa, _ = make_catalogue()
+        self.napa = Product.objects.get(pk=napa.pk)
+        self.order = Order.objects.get(pk=make_order(make_user(), [(napa, 1)]).pk)
+
+    def test_changes_are_detected_from_the_loaded_snapshot(self):
+        self.assertEqual(self.order.changed_fields, set())
+        self.order.status = "processing"
+        self.assertTrue(self.order.has_changed("status"))
+        self.assertFalse(self.order.has_changed("payment_status"))
+        self.assertEqual(self.order.changed_fields, {"status"})
+        self.assertEqual(self.order.previous("status"), "pending")
+
+    def test_save_refreshes_the_snapshot_without_reading_the_row(self):
+        self.order.status = "processing"
+        with self.assertNumQueries(1):  # the UPDATE only
+            self.order.save(update_fields=self.order.changed_fields)
+        self.assertEqual(self.order.previous("status"), "processing")
+        self.assertEqual(self.order.changed_fields, set())
+
+        self.order.payment_status = "paid"
+        self.order.status = "delivered"
+        self.order.save(update_fields=["status"])
+        self.assertEqual(self.order.changed_fields, {"payment_status"})  # not saved, still pending
+
+    def test_deferred_fields_are_not_reported_as_changed(self):
+        order = Order.objects.only("id", "status").get(pk=self.order.pk)
+        self.assertEqual(order.changed_fields, set())
+
+    def test_saving_a_relation_by_name_refreshes_its_id(self):
+        self.napa.brand = Brand.objects.create(name="Square")
+        self.napa.save(update_fields=["brand"])
+        self.assertEqual(self.napa.previous("brand_id"), self.napa.brand_id)
+        self.assertEqual(self.napa.changed_fields, set())
@@ -0,0 +1,55 @@
+# users/tracking.py
+from django.db import models
+
+
+class TrackedFieldsMixin(models.Model):
+    """
+    Remember the loaded values of `tracked_fields` (snapshot taken in from_db),
+    so change detection costs no queries.
+
+        order.previous("payment_status")    -> value when loaded / last saved
+        order.changed_fields                -> {"payment_status", ...}
+        order.save(update_fields=order.changed_fields)
+
+    The snapshot is refreshed after save(), i.e. after post_save handlers ran,
+    so signals still see the previous values.
+    """
+    tracked_fields = ()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values) if name in cls.tracked_fields
+        }
+        return instance
+
+    def previous(self, field_name):
+        """Value of a tracked field when loaded / last saved (None for new objects)."""
+        return getattr(self, "_loaded_values", {}).get(field_name)
+
+    def has_changed(self, field_name):
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None or field_name not in loaded:
+            return self._state.adding
+        return loaded[field_name] != getattr(self, field_name)
+
+    @property
+    def changed_fields(self):
+        """Tracked fields whose value differs from the snapshot."""
+        return {name for name in self.tracked_fields if self.has_changed(name)}
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            # update_fields may name a foreign key ("brand"); snapshots are keyed by attname ("brand_id")
+            update_fields = {self._meta.get_field(name).attname for name in update_fields}
+        loaded = getattr(self, "_loaded_values", {})
+        for name in self.tracked_fields:
+            if update_fields is None or name in update_fields:
+                loaded[name] = getattr(self, name)
+        self._loaded_values = loaded
@@ -2,12 +2,12 @@
 
 from django.urls import include, path
 
-from .SSLCOMMERZ import payment_success, payment_fail, payment_cancel
+from .SSLCOMMERZ import payment_success, payment_fail, payment_cancel, payment_session
 
 
 from .views import (
     APIRootView, AppointmentViewSet, BrandViewSet, CartViewSet, CategoryViewSet, DoctorViewSet,LogoutView, MonthlyReportDetailView, MonthlyReportListView, OrderViewSet, PrescriptionRequestViewSet, ProductViewSet, RegisterAPIView, ResendOTPView,
-    UpdateProfileView, UserListView, VerifyOTPView, CustomTokenObtainPairView, YearlyReportDetailView, YearlyReportListView, orders_report_items
+    UpdateProfileView, UserListView, VerifyOTPView, CustomTokenObtainPairView, YearlyReportDetailView, YearlyReportListView, cache_stats, export_table, orders_report_items
 )
 
 from rest_framework_simplejwt.views import ( # pyright: ignore[reportMissingImports]
@@ -35,6 +35,7 @@ urlpatterns = [
     path('resend-otp/', ResendOTPView.as_view(), name='resend-otp'),
     path('login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path("users/", UserListView.as_view(), name="user-list"),
+    path("cache/stats/", cache_stats, name="cache-stats"),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('update-profile/', UpdateProfileView.as_view(), name='update-profile'),
     path('api/logout/', LogoutView.as_view(), name='logout'),
@@ -42,6 +43,7 @@ urlpatterns = [
     path("payment/success/", payment_success, name="payment_success"),
     path("payment/fail/", payment_fail, name="payment_fail"),
     path("payment/cancel/", payment_cancel, name="payment_cancel"),
+    path("payment/session/<str:tran_id>/", payment_session, name="payment_session"),
 
     path('monthly/', MonthlyReportListView.as_view(), name='monthly-report-list'),
     path('monthly/<str:month>/', MonthlyReportDetailView.as_view(), name='monthly-report-detail'),
@@ -49,6 +51,7 @@ urlpatterns = [
     path('yearly/<int:year>/', YearlyReportDetailView.as_view(), name='yearly-report-detail'),
     
     path("orders-report-items/", orders_report_items, name="orders-report-items"),
+    path("exports/<str:table>/", export_table, name="export-table"),
 
     # Include router URLs
     path('', include(router.urls)),  # Corrected path and added namespace
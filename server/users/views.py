@@ -1,7 +1,7 @@
+import io
 import uuid
 from django.utils import timezone
 import random
-from django.core.mail import send_mail
 from rest_framework import generics
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.views import APIView
@@ -10,21 +10,37 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.permissions import IsAdminUser
 from django.shortcuts import get_object_or_404
 from django.conf import settings
+from django.db import transaction
 
-from users.helpers import get_available_time_slots
+from users.helpers import booked_slots_index, get_available_time_slots
 from .SSLCOMMERZ import create_payment_session
 
 from django.utils.crypto import get_random_string
 from rest_framework.parsers import MultiPartParser, FormParser
 
-from .models import Appointment, Brand, Cart, CartItem, Category, Doctor, MonthlyReport, Order, OrderItem, PrescriptionRequest,Product, YearlyReport,  Appointment, Doctor
-from .serializers import AppointmentSerializer, BrandSerializer, CartSerializer, CategorySerializer, DoctorSerializer, MonthlyReportSerializer, OrderSerializer, PrescriptionRequestSerializer,ProductSerializer, YearlyReportSerializer
+from .models import Appointment, Brand, Cart, CartItem, Category, Doctor, MonthlyReport, Order, PrescriptionRequest,Product, ProductDailySales, YearlyReport,  Appointment, Doctor
+from .serializers import PRODUCT_LIST_FIELDS, AppointmentSerializer, BrandSerializer, CartSerializer, CategorySerializer, DoctorSerializer, MonthlyReportSerializer, OrderSerializer, PrescriptionRequestSerializer,ProductSerializer, YearlyReportSerializer
 from datetime import datetime, timedelta
-from django.db.models import Sum, F
+from django.db.models import Count, F, Prefetch, Sum
 from rest_framework.decorators import api_view, permission_classes
 from django.http import HttpResponse
 import csv
 
+from .exports import EXPORT_TABLES, csv_value, stream_csv, stream_json, stream_ndjson
+from .catalog_import import IMPORT_CHUNK_SIZE, import_products
+from .categories import get_category_tree, subtree_filter
+from .filters import ProductFilterBackend, filter_products, product_facets
+from .pagination import (
+    NewestFirstCursorPagination,
+    OrderCursorPagination,
+    ProductCursorPagination,
+    ReportCursorPagination,
+)
+from .response_cache import CachedResponseMixin, metrics as cache_metrics
+from .search import search_products
+from .suggest import get_suggest_index
+from .stock import InsufficientStock, order_quantities, reserve_stock
+
 # store/views.py
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
@@ -39,6 +55,7 @@ EMAIL_HOST_USER = settings.EMAIL_HOST_USER
 from .models import (
     CustomUser,
     EmailOTP,
+    OutboundEmail,
 )
 from .serializers import (
     CustomTokenObtainPairSerializer,
@@ -125,17 +142,13 @@ class ResendOTPView(APIView):
                 defaults={"otp_code": otp, "created_at": timezone.now()}
             )
 
-            # Send OTP to user's email
-            try:
-                send_mail(
-                    subject="Your New OTP for ShasthoMeds",
-                    message=f"Your new OTP is: {otp}",
-                    from_email=EMAIL_HOST_USER,
-                    recipient_list=[email],
-                )
-                
-            except Exception as e:
-                return Response({"error": f"Failed to send OTP: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            # Queue OTP email (sent by the mail worker)
+            OutboundEmail.enqueue(
+                subject="Your New OTP for ShasthoMeds",
+                message=f"Your new OTP is: {otp}",
+                from_email=EMAIL_HOST_USER,
+                recipient_list=[email],
+            )
 
             return Response({"message": "OTP resent successfully."}, status=status.HTTP_200_OK)
 
@@ -159,6 +172,7 @@ class MyProtectedView(APIView):
 class UserListView(generics.ListAPIView):
     queryset = CustomUser.objects.all().order_by('-id')
     serializer_class = UserRegistrationSerializer
+    pagination_class = NewestFirstCursorPagination
     permission_classes = [IsAdminUser]   # only admins can access
 
 # View to logout
@@ -187,33 +201,188 @@ class UpdateProfileView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 # View to get all brands
-class BrandViewSet(viewsets.ModelViewSet):
+class BrandViewSet(CachedResponseMixin, viewsets.ModelViewSet):
+    cache_namespace = "brands"
     queryset = Brand.objects.all().order_by("-created_at")
     serializer_class = BrandSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]  # anyone can read, only logged-in users can create/update/delete
     parser_classes = [MultiPartParser, FormParser]   # ADD THIS
 
 # View to get all categories
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(CachedResponseMixin, viewsets.ModelViewSet):
+    cache_namespace = "categories"
     queryset = Category.objects.all().order_by("-created_at")
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     parser_classes = [MultiPartParser, FormParser]   # ADD THIS
 
+    @action(detail=False, methods=["get"])
+    def tree(self, request):
+        """Full nested category tree, cached and served with an ETag (304 when unchanged)."""
+        tree, etag = get_category_tree()
+        headers = {"ETag": etag, "Cache-Control": "public, max-age=60"}
+        if etag in request.headers.get("If-None-Match", ""):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(tree, headers=headers)
+
+    @action(detail=True, methods=["get"], pagination_class=ProductCursorPagination)
+    def products(self, request, pk=None):
+        """Products of this category and all sub-categories (closure-table join, paginated)."""
+        category = self.get_object()
+        queryset = (
+            Product.objects.filter(**subtree_filter([category.pk]))
+            .select_related("brand", "category")
+            .only(*ProductSerializer.columns_for(PRODUCT_LIST_FIELDS))
+        )
+        queryset = filter_products(queryset, request.query_params)
+        context = {**self.get_serializer_context(), "fields": list(PRODUCT_LIST_FIELDS)}
+        page = self.paginate_queryset(queryset)
+        serializer = ProductSerializer(page if page is not None else queryset, many=True, context=context)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
 # View to get all products
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(CachedResponseMixin, viewsets.ModelViewSet):
+    """
+    Products with an eager-loading query plan.
+    Reads accept ?view=list (catalogue card fields) or ?fields=a,b,c;
+    only the columns needed for the chosen fields are selected.
+    /products/search/?q= returns ranked matches (card fields by default);
+    /products/suggest/?q= answers type-ahead from the in-process prefix index.
+    Listing, search and /products/facets/ accept the catalogue filters of
+    users/filters.py (category subtree, brand, price range, flags).
+    """
+    cache_namespace = "products"
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]  # anyone can read, only logged-in can create/update/delete
     parser_classes = [MultiPartParser, FormParser]
+    filter_backends = [ProductFilterBackend]
+    pagination_class = ProductCursorPagination
+
+    def get_representation_fields(self):
+        """Output fields requested for a read, or None for the full representation."""
+        if self.request.method not in permissions.SAFE_METHODS:
+            return None
+        fields = self.request.query_params.get("fields")
+        if fields:
+            return [f.strip() for f in fields.split(",") if f.strip()]
+        if self.request.query_params.get("view") == "list" or self.action == "search":
+            return list(PRODUCT_LIST_FIELDS)
+        return None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_representation_fields()
+        if fields is None:
+            return queryset.select_related("brand", "category").defer("search_text")
+
+        model_fields = {f.name for f in Product._meta.concrete_fields}
+        columns = ProductSerializer.columns_for(fields) & model_fields
+        related = [name for name in ("brand", "category") if name in columns]
+        return queryset.select_related(*related).only(*columns)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.get_representation_fields()
+        return context
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """Ranked product search over name, generic name, sku, brand and indication."""
+        text = request.query_params.get("q", "").strip()
+        if not text:
+            return Response({"error": "q is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.query_params.get("limit", 20)), 50)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset()).filter(is_active=True)
+        queryset = search_products(queryset, text)[:max(limit, 1)]
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["get"])
+    def facets(self, request):
+        """Facet counts (category, brand, price band, prescription, stock) for the current filters."""
+        return Response(product_facets(self.filter_queryset(Product.objects.all())))
+
+    @action(detail=False, methods=["get"])
+    def suggest(self, request):
+        """Name / generic name / brand completions for a prefix (no database query once warm)."""
+        text = request.query_params.get("q", "").strip()
+        if not text:
+            return Response([])
+        try:
+            limit = min(int(request.query_params.get("limit", 10)), 25)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(get_suggest_index().lookup(text, max(limit, 1)))
+
+    @action(detail=False, methods=["get"], url_path="suggest/stats", permission_classes=[IsAdminUser])
+    def suggest_stats(self, request):
+        """Size and hit/miss counters of this process's suggestion index."""
+        return Response(get_suggest_index().stats())
+
+    @action(detail=False, methods=["post"], url_path="import", permission_classes=[IsAdminUser])
+    def import_catalogue(self, request):
+        """
+        Upsert products from an uploaded catalogue (multipart field "file", CSV or NDJSON).
+        Form fields: format=csv|ndjson (default from the file name), create_missing, dry_run.
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"error": "file is required"}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = request.data.get("format") or (
+            "ndjson" if upload.name.endswith((".ndjson", ".jsonl")) else "csv"
+        )
+        flag = lambda name: str(request.data.get(name, "")).lower() in ("1", "true", "yes")
+        try:
+            report = import_products(
+                io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline=""),
+                fmt,
+                chunk_size=IMPORT_CHUNK_SIZE,
+                create_missing=flag("create_missing"),
+                dry_run=flag("dry_run"),
+            )
+        except (ValueError, UnicodeDecodeError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
 
 # ---------------- Cart ViewSet ----------------
 class CartViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
+    def get_cart(self, with_totals=True):
+        """
+        Get or create the user's cart with items -> product -> brand/category
+        prefetched in one query. with_totals adds DB-side Count/Sum annotations.
+        """
+        queryset = Cart.objects.prefetch_related(
+            Prefetch(
+                "items",
+                queryset=CartItem.objects.select_related("product__brand", "product__category"),
+                to_attr="prefetched_items",
+            )
+        )
+        if with_totals:
+            queryset = queryset.annotate(
+                items_count=Count("items"),
+                items_quantity=Sum("items__quantity"),
+                items_price=Sum(F("items__product__price") * F("items__quantity")),
+            )
+        try:
+            return queryset.get(user=self.request.user)
+        except Cart.DoesNotExist:
+            cart = Cart.objects.create(user=self.request.user)
+            cart.prefetched_items = []
+            return cart
+
     def list(self, request):
         # Get or create cart for user
-        cart, _ = Cart.objects.get_or_create(user=request.user)
+        cart = self.get_cart()
         serializer = CartSerializer(cart)
         return Response(serializer.data)
 
@@ -229,17 +398,25 @@ class CartViewSet(viewsets.ViewSet):
         if not product_id:
             return Response({"error": "product_id is required"}, status=400)
 
-        product = get_object_or_404(Product, id=product_id)
+        product = get_object_or_404(Product.objects.select_related("brand", "category"), id=product_id)
 
         # Case 1: Prescription NOT required
         if not product.prescription_required:
-            cart, _ = Cart.objects.get_or_create(user=request.user)
-            cart_item, created = CartItem.objects.get_or_create(cart=cart, product=product)
-            if not created:
+            # Mutate the prefetched items in memory; totals are computed from them
+            cart = self.get_cart(with_totals=False)
+            cart_item = next((i for i in cart.prefetched_items if i.product_id == product.id), None)
+            if cart_item:
                 cart_item.quantity += quantity
+                cart_item.save(update_fields=["quantity"])
             else:
-                cart_item.quantity = quantity
-            cart_item.save()
+                cart_item, created = CartItem.objects.get_or_create(
+                    cart=cart, product=product, defaults={"quantity": quantity}
+                )
+                if not created:  # added concurrently since the cart was read
+                    cart_item.quantity += quantity
+                    cart_item.save(update_fields=["quantity"])
+                cart_item.product = product
+                cart.prefetched_items.append(cart_item)
             serializer = CartSerializer(cart)
             return Response(serializer.data, status=201)
 
@@ -253,13 +430,16 @@ class CartViewSet(viewsets.ViewSet):
         if not cart_item_id:
             return Response({"error": "cart_item_id is required"}, status=400)
 
-        try:
-            cart_item = CartItem.objects.get(id=cart_item_id, cart__user=request.user)
-            cart_item.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        except CartItem.DoesNotExist:
+        cart = self.get_cart(with_totals=False)
+        cart_item = next((i for i in cart.prefetched_items if str(i.id) == str(cart_item_id)), None)
+        if cart_item is None:
             return Response({"error": "Item not found"}, status=status.HTTP_404_NOT_FOUND)
 
+        cart_item.delete()
+        cart.prefetched_items.remove(cart_item)
+        serializer = CartSerializer(cart)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
 # ---------------- PrescriptionRequest ViewSet ----------------
 class PrescriptionRequestViewSet(viewsets.ModelViewSet):
     queryset = PrescriptionRequest.objects.all().order_by("-created_at")
@@ -285,13 +465,41 @@ class PrescriptionRequestViewSet(viewsets.ModelViewSet):
 class OrderViewSet(viewsets.ModelViewSet):
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OrderCursorPagination
 
     def get_queryset(self):
         user = self.request.user
+        orders = Order.objects.prefetch_related("items")
         if user.is_staff:  # Admin gets all orders
-            return Order.objects.all().order_by('-created_at')
+            return orders.all().order_by('-created_at')
         # Regular users only see their own orders
-        return Order.objects.filter(user=user).order_by('-created_at')
+        return orders.filter(user=user).order_by('-created_at')
+
+    def place_order(self, data):
+        """
+        Validate and save the order, reserve its stock and clear the user's
+        cart in one transaction. Returns (order, None) or (None, error Response).
+        """
+        serializer = self.get_serializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data["items"]
+
+        try:
+            with transaction.atomic():
+                order = serializer.save()
+                reserve_stock(order_quantities(items))
+                # Delete the cart (its CartItems cascade)
+                Cart.objects.filter(user=self.request.user).delete()
+        except InsufficientStock as e:
+            product_name = next(
+                (i["product_name"] for i in items if int(i["product_id"]) == e.product_id),
+                e.product_id,
+            )
+            return None, Response(
+                {"error": f"Not enough stock for {product_name}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return order, None
 
     def create(self, request, *args, **kwargs):
         data = request.data
@@ -299,94 +507,26 @@ class OrderViewSet(viewsets.ModelViewSet):
 
         # COD: Just save order directly
         if payment_method == "cod":
-            serializer = self.get_serializer(data=data)
-            serializer.is_valid(raise_exception=True)
-            order = serializer.save()
-
-            try:
-                cart = Cart.objects.get(user=request.user)
-                cart.items.all().delete()  # Delete all CartItem(s)
-                cart.delete()  # Optional: delete the empty cart itself
-            except Cart.DoesNotExist:
-                pass  # User had no cart, nothing to delete
-
-            # Reduce product stock
-            for item in order.items.all():
-                product = item.product
-                if product.stock >= item.quantity:
-                    product.stock -= item.quantity
-                    product.save()
-                else:
-                # Optional: handle out-of-stock scenario
-                    print(f"Not enough stock for {product.name}")
-            
-
-            # Send email to customer
-            # try:
-            #     product_list = "\n".join(
-            #         [f"{item.product.name} x {item.quantity}" for item in order.items.all()]
-            #     )
-            #     send_mail(
-            #         subject=f"Order Confirmation - #{order.id}",
-            #         message=f"Dear {order.name},\n\nThank you for your order.\n\n"
-            #             f"Order Details:\n{product_list}\n\n"
-            #             f"Total Amount: {order.total_amount} BDT\n\n"
-            #             "We will notify you once your order is shipped.\n\n"
-            #             "Thanks,\nShasthoMeds",
-            #         from_email=EMAIL_HOST_USER,
-            #         recipient_list=[order.email],
-            #     )
-            # except Exception as e:
-            #     # Optional: log the email error
-            #     print(f"Error sending email: {str(e)}")
-            # return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+            order, error = self.place_order(data)
+            if error:
+                return error
+            return Response(self.get_serializer(order).data, status=status.HTTP_201_CREATED)
 
         # Card Payment: Generate tran_id + call SSLCOMMERZ
         elif payment_method == "card":
-           # Generate unique tran_id
+            # Generate unique tran_id
             tran_id = f"TRANS{uuid.uuid4().hex[:6].upper()}"
             data["tran_id"] = tran_id
 
             # Save order in DB
-            serializer = self.get_serializer(data=data)
-            serializer.is_valid(raise_exception=True)
-            order = serializer.save()
-
-            try:
-                cart = Cart.objects.get(user=request.user)
-                cart.items.all().delete()  # Delete all CartItem(s)
-                cart.delete()  # Optional: delete the empty cart itself
-            except Cart.DoesNotExist:
-                pass  # User had no cart, nothing to delete
-
-            # Reduce product stock
-            for item in order.items.all():
-                product = item.product
-                if product.stock >= item.quantity:
-                    product.stock -= item.quantity
-                    product.save()
-                else:
-                # Optional: handle out-of-stock scenario
-                    print(f"Not enough stock for {product.name}")
-
-            # Send email to customer
-            # try:
-            #     product_list = "\n".join(
-            #         [f"{item.product.name} x {item.quantity}" for item in order.items.all()]
-            #     )
-            #     send_mail(
-            #         subject=f"Order Confirmation - #{order.id}",
-            #         message=f"Dear {order.name},\n\nThank you for your order.\n\n"
-            #                 f"Order Details:\n{product_list}\n\n"
-            #                 f"Total Amount: {order.total_amount} BDT\n\n"
-            #                 "We will notify you once your order is shipped.\n\n"
-            #                 "Thanks,\nShasthoMeds",
-            #         from_email=EMAIL_HOST_USER,
-            #         recipient_list=[order.email],
-            #     )
-            # except Exception as e:
-            #     # Optional: log the email error
-            #     print(f"Error sending email: {str(e)}")
+            order, error = self.place_order(data)
+            if error:
+                return error
+
+            # Client creates the gateway session itself via the async
+            # payment/session/<tran_id>/ endpoint
+            if str(data.get("defer_payment_session", "")).lower() in ("1", "true"):
+                return Response(self.get_serializer(order).data, status=status.HTTP_201_CREATED)
 
             # Call create_payment_session with your order data
             ssl_response = create_payment_session(
@@ -430,12 +570,35 @@ class YearlyReportDetailView(generics.RetrieveAPIView):
     serializer_class = YearlyReportSerializer
     lookup_field = 'year'
 
+# Serialize a page of objects with one booked-slots query for all their doctors
+def _doctor_page_response(view, objects, doctors, paginated):
+    today = date.today()
+    context = view.get_serializer_context()
+    context["booked_slots"] = booked_slots_index(
+        {d.id for d in doctors}, today, today + timedelta(days=6)
+    )
+    serializer = view.get_serializer(objects, many=True, context=context)
+    if paginated:
+        return view.get_paginated_response(serializer.data)
+    return Response(serializer.data)
+
 # List all doctors
-class DoctorViewSet(viewsets.ModelViewSet):
+class DoctorViewSet(CachedResponseMixin, viewsets.ModelViewSet):
+    cache_namespace = "doctors"
+    cache_vary_on_date = True  # availability covers the coming week
     queryset = Doctor.objects.all()
     serializer_class = DoctorSerializer
     permission_classes = [permissions.AllowAny]
 
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: self.build_list(request))
+
+    def build_list(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        doctors = page if page is not None else list(queryset)
+        return _doctor_page_response(self, doctors, doctors, page is not None)
+
 
 # List all appointments
 class AppointmentViewSet(viewsets.ModelViewSet):
@@ -443,6 +606,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
     serializer_class = AppointmentSerializer
     permission_classes = [permissions.IsAuthenticated]
     http_method_names = ['get', 'post', 'put', 'patch', 'delete'] 
+    pagination_class = NewestFirstCursorPagination
 
     def perform_create(self, serializer):
         # Automatically set the patient to the logged-in user
@@ -450,10 +614,19 @@ class AppointmentViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+        appointments = Appointment.objects.select_related("doctor", "patient")
         if user.is_staff:  # Admin can see/manage everything
-            return Appointment.objects.all()
+            return appointments.all()
         # Patients can only see their own appointments
-        return Appointment.objects.filter(patient=user)
+        return appointments.filter(patient=user)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        appointments = page if page is not None else list(queryset)
+        return _doctor_page_response(
+            self, appointments, [a.doctor for a in appointments], page is not None
+        )
 
 
     # Available small slots
@@ -480,38 +653,122 @@ class AppointmentViewSet(viewsets.ModelViewSet):
 
 
 # All reports
+REPORT_ITEM_FIELDS = ("date", "product", "quantity_sold", "income", "actual_cost", "profit", "stock_remaining")
+
+
+def _report_item_row(item):
+    return {
+        "date": str(item.date),
+        "product": item.product_name,
+        "quantity_sold": item.quantity,
+        "income": float(item.income),
+        "actual_cost": float(item.cost),
+        "profit": float(item.profit),
+        "stock_remaining": item.stock_remaining,
+    }
+
+
 @api_view(['GET'])
-@permission_classes([AllowAny])
+@permission_classes([IsAdminUser])
 def orders_report_items(request):
     """
-    Return all paid order items with date, product, quantity, stock, income, profit.
+    Return daily per-product sales (from ProductDailySales) with date, product,
+    quantity, stock, income, profit.
+
+    Query params:
+      start_date / end_date  -> YYYY-MM-DD (inclusive)
+      product                -> product id
+      export=json|csv        -> stream the whole filtered range instead of cursor pages
     """
-    items = OrderItem.objects.filter(order__payment_status="paid").values(
-        "order__created_at__date", "product_name", "product_id"
-    ).annotate(
-        total_qty=Sum("quantity"),
-        total_income=Sum("subtotal"),
-        total_actual=Sum(F("actual_price") * F("quantity"))
-    ).order_by("order__created_at__date", "product_name")
-
-    report_data = []
-    for item in items:
-        try:
-            product_obj = Product.objects.get(id=item["product_id"])
-            stock = product_obj.stock
-        except Product.DoesNotExist:
-            stock = None
+    items = ProductDailySales.objects.filter(quantity__gt=0).annotate(
+        stock_remaining=F("product__stock")  # joined in the same query, no per-row lookups
+    )
+
+    start_date = request.query_params.get("start_date")
+    end_date = request.query_params.get("end_date")
+    product_id = request.query_params.get("product")
+    try:
+        if start_date:
+            items = items.filter(date__gte=date.fromisoformat(start_date))
+        if end_date:
+            items = items.filter(date__lte=date.fromisoformat(end_date))
+        if product_id:
+            items = items.filter(product_id=int(product_id))
+    except ValueError:
+        return Response(
+            {"error": "start_date/end_date must be YYYY-MM-DD and product an id"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    export = request.query_params.get("export")
+    if export in ("json", "csv"):
+        rows = (
+            _report_item_row(item)
+            for item in items.order_by("date", "product_name").iterator(chunk_size=2000)
+        )
+        if export == "csv":
+            return stream_csv(
+                ([row[f] for f in REPORT_ITEM_FIELDS] for row in rows),
+                REPORT_ITEM_FIELDS,
+                "orders_report.csv",
+            )
+        return stream_json(rows)
 
-        report_data.append({
-            "date": str(item["order__created_at__date"]),
-            "product": item["product_name"],
-            "quantity_sold": item["total_qty"],
-            "income": float(item["total_income"] or 0),
-            "actual_cost": float(item["total_actual"] or 0),
-            "profit": float((item["total_income"] or 0) - (item["total_actual"] or 0)),
-            "stock_remaining": stock
-        })
+    paginator = ReportCursorPagination()
+    page = paginator.paginate_queryset(items, request)
+    return paginator.get_paginated_response([_report_item_row(item) for item in page])
 
-    return Response(report_data)
 
+# Streaming exports (orders, order items, reports, products)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_table(request, table):
+    """
+    Stream a whole table as CSV (default) or NDJSON with constant memory.
 
+    Query params:
+      export=csv|ndjson      -> output format
+      fields=a,b,c           -> column projection (subset of the table's export fields)
+      start_date / end_date  -> YYYY-MM-DD (inclusive) on the table's date column
+    """
+    config = EXPORT_TABLES.get(table)
+    if config is None:
+        return Response({"error": f"Unknown export '{table}'"}, status=status.HTTP_404_NOT_FOUND)
+
+    fields = config["fields"]
+    requested = request.query_params.get("fields")
+    if requested:
+        fields = tuple(f.strip() for f in requested.split(",") if f.strip())
+        unknown = [f for f in fields if f not in config["fields"]]
+        if unknown or not fields:
+            return Response(
+                {"error": f"Unknown fields: {', '.join(unknown)}", "allowed": config["fields"]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+    queryset = config["queryset"].all()
+    date_lookup = config["date_lookup"]
+    date_value = config.get("date_value", lambda d: d)
+    try:
+        start_date = request.query_params.get("start_date")
+        end_date = request.query_params.get("end_date")
+        if start_date:
+            queryset = queryset.filter(**{f"{date_lookup}__gte": date_value(date.fromisoformat(start_date))})
+        if end_date:
+            queryset = queryset.filter(**{f"{date_lookup}__lte": date_value(date.fromisoformat(end_date))})
+    except ValueError:
+        return Response({"error": "start_date/end_date must be YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = queryset.values_list(*fields).iterator(chunk_size=2000)
+    if request.query_params.get("export") == "ndjson":
+        return stream_ndjson((dict(zip(fields, row)) for row in rows), f"{table}.ndjson")
+    return stream_csv(
+        ([csv_value(v) for v in row] for row in rows), fields, f"{table}.csv"
+    )
+
+
+# Response cache hit rates of this process (users/response_cache.py)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    return Response(cache_metrics.snapshot())